@@ -1,125 +1,227 @@
-from dataclasses import dataclass
-from typing import List, Tuple, Optional, Any
+from dataclasses import dataclass, field, fields, is_dataclass
+from typing import ClassVar, List, Tuple, Optional, Any
 
 # AST Nodes
 class ASTNode:
-    pass
-
-@dataclass
+    """Базовый класс узлов. Узлы хранят поля в __slots__, без __dict__;
+    _fields - имена полей узла в порядке объявления (как в модуле ast)"""
+    __slots__ = ()
+    _fields: ClassVar[Tuple[str, ...]] = ()
+
+def node(cls):
+    """@dataclass(slots=True) и кортеж _fields для класса узла"""
+    cls = dataclass(slots=True)(cls)
+    cls._fields = tuple(f.name for f in fields(cls))
+    return cls
+
+@node
 class Program(ASTNode):
     decls: List[ASTNode]
 
-@dataclass
+@node
 class IncludeDirective(ASTNode):
     filename: str
 
-@dataclass
+@dataclass(slots=True)
 class Parameter:
     param_type: str
     name: str
     default_value: Optional[ASTNode] = None
 
 # Обновим FunctionDecl
-@dataclass
+@node
 class FunctionDecl(ASTNode):
     return_type: str
     name: str
     params: List[Parameter]  # Изменяем тип на List[Parameter]
     body: 'Block'
+    # Выводится с @functools.cache; служебная пометка оптимизатора, в дамп AST не попадает
+    memoized: bool = field(default=False, repr=False)
 
-@dataclass
+@node
 class VariableDecl(ASTNode):
     var_type: str
     name: str
     init_value: Optional[ASTNode]
 
-@dataclass
+@node
 class Block(ASTNode):
     statements: List[ASTNode]
 
-@dataclass
+    def force(self):
+        """Разбирает ленивое тело сейчас; у обычного блока ничего не делает"""
+
+class LazyBlock(Block):
+    """Тело функции, которое разбирается при первом обращении к statements.
+    parse - функция без аргументов, возвращающая список операторов"""
+    __slots__ = ('_parse', '_statements')
+
+    def __init__(self, parse):
+        self._parse = parse
+        self._statements = None
+
+    @property
+    def statements(self):
+        self.force()
+        return self._statements
+
+    @statements.setter
+    def statements(self, value):
+        self._statements = value
+        self._parse = None
+
+    @property
+    def parsed(self) -> bool:
+        return self._parse is None
+
+    def force(self):
+        if self._parse is not None:
+            self._statements = self._parse()
+            self._parse = None
+
+    def map_statements(self, transform):
+        """Применяет transform к списку операторов: сразу, если тело
+        уже разобрано, иначе - при разборе"""
+        if self._parse is None:
+            self._statements = transform(self._statements)
+        else:
+            parse = self._parse
+            self._parse = lambda: transform(parse())
+
+    def __repr__(self):
+        return f"Block(statements={self.statements!r})"
+
+@node
 class IfStatement(ASTNode):
     condition: ASTNode
     then_branch: Block
     else_branch: Optional[Block]
 
-@dataclass
+@node
 class WhileStatement(ASTNode):
     condition: ASTNode
     body: Block
 
-@dataclass
+@node
 class ForStatement(ASTNode):
     init: Optional[ASTNode]
     condition: Optional[ASTNode]
     increment: Optional[ASTNode]
     body: Block
 
-@dataclass
+@node
 class DoWhileStatement(ASTNode):
     body: Block
     condition: ASTNode
 
-@dataclass
+@node
 class ReturnStatement(ASTNode):
     value: Optional[ASTNode]
 
-@dataclass
+@node
 class ExpressionStatement(ASTNode):
     expr: ASTNode
 
-@dataclass
+@node
 class BinaryOperation(ASTNode):
     operator: str
     left: ASTNode
     right: ASTNode
 
-@dataclass
+@node
 class UnaryOperation(ASTNode):
     operator: str
     operand: ASTNode
     is_postfix: bool = False
 
-@dataclass
+@node
 class Literal(ASTNode):
     value: Any
     literal_type: str
 
-@dataclass
+@node
 class VariableReference(ASTNode):
     name: str
 
-@dataclass
+@node
 class FunctionCall(ASTNode):
     name: str
     arguments: List[ASTNode]
 
-@dataclass
+@node
 class CoutStatement(ASTNode):
     expressions: List[ASTNode]
 
-@dataclass
+@node
 class CinStatement(ASTNode):
     variables: List[ASTNode]
 
-@dataclass
+@node
 class TernaryOperation(ASTNode):
     condition: ASTNode
     then_expr: ASTNode
     else_expr: ASTNode
 
-@dataclass
+@node
 class ArrayDecl(ASTNode):
     var_type: str
     name: str
     size: Optional[ASTNode]
     init_values: List[ASTNode]
 
-@dataclass
+@node
 class ArrayAccess(ASTNode):
     array: ASTNode
     index: ASTNode
 
-@dataclass
+@node
 class StringLiteral(ASTNode):
-    value: str
\ No newline at end of file
+    value: str
+
+# for со счётчиком, выводимый как for var_name in range(start, stop, step)
+@node
+class RangeFor(ASTNode):
+    var_name: str
+    start: ASTNode
+    stop: ASTNode
+    step: int
+    body: Block
+
+_repr_fields = {}  # класс узла -> (имя в repr, поля, попадающие в repr)
+
+def dump_ast(node) -> str:
+    """То же, что repr(node), но без рекурсии - для деревьев любой глубины.
+    Строки вывода - str, ещё не выведенные значения - кортежи (value,)"""
+    parts = []
+    stack = [(node,)]
+    while stack:
+        item = stack.pop()
+        if type(item) is str:
+            parts.append(item)
+            continue
+        value = item[0]
+        cls = type(value)
+        layout = _repr_fields.get(cls)
+        if layout is None and is_dataclass(cls):
+            # Подклассы без своих полей (LazyBlock) выводятся под именем узла
+            base = next(c for c in cls.__mro__ if '__dataclass_fields__' in vars(c))
+            layout = _repr_fields[cls] = (base.__qualname__, [f.name for f in fields(cls) if f.repr])
+        if layout is not None:
+            name, names = layout
+            pending = [f"{name}("]
+            for i, field_name in enumerate(names):
+                pending.append(f", {field_name}=" if i else f"{field_name}=")
+                pending.append((getattr(value, field_name),))
+            pending.append(")")
+            stack.extend(reversed(pending))
+        elif cls is list:
+            pending = ["["]
+            for i, element in enumerate(value):
+                if i:
+                    pending.append(", ")
+                pending.append((element,))
+            pending.append("]")
+            stack.extend(reversed(pending))
+        else:
+            parts.append(repr(value))
+    return "".join(parts)
\ No newline at end of file
@@ -0,0 +1,170 @@
+"""Асинхронный API транслятора для asyncio-сервисов:
+
+    async with AsyncTranslator(max_workers=4) as service:
+        python_code, messages = await service.translate(cpp_code, timeout=5)
+
+Трансляция идёт в пуле потоков или процессов и не блокирует цикл событий.
+Исходники от large_size символов занимают не больше large_workers
+исполнителей, так что на мелкие запросы остаётся хотя бы один (кроме
+max_workers=1: единственный исполнитель делят все). У мелких и больших
+запросов свои очереди ограниченной длины: при переполнении запрос сразу
+отклоняется TranslationQueueFull. Сервис работает в одном цикле событий:
+семафоры asyncio привязываются к циклу, в котором их впервые ждали.
+"""
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from typing import NamedTuple, Optional
+from translator import CppToPythonTranslator, TranslationOptions
+
+class TranslationQueueFull(Exception):
+    """Очередь переполнена: запрос не принят, его стоит повторить позже"""
+
+class ServiceInfo(NamedTuple):
+    """Счётчики AsyncTranslator"""
+    running: int    # переводятся в пуле
+    queued: int     # ждут исполнителя
+    completed: int
+    rejected: int   # отклонены TranslationQueueFull
+    timed_out: int
+    cancelled: int
+
+# Транслятор на поток исполнителя (в пуле процессов - на процесс): экземпляр
+# хранит сообщения последнего перевода и не годится для параллельных вызовов
+_local = threading.local()
+
+def _translate_job(cpp_code: str, options: TranslationOptions) -> tuple:
+    translator = getattr(_local, 'translator', None)
+    if translator is None or translator.options != options:
+        translator = _local.translator = CppToPythonTranslator(options)
+    return translator.translate(cpp_code)
+
+class AsyncTranslator:
+    def __init__(self, options: Optional[TranslationOptions] = None, executor: str = "thread",
+                 max_workers: int = 4, max_queue: int = 64, large_size: int = 64 * 1024,
+                 large_workers: Optional[int] = None, large_max_queue: int = 8):
+        """
+        executor - "thread" (общий кэш трансляций, но потоки делят GIL) или
+        "process" (переводы действительно идут параллельно). large_workers -
+        сколько исполнителей могут занять большие исходники: по умолчанию
+        половина, не больше max_workers - 1 и не меньше одного. При
+        max_workers=1 большие исходники тоже получают этот исполнитель -
+        иначе они не переводились бы вовсе
+        """
+        if executor not in ("thread", "process"):
+            raise ValueError(f"Неизвестный пул: {executor}")
+        if max_workers < 1:
+            raise ValueError(f"max_workers должно быть не меньше 1: {max_workers}")
+        self.options = options or TranslationOptions()
+        self.large_size = large_size
+        if large_workers is None:
+            large_workers = max_workers // 2
+        large_workers = max(1, min(large_workers, max_workers - 1))
+        pool = ThreadPoolExecutor if executor == "thread" else ProcessPoolExecutor
+        self._executor = pool(max_workers)
+        self._slots = asyncio.Semaphore(max_workers)          # все исполнители
+        self._large_slots = asyncio.Semaphore(large_workers)  # доступные большим
+        self._max_queue = {False: max_queue, True: large_max_queue}
+        self._queued = {False: 0, True: 0}
+        self.running = 0
+        self.completed = self.rejected = self.timed_out = self.cancelled = 0
+
+    async def translate(self, cpp_code: str, timeout: Optional[float] = None,
+                        options: Optional[TranslationOptions] = None) -> tuple:
+        """
+        Как CppToPythonTranslator.translate: (python_code, system_messages).
+        timeout - секунды на весь запрос вместе с ожиданием в очереди, по
+        истечении - asyncio.TimeoutError. Отмена (и таймаут) снимает запрос
+        с очереди; уже начатый перевод доводится в пуле, результат
+        отбрасывается, а исполнитель до конца считается занятым
+        """
+        large = len(cpp_code) >= self.large_size
+        if self._queued[large] >= self._max_queue[large]:
+            self.rejected += 1
+            raise TranslationQueueFull(f"Очередь заполнена: {self._queued[large]} из {self._max_queue[large]}")
+        try:
+            result = await asyncio.wait_for(self._run(cpp_code, large, options or self.options), timeout)
+        except asyncio.TimeoutError:
+            self.timed_out += 1
+            raise
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        self.completed += 1
+        return result
+
+    async def _run(self, cpp_code: str, large: bool, options: TranslationOptions) -> tuple:
+        semaphores = [self._large_slots, self._slots] if large else [self._slots]
+        acquired = []
+        self._queued[large] += 1
+        try:
+            for semaphore in semaphores:
+                await semaphore.acquire()
+                acquired.append(semaphore)
+        except BaseException:
+            self._release(acquired)
+            raise
+        finally:
+            self._queued[large] -= 1
+
+        self.running += 1
+        loop = asyncio.get_running_loop()
+        try:
+            future = self._executor.submit(_translate_job, cpp_code, options)
+        except BaseException:
+            self._finish(acquired)
+            raise
+        # Слоты освобождаются, когда пул действительно закончил перевод,
+        # а не когда ожидавшая его задача отменена
+        def done(_):
+            try:
+                loop.call_soon_threadsafe(self._finish, acquired)
+            except RuntimeError:
+                # Цикл уже закрыт: слоты ждать некому, но счётчики верны
+                self._finish(acquired)
+        future.add_done_callback(done)
+        return await asyncio.wrap_future(future)
+
+    def _finish(self, acquired: list):
+        self.running -= 1
+        try:
+            self._release(acquired)
+        except RuntimeError:
+            pass  # будить ожидавших в закрытом цикле незачем
+
+    @staticmethod
+    def _release(acquired: list):
+        for semaphore in acquired:
+            semaphore.release()
+
+    def info(self) -> ServiceInfo:
+        return ServiceInfo(self.running, self._queued[False] + self._queued[True],
+                           self.completed, self.rejected, self.timed_out, self.cancelled)
+
+    def close(self):
+        """Останавливает пул; ещё не начатые переводы отменяются"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.close()
+
+# Общие сервисы translate_async, по одному на цикл событий: каждый
+# asyncio.run() получает свой. Сервисы закрытых циклов закрываются при
+# создании следующего
+_default_services = {}  # цикл -> AsyncTranslator
+_default_lock = threading.Lock()
+
+async def translate_async(cpp_code: str, options: Optional[TranslationOptions] = None,
+                          timeout: Optional[float] = None) -> tuple:
+    """Перевод без блокировки цикла событий через общий AsyncTranslator"""
+    loop = asyncio.get_running_loop()
+    with _default_lock:
+        service = _default_services.get(loop)
+        if service is None:
+            for closed in [other for other in _default_services if other.is_closed()]:
+                _default_services.pop(closed).close()
+            service = _default_services[loop] = AsyncTranslator()
+    return await service.translate(cpp_code, timeout, options)
\ No newline at end of file
@@ -0,0 +1,130 @@
+"""Пакетная трансляция без GUI:
+
+    python -m translator batch SRC_DIR OUT_DIR [-j N]
+
+Все .cpp из дерева SRC_DIR переводятся параллельно в процессах
+ProcessPoolExecutor; OUT_DIR повторяет структуру каталогов (a/b.cpp -> a/b.py).
+"""
+import os
+import sys
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Optional
+from translator import (CppToPythonTranslator, TranslationOptions, TranslationCache,
+                        DiskTranslationCache, OPTIMIZATIONS)
+
+CPP_SUFFIXES = ('.cpp', '.cc', '.cxx')
+
+@dataclass
+class FileResult:
+    """Итог перевода одного файла"""
+    path: str  # относительно SRC_DIR
+    error: Optional[str] = None  # None - файл переведён
+    source_bytes: int = 0
+    output_lines: int = 0
+    seconds: float = 0.0
+
+def find_sources(src_dir: str) -> list:
+    """Относительные пути исходников C++ в дереве, в отсортированном порядке"""
+    sources = []
+    for root, dirs, files in os.walk(src_dir):
+        dirs.sort()
+        for name in sorted(files):
+            if name.endswith(CPP_SUFFIXES):
+                sources.append(os.path.relpath(os.path.join(root, name), src_dir))
+    return sources
+
+# Состояние процесса-исполнителя: один транслятор на процесс
+_worker = None
+
+def init_worker(src_dir: str, out_dir: str, options: TranslationOptions, cache_dir: Optional[str]):
+    global _worker
+    # Без каталога кэша - без кэша: в пакете исходники не повторяются, а
+    # общий кэш в памяти держал бы результаты каждого процесса
+    cache = DiskTranslationCache(cache_dir) if cache_dir else TranslationCache(max_entries=0)
+    _worker = (src_dir, out_dir, CppToPythonTranslator(options, cache))
+
+def translate_one(path: str) -> FileResult:
+    src_dir, out_dir, translator = _worker
+    result = FileResult(path)
+    start = time.perf_counter()
+    try:
+        with open(os.path.join(src_dir, path), encoding='utf-8') as f:
+            source = f.read()
+        result.source_bytes = len(source.encode('utf-8'))
+        python_code, _ = translator.translate(source)
+        if translator.error is not None:
+            result.error = translator.error
+        else:
+            target = os.path.join(out_dir, os.path.splitext(path)[0] + '.py')
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            with open(target, 'w', encoding='utf-8') as f:
+                f.write(python_code)
+            result.output_lines = python_code.count('\n') + 1
+    except (OSError, UnicodeDecodeError) as e:
+        result.error = str(e)
+    result.seconds = time.perf_counter() - start
+    return result
+
+def translate_tree(src_dir: str, out_dir: str, options: Optional[TranslationOptions] = None,
+                   jobs: Optional[int] = None, cache_dir: Optional[str] = None):
+    """Переводит дерево; результаты выдаются по мере готовности, но в
+    порядке find_sources, независимо от числа процессов"""
+    options = options or TranslationOptions()
+    sources = find_sources(src_dir)
+    initargs = (src_dir, out_dir, options, cache_dir)
+    jobs = jobs or os.cpu_count() or 1
+    if jobs == 1 or len(sources) <= 1:
+        init_worker(*initargs)
+        yield from map(translate_one, sources)
+        return
+    # Пачки по несколько файлов: меньше обменов с процессами на мелких файлах
+    chunksize = max(1, min(16, len(sources) // (jobs * 4)))
+    with ProcessPoolExecutor(jobs, initializer=init_worker, initargs=initargs) as executor:
+        yield from executor.map(translate_one, sources, chunksize=chunksize)
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m translator', description='Транслятор C++ в Python')
+    commands = parser.add_subparsers(dest='command', required=True)
+    batch = commands.add_parser('batch', help='перевести все .cpp из каталога')
+    batch.add_argument('src_dir')
+    batch.add_argument('out_dir')
+    batch.add_argument('-j', '--jobs', type=int, default=None, help='число процессов (по умолчанию - все ядра)')
+    batch.add_argument('--cache-dir', default=None, help='каталог дискового кэша трансляций')
+    batch.add_argument('--iterative', action='store_true', help='разбор и генерация на явном стеке')
+    batch.add_argument('--fast-io', action='store_true', help='буферизованный cin/cout')
+    batch.add_argument('--arrays', choices=('list', 'array', 'numpy'), default='list')
+    batch.add_argument('--no-optimize', action='store_true',
+                       help='без проходов оптимизатора: вывод как в GUI')
+    batch.add_argument('--hoist-invariants', action='store_true', help='выносить инварианты циклов')
+    batch.add_argument('-q', '--quiet', action='store_true', help='печатать только ошибки и итог')
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.src_dir):
+        parser.error(f'нет каталога {args.src_dir}')
+    # Пакетный режим оптимизирует, если не попросили иного; hoist_invariants -
+    # только по флагу
+    optimizations = dict.fromkeys(OPTIMIZATIONS, not args.no_optimize)
+    options = TranslationOptions(iterative=args.iterative, fast_io=args.fast_io, arrays=args.arrays,
+                                 hoist_invariants=args.hoist_invariants, **optimizations)
+
+    start = time.perf_counter()
+    files = failed = total_bytes = 0
+    for result in translate_tree(args.src_dir, args.out_dir, options, args.jobs, args.cache_dir):
+        files += 1
+        total_bytes += result.source_bytes
+        if result.error is not None:
+            failed += 1
+            print(f'ОШИБКА {result.path}: {result.error}', file=sys.stderr)
+        elif not args.quiet:
+            print(f'{result.path}: {result.output_lines} строк, {result.seconds:.3f} с')
+    elapsed = max(time.perf_counter() - start, 1e-9)
+
+    print(f'Файлов: {files}, ошибок: {failed}, {elapsed:.2f} с, '
+          f'{files / elapsed:.1f} файлов/с, {total_bytes / elapsed / 1e6:.2f} МБ/с')
+    return 1 if failed else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
\ No newline at end of file
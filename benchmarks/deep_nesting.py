@@ -0,0 +1,101 @@
+"""Время и память трансляции глубоко вложенных конструкций:
+
+    python -m benchmarks.deep_nesting [--sizes 25000 50000 100000] [--shapes parens sums]
+
+Для каждой формы и глубины вложенности n печатает число узлов AST, полное
+время, время разбора и генерации в мкс на уровень вложенности и пик памяти
+(tracemalloc) в байтах на уровень; у всех форм, кроме parens (скобки в AST не
+попадают), узлов порядка n. При линейной трансляции удельные значения почти
+не растут с n. Все проходы оптимизатора включены, режим iterative - иначе
+глубина ограничена стеком
+"""
+import gc
+import sys
+import time
+import argparse
+import tracemalloc
+from translator import CppToPythonTranslator, TranslationOptions, TranslationCache, OPTIMIZATIONS
+from optimizer import iter_nodes
+
+# Форма -> функция (n -> исходник C++) с вложенностью порядка n
+SHAPES = {
+    # ((((a)))) - одно выражение глубины n
+    "parens": lambda n: ("int main() { int a = 1; int x = " + "(" * n + "a" + ")" * n
+                         + "; cout << x << endl; return 0; }"),
+    # !!!!a - цепочка унарных операторов
+    "unary": lambda n: "int main() { int a = 1; int x = " + "!" * n + "a; cout << x << endl; return 0; }",
+    # a + a + ... + a в цикле: левое дерево глубины n, инвариант цикла
+    "sums": lambda n: ("int main() { int a = 1; int s = 0; for (int i = 0; i < 3; i++) { s = i + "
+                       + " + ".join(["a"] * n) + "; } cout << s << endl; return 0; }"),
+    # if ... else if ... - цепочка глубины n, выводится через elif
+    "elifs": lambda n: ("int main() { int a = 7; int x = -1; "
+                        + " else ".join(f"if (a == {k}) x = {k};" for k in range(n))
+                        + " cout << x << endl; return 0; }"),
+    # n вложенных for с инвариантом m * n в теле: RangeLoops и LoopInvariants.
+    # Отступы вывода растут с глубиной, так что размер кода - порядка n^2
+    "loops": lambda n: ("int main() { int n = 1; int s = 0; int m = 2; "
+                        + "".join(f"for (int i{k} = 0; i{k} < n; i{k}++) {{ s = s + m * n; " for k in range(n))
+                        + "}" * n + " cout << s << endl; return 0; }"),
+}
+
+DEFAULT_SIZES = {"parens": (25000, 50000, 100000), "unary": (25000, 50000, 100000),
+                 "sums": (25000, 50000, 100000), "elifs": (10000, 20000, 40000),
+                 "loops": (1000, 2000, 4000)}
+
+def make_translator() -> CppToPythonTranslator:
+    # Без кэша: повторные замеры не должны попадать в него
+    options = TranslationOptions(iterative=True, hoist_invariants=True, **dict.fromkeys(OPTIMIZATIONS, True))
+    return CppToPythonTranslator(options, TranslationCache(max_entries=0))
+
+def measure(source: str, memory: bool = False) -> tuple:
+    """(секунды, пик памяти в байтах или 0) полной трансляции source"""
+    translator = make_translator()
+    gc.collect()
+    if memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    translator.translate(source)
+    seconds = time.perf_counter() - start
+    peak = 0
+    if memory:
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    if translator.error is not None:
+        raise RuntimeError(translator.error)
+    return seconds, peak
+
+def profile(source: str) -> dict:
+    """Время разбора и генерации и число узлов AST до оптимизаций"""
+    translator = make_translator()
+    translator.translate(source)
+    if translator.error is not None:
+        raise RuntimeError(translator.error)
+    start = time.perf_counter()
+    tree = translator.parser_class(translator.lexer.tokenize_stream(source)).parse_program()
+    parse = time.perf_counter() - start
+    start = time.perf_counter()
+    translator.generator.generate(translator.ast)
+    generate = time.perf_counter() - start
+    return {"parse": parse, "generate": generate, "nodes": sum(1 for _ in iter_nodes(tree))}
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.deep_nesting', description=__doc__.split('\n')[0])
+    parser.add_argument('--shapes', nargs='+', choices=sorted(SHAPES), default=list(SHAPES))
+    parser.add_argument('--sizes', nargs='+', type=int, default=None, help='размеры для всех форм')
+    parser.add_argument('--no-memory', action='store_true', help='без tracemalloc (он замедляет в разы)')
+    args = parser.parse_args(argv)
+
+    print(f"{'форма':<8}{'n':>8}{'узлов':>9}{'всего, с':>10}{'мкс/ур.':>9}"
+          f"{'разбор':>9}{'генерация':>11}{'байт/ур.':>10}")
+    for shape in args.shapes:
+        for n in args.sizes or DEFAULT_SIZES[shape]:
+            source = SHAPES[shape](n)
+            seconds, _ = measure(source)
+            phases = profile(source)
+            per_level = "-" if args.no_memory else f"{measure(source, memory=True)[1] / n:.0f}"
+            print(f"{shape:<8}{n:>8}{phases['nodes']:>9}{seconds:>10.2f}{seconds / n * 1e6:>9.1f}"
+                  f"{phases['parse'] / n * 1e6:>9.1f}{phases['generate'] / n * 1e6:>11.1f}{per_level:>10}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
\ No newline at end of file
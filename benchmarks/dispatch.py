@@ -0,0 +1,105 @@
+"""Время генерации на узел: таблицы @handles/@emits против цепочки isinstance:
+
+    python -m benchmarks.dispatch [--functions 500 2000] [--repeat 5]
+
+До @handles/@emits generate выбирал код узла цепочкой isinstance. Здесь она
+воспроизведена подклассом ChainCodeGenerator: те же методы генерации, но
+ищутся перебором типов в порядке прежней цепочки, так что разница между
+столбцами - только стоимость диспетчеризации. Печатает лучшее из --repeat
+время generate в мкс на узел AST
+"""
+import sys
+import time
+import argparse
+from ast_nodes import *
+from code_generator import CodeGenerator
+from lexer import Lexer
+from parser import Parser
+from optimizer import iter_nodes
+from benchmarks.node_memory import make_source
+
+# Порядок проверок прежнего generate; узлы, появившиеся позже, проверяются после
+CHAIN_ORDER = (Program, FunctionDecl, Block, ArrayDecl, ArrayAccess, VariableDecl, ForStatement,
+               WhileStatement, DoWhileStatement, IfStatement, CoutStatement, CinStatement,
+               ReturnStatement, ExpressionStatement, BinaryOperation, UnaryOperation, Literal,
+               VariableReference, FunctionCall, TernaryOperation)
+
+class ChainCodeGenerator(CodeGenerator):
+    """CodeGenerator с выбором метода цепочкой isinstance"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Тип -> (метод, оператор ли)
+        self._methods = {t: (self._emitters[t], True) if t in self._emitters else (self._visitors[t], False)
+                         for t in self._handlers}
+        self._later = [t for t in self._handlers if t not in CHAIN_ORDER]
+
+    def _lookup(self, node):
+        if isinstance(node, Program): node_type = Program
+        elif isinstance(node, FunctionDecl): node_type = FunctionDecl
+        elif isinstance(node, Block): node_type = Block
+        elif isinstance(node, ArrayDecl): node_type = ArrayDecl
+        elif isinstance(node, ArrayAccess): node_type = ArrayAccess
+        elif isinstance(node, VariableDecl): node_type = VariableDecl
+        elif isinstance(node, ForStatement): node_type = ForStatement
+        elif isinstance(node, WhileStatement): node_type = WhileStatement
+        elif isinstance(node, DoWhileStatement): node_type = DoWhileStatement
+        elif isinstance(node, IfStatement): node_type = IfStatement
+        elif isinstance(node, CoutStatement): node_type = CoutStatement
+        elif isinstance(node, CinStatement): node_type = CinStatement
+        elif isinstance(node, ReturnStatement): node_type = ReturnStatement
+        elif isinstance(node, ExpressionStatement): node_type = ExpressionStatement
+        elif isinstance(node, BinaryOperation): node_type = BinaryOperation
+        elif isinstance(node, UnaryOperation): node_type = UnaryOperation
+        elif isinstance(node, Literal): node_type = Literal
+        elif isinstance(node, VariableReference): node_type = VariableReference
+        elif isinstance(node, FunctionCall): node_type = FunctionCall
+        elif isinstance(node, TernaryOperation): node_type = TernaryOperation
+        else:
+            node_type = next((t for t in self._later if isinstance(node, t)), None)
+            if node_type is None:
+                return self.emit_unknown, True
+        return self._methods[node_type]
+
+    def generate(self, node, current_indent=0):
+        if node is None:
+            return ""
+        method, is_statement = self._lookup(node)
+        if not is_statement:
+            return method(node, current_indent)
+        return super().generate(node, current_indent)
+
+    def emit(self, node):
+        method, is_statement = self._lookup(node)
+        if is_statement:
+            method(node)
+        else:
+            self.write_code(self.generate(node, self._level))
+
+def best_time(generator, tree, repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        generator.generate(tree)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.dispatch', description=__doc__.split('\n')[0])
+    parser.add_argument('--functions', nargs='+', type=int, default=[500, 2000])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args(argv)
+
+    print(f"{'функций':>8}{'узлов':>9}{'isinstance':>12}{'таблицы':>9}{'ускорение':>11}")
+    for functions in args.functions:
+        tree = Parser(Lexer().tokenize_stream(make_source(functions))).parse_program()
+        nodes = sum(1 for _ in iter_nodes(tree))
+        if ChainCodeGenerator().generate(tree) != CodeGenerator().generate(tree):
+            raise RuntimeError("ChainCodeGenerator выводит другой код")
+        chain = best_time(ChainCodeGenerator(), tree, args.repeat) / nodes * 1e6
+        tables = best_time(CodeGenerator(), tree, args.repeat) / nodes * 1e6
+        print(f"{functions:>8}{nodes:>9}{chain:>12.2f}{tables:>9.2f}{chain / tables:>10.2f}x")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
\ No newline at end of file
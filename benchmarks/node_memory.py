@@ -0,0 +1,79 @@
+"""Память узлов AST: __slots__ против обычных dataclass с __dict__:
+
+    python -m benchmarks.node_memory [--functions 500 2000]
+
+Разбирает сгенерированную программу из N функций и строит из дерева две
+копии: из классов ast_nodes (@dataclass(slots=True)) и из таких же
+dataclass без слотов, как узлы были раньше. Для каждой копии печатает байты
+на узел по tracemalloc: сами узлы и их списки; строки из токенов у копий
+общие и не считаются
+"""
+import gc
+import sys
+import argparse
+import tracemalloc
+from dataclasses import fields, is_dataclass, make_dataclass
+import ast_nodes
+from lexer import Lexer
+from parser import Parser
+from optimizer import iter_nodes
+
+FUNCTION = """int f{i}(int a, int b) {{
+    int s = 0;
+    for (int i = 0; i < a; i++) {{
+        s += i * b + {i} - (a % 7);
+        if (s > 1000 && b != 3) {{ s = s / 2; }} else {{ s = s + 1; }}
+    }}
+    while (b > 0) {{ b--; }}
+    cout << "v" << s << endl;
+    return s + f{previous}(a, b);
+}}"""
+
+def make_source(functions: int) -> str:
+    parts = ["#include <iostream>", "using namespace std;"]
+    parts += [FUNCTION.format(i=i, previous=max(i - 1, 0)) for i in range(functions)]
+    parts.append("int main() { int n; cin >> n; cout << f0(n, 2) << endl; return 0; }")
+    return "\n".join(parts)
+
+# Класс узла -> он же (узлы со слотами) или его копия без слотов
+NODE_CLASSES = [cls for cls in vars(ast_nodes).values()
+                if isinstance(cls, type) and is_dataclass(cls) and cls is not ast_nodes.LazyBlock]
+SLOTTED = {cls: cls for cls in NODE_CLASSES}
+PLAIN = {cls: make_dataclass(cls.__name__, [(f.name, f.type) for f in fields(cls)]) for cls in NODE_CLASSES}
+
+def copy_tree(value, classes: dict):
+    """Копия дерева из классов classes; строки и числа не копируются"""
+    if type(value) is list:
+        return [copy_tree(item, classes) for item in value]
+    cls = classes.get(type(value))
+    if cls is None:
+        return value
+    return cls(*(copy_tree(getattr(value, f.name), classes) for f in fields(value)))
+
+def measure(tree, classes: dict) -> int:
+    """Байт, которые держит копия дерева"""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    copy = copy_tree(tree, classes)
+    size = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del copy
+    return size
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.node_memory', description=__doc__.split('\n')[0])
+    parser.add_argument('--functions', nargs='+', type=int, default=[500, 2000])
+    args = parser.parse_args(argv)
+
+    print(f"{'функций':>8}{'узлов':>9}{'__dict__':>10}{'slots':>8}{'экономия':>10}")
+    for functions in args.functions:
+        tree = Parser(Lexer().tokenize_stream(make_source(functions))).parse_program()
+        nodes = sum(1 for _ in iter_nodes(tree))
+        plain = measure(tree, PLAIN) / nodes
+        slotted = measure(tree, SLOTTED) / nodes
+        print(f"{functions:>8}{nodes:>9}{plain:>10.0f}{slotted:>8.0f}{1 - slotted / plain:>10.0%}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
\ No newline at end of file
@@ -1,294 +1,893 @@
+import io
 from ast_nodes import *
 
+# Вызов main в конце модуля, если функция main объявлена
+MAIN_CALL = ["", "if __name__ == \"__main__\":", "    main()"]
+
+# Рантайм быстрого ввода-вывода (fast_io): cin читает токены из всего stdin
+# сразу, cout копит строки в списке. Буфер пишется при выходе и на переводе
+# строки (endl и "\n" в AST не различить), если в нём набралось 64K частей.
+# char читается по байту через курсор _token/_offset: из "xy" два char
+# получают x и y, а недочитанный остаток токена достаётся следующему чтению
+FAST_IO_PRELUDE = [
+    "import sys",
+    "from atexit import register",
+    "",
+    "_token = b''",
+    "_offset = 0",
+    "",
+    "def _read_tokens():",
+    "    global _token, _offset",
+    "    for token in sys.stdin.buffer.read().split():",
+    "        yield token",
+    "        if _offset < len(_token):",
+    "            token, _token, _offset = _token[_offset:], b'', 0",
+    "            yield token",
+    "    raise EOFError('cin: входные данные закончились')",
+    "",
+    "_next_token = _read_tokens().__next__",
+    "",
+    "def _next_char():",
+    "    global _token, _offset",
+    "    if _offset >= len(_token):",
+    "        _token, _offset = _next_token(), 0",
+    "    _offset += 1",
+    "    return chr(_token[_offset - 1])",
+    "",
+    "_output = []",
+    "_write = _output.append",
+    "_extend = _output.extend",
+    "",
+    "def _endl():",
+    "    if len(_output) > 65536:",
+    "        _flush()",
+    "",
+    "@register",
+    "def _flush():",
+    "    sys.stdout.write(''.join(_output))",
+    "    _output.clear()",
+    "",
+]
+
+# Массивы в режимах arrays="array" и "numpy": тип элемента -> (код типа
+# array.array, dtype NumPy). float хранится как double: значения те же, что
+# в списке. bool - знаковый байт, а не numpy.bool_, у которого + - это "или".
+# Массивы char и string остаются списками: символы в переведённом коде - строки
+TYPED_ARRAYS = {
+    "int": ("i", "int32"),
+    "double": ("d", "float64"),
+    "float": ("d", "float64"),
+    "bool": ("b", "int8"),
+}
+# Элемент компактного массива в cout печатается как в списке: целое double
+# без .0 (d[0] = 3 в списке хранит 3), bool - True/False, а не 1/0
+TYPED_OUTPUT = {
+    "double": "_double",
+    "float": "_double",
+    "bool": "bool",
+}
+TYPED_ARRAY_PRELUDE = [
+    "def _double(x):",
+    "    return int(x) if x.is_integer() and abs(x) < 1e16 else x",
+    "",
+]
+ARRAY_MODES = ("list", "array", "numpy")
+
+# Мемоизированная функция: импорт один раз в прелюдии, а в потоковом
+# выводе, который не знает, что объявлено дальше, - перед первой из них
+MEMOIZE_IMPORT = "import functools"
+MEMOIZE_DECORATOR = "@functools.cache"
+
+def has_memoized(decls) -> bool:
+    """Есть ли среди decls мемоизированные функции. Ленивые тела
+    разбираются сейчас: проходы помечают функцию при разборе её тела"""
+    for decl in decls:
+        if isinstance(decl, FunctionDecl):
+            decl.body.force()
+            if decl.memoized:
+                return True
+    return False
+
+# Чтение одного значения в режиме fast_io по типу переменной; char - один
+# непробельный символ. Необъявленные переменные читаются как int
+FAST_IO_READERS = {
+    "int": "int(_next_token())",
+    "bool": "int(_next_token()) != 0",
+    "float": "float(_next_token())",
+    "double": "float(_next_token())",
+    "string": "_next_token().decode()",
+    "char": "_next_char()",
+}
+
+# Приоритеты операций в выводе Python: операнд с меньшим приоритетом, чем
+# у операции, берётся в скобки (скобки исходника в AST не сохраняются).
+# В Python & | ^ связывают сильнее сравнений, а сравнения образуют цепочки
+# (a < b < c), поэтому сравнение внутри сравнения тоже в скобках.
+# Присваивания (приоритет 0) - отдельные операторы, их операнды не скобятся
+TERNARY_PRECEDENCE = 1
+COMPARISON_PRECEDENCE = 4
+ATOM_PRECEDENCE = 11
+OUTPUT_PRECEDENCE = {
+    '||': 2, '&&': 3,
+    '<': 4, '>': 4, '<=': 4, '>=': 4, '==': 4, '!=': 4,
+    '|': 5, '^': 6, '&': 7, '<<': 8, '>>': 8,
+    '+': 9, '-': 9, '*': 10, '/': 10, '%': 10,
+}
+
+def precedence(node):
+    """Приоритет выражения node в выводе Python"""
+    kind = type(node)
+    if kind is BinaryOperation:
+        return OUTPUT_PRECEDENCE.get(node.operator, 0)
+    if kind is TernaryOperation:
+        return TERNARY_PRECEDENCE
+    return ATOM_PRECEDENCE
+
+def parenthesize(node, code, minimum):
+    """code в скобках, если приоритет node ниже minimum"""
+    return f"({code})" if precedence(node) < minimum else code
+
+# Операции, которые и в Python дают bool
+BOOLEAN_OPERATORS = frozenset({'<', '>', '<=', '>=', '==', '!=', '&&', '||'})
+
+def truth_value(node, code, minimum):
+    """Операнд and/or: небулево значение сравнивается с нулём, иначе
+    and/or вернули бы сам операнд, а не bool, как && и || в C++"""
+    kind = type(node)
+    if (kind is BinaryOperation and node.operator in BOOLEAN_OPERATORS
+            or kind is UnaryOperation and node.operator == '!'
+            or kind is Literal and node.literal_type == "bool"):
+        return parenthesize(node, code, minimum)
+    return f"{parenthesize(node, code, COMPARISON_PRECEDENCE + 1)} != 0"
+
+def handles(*node_types):
+    """Помечает метод CodeGenerator как генератор выражения для узлов
+    node_types: метод возвращает строку кода. Подклассы добавляют новые
+    выражения так же - методом с @handles(НовыйУзел)"""
+    def mark(method):
+        method.node_types = node_types
+        method.is_statement = False
+        return method
+    return mark
+
+def emits(*node_types):
+    """Помечает метод CodeGenerator как генератор оператора для узлов
+    node_types: метод пишет строки в буфер через line() и ничего не возвращает"""
+    def mark(method):
+        method.node_types = node_types
+        method.is_statement = True
+        return method
+    return mark
+
 class CodeGenerator:
-    def __init__(self):
-        pass
+    # Тип узла -> (имя метода, оператор ли); собирается один раз для каждого класса
+    _handlers = {}
+
+    def __init__(self, fast_io: bool = False, arrays: str = "list"):
+        # fast_io: cin/cout через буферизованный рантайм FAST_IO_PRELUDE
+        self.fast_io = fast_io
+        # arrays: "list" - списки, "array" - array.array, "numpy" - ndarray
+        if arrays not in ARRAY_MODES:
+            raise ValueError(f"Неизвестный режим массивов: {arrays}")
+        self.arrays = arrays
+        # Объявленные типы для чтения cin: словарь на модуль, функцию и
+        # тело каждой конструкции, внутренний скрывает внешние. Голый Block
+        # области не открывает: так же разбирается и int a, b;
+        self._scopes = [{}]
+        self._functools = False  # import functools уже выведен
+
+        # Тип узла -> связанный метод; подклассы узлов добавляются при первой встрече
+        self._visitors = {}
+        self._emitters = {}
+        for node_type, (name, is_statement) in self._handlers.items():
+            table = self._emitters if is_statement else self._visitors
+            table[node_type] = getattr(self, name)
+
+        # Операторы пишутся построчно в один буфер с текущим уровнем отступа,
+        # поэтому каждая строка собирается ровно один раз
+        self._out = []
+        self._level = 0
+        self._pad = ""
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._collect_handlers()
+
+    @classmethod
+    def _collect_handlers(cls):
+        handlers = {}
+        for klass in reversed(cls.__mro__):
+            for name, attr in vars(klass).items():
+                for node_type in getattr(attr, 'node_types', ()):
+                    handlers[node_type] = (name, attr.is_statement)
+        cls._handlers = handlers
 
     def generate(self, node, current_indent=0):
         """Главная точка входа для генерации кода из AST."""
         if node is None:
             return ""
-            
-        indent_str = "    " * current_indent
+        node_type = type(node)
+        visitor = self._visitors.get(node_type)
+        if visitor is None and node_type not in self._emitters:
+            visitor = self._resolve(node_type)
+        if visitor is not None:
+            return visitor(node, current_indent)
 
-        if isinstance(node, Program):
-            code_lines = []
-            has_main_function = False
-            
-            # Сначала генерируем все объявления
-            for decl in node.decls:
-                decl_code = self.generate(decl, current_indent)
-                if decl_code:
-                    code_lines.append(decl_code)
-                
-                # Проверяем, есть ли функция main
-                if isinstance(decl, FunctionDecl) and decl.name == "main":
-                    has_main_function = True
-            
-            # Добавляем вызов main функции если она есть
-            if has_main_function:
-                code_lines.append("")
-                code_lines.append("if __name__ == \"__main__\":")
-                code_lines.append("    main()")
-            
-            return "\n".join(code_lines)
+        # Оператор: пишем в отдельный буфер и склеиваем строки один раз
+        saved_out, saved_level = self._out, self._level
+        self._out = []
+        self.set_level(current_indent)
+        try:
+            self.emit(node)
+            return "\n".join(self._out)
+        finally:
+            self._out = saved_out
+            self.set_level(saved_level)
 
-        elif isinstance(node, FunctionDecl):
-            # Генерируем параметры с значениями по умолчанию
-            params_list = []
-            for param in node.params:
-                if param.default_value is not None:
-                    default_code = self.generate(param.default_value, current_indent)
-                    params_list.append(f"{param.name}={default_code}")
-                else:
-                    params_list.append(param.name)
-            
-            params = ", ".join(params_list)
-            header = f"def {node.name}({params}):"
-            body_code = self.generate(node.body, current_indent + 1)
-            return f"{header}\n{body_code}"
+    def _resolve(self, node_type):
+        """Метод для подкласса узла ищется по MRO и запоминается.
+        Возвращает генератор выражения или None, если узел - оператор"""
+        for base in node_type.__mro__[1:]:
+            if base in self._visitors:
+                visitor = self._visitors[node_type] = self._visitors[base]
+                return visitor
+            if base in self._emitters:
+                self._emitters[node_type] = self._emitters[base]
+                return None
+        self._emitters[node_type] = self.emit_unknown
+        return None
 
-        elif isinstance(node, Block):
-            if not node.statements:
-                return indent_str + "pass"
+    # -------------------- Буфер вывода --------------------
+    def set_level(self, level):
+        self._level = level
+        self._pad = "    " * level
+
+    def line(self, text):
+        """Строка на текущем уровне отступа"""
+        self._out.append(self._pad + text)
+
+    def write_code(self, code):
+        """Готовый фрагмент кода: строки без отступа сдвигаются на текущий уровень"""
+        for line in code.split('\n'):
+            if line.strip():
+                self._out.append(line if line.startswith(self._pad) else self._pad + line)
+
+    def emit(self, node):
+        """Записывает оператор в буфер на текущем уровне отступа"""
+        node_type = type(node)
+        emitter = self._emitters.get(node_type)
+        if emitter is None:
+            if node_type in self._visitors or self._resolve(node_type) is not None:
+                # Выражение на месте оператора
+                self.write_code(self.generate(node, self._level))
+                return
+            emitter = self._emitters[node_type]
+        emitter(node)
+
+    def emit_body(self, statements):
+        """Тело цикла или ветки на уровень глубже; pass, если строк не получилось"""
+        self.set_level(self._level + 1)
+        self.enter_scope()
+        start = len(self._out)
+        for stmt in statements:
+            self.emit(stmt)
+        if len(self._out) == start:
+            self.line("pass")
+        self.exit_scope()
+        self.set_level(self._level - 1)
+
+    # -------------------- Типы переменных --------------------
+    def start_module(self, decls=(), memoized=False):
+        """Начало нового модуля: типы прошлого вызова забываются. decls -
+        объявления, которые не выводятся, но видны модулю (контекст куска);
+        memoized - import functools уже есть в прелюдии"""
+        self._scopes = [{}]
+        self._functools = memoized
+        for decl in decls:
+            if isinstance(decl, (VariableDecl, ArrayDecl)):
+                self.declare(decl.name, decl.var_type)
+
+    def enter_scope(self):
+        self._scopes.append({})
+
+    def exit_scope(self):
+        self._scopes.pop()
+
+    def declare(self, name, var_type):
+        self._scopes[-1][name] = var_type
+
+    def declared_type(self, name):
+        """Тип из ближайшей области видимости, None для необъявленных"""
+        for scope in reversed(self._scopes):
+            if name in scope:
+                return scope[name]
+        return None
+
+    def prelude(self, memoized=False) -> list:
+        """Строки в начале модуля: импорты и рантайм включённых режимов.
+        memoized - в модуле есть мемоизированные функции"""
+        lines = [MEMOIZE_IMPORT] if memoized else []
+        if self.arrays == "array":
+            lines.append("from array import array")
+        elif self.arrays == "numpy":
+            lines.append("import numpy")
+        if self.fast_io:
+            lines += FAST_IO_PRELUDE
+        elif lines:
+            lines.append("")
+        if self.arrays != "list":
+            lines += TYPED_ARRAY_PRELUDE
+        return lines
+
+    # -------------------- Потоковый вывод --------------------
+    def iter_blocks(self, ast):
+        """Строки кода списками, по одному на верхнеуровневое объявление.
+        ast - Program или любой итератор объявлений (Parser.iter_declarations),
+        так что ни AST, ни результат целиком в памяти не держатся. Для Program
+        import functools, как и в generate, - в прелюдии; итератор заранее не
+        просмотреть, и import выводится перед первой мемоизированной функцией"""
+        if isinstance(ast, Program):
+            decls = ast.decls
+            memoized = has_memoized(decls)
+        else:
+            decls, memoized = ast, False
+        has_main_function = False
+        self.start_module(memoized=memoized)
+        prelude = self.prelude(memoized)
+        if prelude:
+            yield prelude
+        for decl in decls:
+            lines = self.declaration_lines(decl)
+            if lines:
+                yield lines
+            if isinstance(decl, FunctionDecl) and decl.name == "main":
+                has_main_function = True
+        if has_main_function:
+            yield list(MAIN_CALL)
+
+    def declaration_lines(self, decl) -> list:
+        """Строки одного верхнеуровневого объявления, без прелюдии и вызова main"""
+        self._out = []
+        self.set_level(0)
+        self.emit(decl)
+        lines, self._out = self._out, []
+        return lines
+
+    def iter_lines(self, ast):
+        """Строки кода по одной. Для Program "\n".join(iter_lines(ast)) ==
+        generate(ast); для итератора объявлений отличается только место
+        import functools (см. iter_blocks)"""
+        for lines in self.iter_blocks(ast):
+            yield from lines
+
+    def generate_to(self, ast, sink) -> int:
+        """Пишет код в sink по объявлениям, не собирая его целиком: текстовый
+        или двоичный файловый объект или сокет. Текст тот же, что в iter_lines.
+        Возвращает число строк"""
+        if hasattr(sink, 'sendall'):
+            write = lambda text: sink.sendall(text.encode('utf-8'))
+        elif isinstance(sink, (io.RawIOBase, io.BufferedIOBase)):
+            write = lambda text: sink.write(text.encode('utf-8'))
+        else:
+            write = sink.write
+
+        count = 0
+        for lines in self.iter_blocks(ast):
+            write(("\n" if count else "") + "\n".join(lines))
+            count += len(lines)
+        return count
+
+    # -------------------- Операторы --------------------
+    def emit_unknown(self, node):
+        self.line(f"# [UNKNOWN NODE {type(node).__name__}]")
+
+    @emits(Program)
+    def emit_program(self, node):
+        has_main_function = False
+        memoized = has_memoized(node.decls)
+        self.start_module(memoized=memoized)
+        self._out.extend(self.prelude(memoized))
+        
+        # Сначала генерируем все объявления
+        for decl in node.decls:
+            self.emit(decl)
             
-            lines = []
-            for stmt in node.statements:
-                stmt_code = self.generate(stmt, current_indent)
-                if stmt_code:
-                    # Разбиваем на строки и добавляем правильные отступы
-                    for line in stmt_code.split('\n'):
-                        if line.strip():  # Непустые строки
-                            # Если строка уже имеет отступ, оставляем как есть
-                            if not line.startswith("    " * current_indent):
-                                lines.append(indent_str + line)
-                            else:
-                                lines.append(line)
-                        else:
-                            lines.append("")  # Пустые строки
-            return "\n".join(lines)
+            # Проверяем, есть ли функция main
+            if isinstance(decl, FunctionDecl) and decl.name == "main":
+                has_main_function = True
+        
+        # Добавляем вызов main функции если она есть
+        if has_main_function:
+            self._out.extend(MAIN_CALL)
+
+    @emits(FunctionDecl)
+    def emit_function_decl(self, node):
+        self.enter_scope()  # параметры
+        for text in self.format_header(node, self._level):
+            self.line(text)
+        self.set_level(self._level + 1)
+        self.emit(node.body)
+        self.set_level(self._level - 1)
+        self.exit_scope()
+
+    @emits(Block)
+    def emit_block(self, node):
+        if not node.statements:
+            self.line("pass")
+        for stmt in node.statements:
+            self.emit(stmt)
+
+    @emits(ArrayDecl)
+    def emit_array_decl(self, node):
+        self.declare(node.name, node.var_type)
+        if self.arrays != "list" and node.var_type in TYPED_ARRAYS:
+            self.line(f"{node.name} = {self.format_typed_array(node)}")
+            return
+        # Генерация кода для объявления массива
+        if node.init_values:
+            # Массив с инициализацией
+            init_values = ", ".join(self.generate(val, self._level) for val in node.init_values)
+            self.line(f"{node.name} = [{init_values}]")
+        else:
+            # Массив без инициализации
+            if node.size:
+                size = self.generate(node.size, self._level)
+                self.line(f"{node.name} = [0] * {size}")
+            else:
+                self.line(f"{node.name} = []")
+
+    @emits(VariableDecl)
+    def emit_variable_decl(self, node):
+        self.declare(node.name, node.var_type)
+        if node.var_type == "string":
+            if node.init_value is None:
+                self.line(f"{node.name} = \"\"")
+                return
+        elif node.init_value is None:
+            # Значения по умолчанию для разных типов
+            if node.var_type == "char":
+                self.line(f"{node.name} = '\\0'")
+            else:
+                self.line(f"{node.name} = 0")
+            return
+        self.line(f"{node.name} = {self.generate(node.init_value, self._level)}")
+
+    @emits(ForStatement)
+    def emit_for(self, node):
+        self.enter_scope()  # счётчик из заголовка виден только циклу
+        if node.init:
+            self.emit(node.init)
+        cond_code = self.generate(node.condition, self._level) if node.condition else "True"
+        self.line(f"while {cond_code}:")
+        self.emit_body(node.body.statements)
         
-        elif isinstance(node, ArrayDecl):
-            # Генерация кода для объявления массива
+        # Инкремент
+        if node.increment:
+            incr_code = self.generate(node.increment, self._level)
+            if incr_code:
+                self._out.append("    " * (self._level + 1) + incr_code.strip())
+        self.exit_scope()
+
+    @emits(RangeFor)
+    def emit_range_for(self, node):
+        self.line(f"for {node.var_name} in {self.format_range(node, self._level)}:")
+        self.emit_body(node.body.statements)
+
+    @emits(WhileStatement)
+    def emit_while(self, node):
+        self.line(f"while {self.generate(node.condition, self._level)}:")
+        self.emit_body(node.body.statements)
+
+    @emits(DoWhileStatement)
+    def emit_do_while(self, node):
+        self.line("while True:")
+        self.emit_body(node.body.statements)
+        
+        # Условие выхода
+        cond_code = self.generate(node.condition, self._level)
+        self._out.append("    " * (self._level + 1) + f"if not ({cond_code}):")
+        self._out.append("    " * (self._level + 2) + "break")
+
+    @emits(IfStatement)
+    def emit_if(self, node):
+        self.line(f"if {self.generate(node.condition, self._level)}:")
+        self.emit_body(node.then_branch.statements)
+        
+        # Else ветка если есть
+        if node.else_branch:
+            self.line("else:")
+            self.emit_body(node.else_branch.statements)
+
+    @emits(CoutStatement)
+    def emit_cout(self, node):
+        if self.fast_io:
+            self.emit_fast_cout(node)
+            return
+        parts = []
+        for expr in node.expressions:
+            expr_code = self.generate_output(expr)
+            if isinstance(expr, Literal) and expr.literal_type == "string":
+                parts.append(expr_code)
+            else:
+                parts.append(f"str({expr_code})")
+        
+        if len(parts) == 1:
+            self.line(f"print({parts[0]})")
+        else:
+            # Для вывода с пробелами между элементами
+            self.line(f"print(' '.join([{', '.join(parts)}]))")
+
+    def emit_fast_cout(self, node):
+        """cout без разделителей, как в C++: соседние строковые литералы
+        склеиваются, остальное - str(...), всё одним вызовом _write/_extend.
+        После перевода строки в конце - _endl()"""
+        parts = []
+        text = None  # накопленный текст подряд идущих литералов
+        for expr in node.expressions:
+            if isinstance(expr, Literal) and expr.literal_type in ("string", "char"):
+                text = (text or "") + expr.value
+                continue
+            if text is not None:
+                parts.append(repr(text))
+                text = None
+            parts.append(f"str({self.generate_output(expr)})")
+        if text is not None:
+            parts.append(repr(text))
+
+        if len(parts) == 1:
+            self.line(f"_write({parts[0]})")
+        elif parts:
+            self.line(f"_extend(({', '.join(parts)}))")
+        if text is not None and text.endswith("\n"):
+            self.line("_endl()")
+
+    def generate_output(self, expr):
+        """Код выражения для cout; элемент компактного массива - через TYPED_OUTPUT"""
+        code = self.generate(expr, self._level)
+        if self.arrays != "list" and isinstance(expr, ArrayAccess):
+            wrapper = TYPED_OUTPUT.get(self.declared_type(getattr(expr.array, "name", None)))
+            if wrapper is not None:
+                return f"{wrapper}({code})"
+        return code
+
+    @emits(CinStatement)
+    def emit_cin(self, node):
+        for v in node.variables:
+            var_name = self.generate(v, self._level)
+            if self.fast_io:
+                # cin >> a >> b читает токены, а не строки: можно в одной строке
+                base = v
+                while isinstance(base, ArrayAccess):
+                    base = base.array
+                var_type = self.declared_type(getattr(base, "name", None))
+                self.line(f"{var_name} = {FAST_IO_READERS.get(var_type, FAST_IO_READERS['int'])}")
+            else:
+                self.line(f"{var_name} = int(input())")
+
+    @emits(ReturnStatement)
+    def emit_return(self, node):
+        val = self.generate(node.value, self._level) if node.value else ""
+        self.line(f"return {val}")
+
+    @emits(ExpressionStatement)
+    def emit_expression_statement(self, node):
+        code = self.generate(node.expr, self._level)
+        if code:
+            self.write_code(code)
+
+    # -------------------- Выражения --------------------
+    @handles(BinaryOperation)
+    def generate_binary(self, node, current_indent):
+        left = self.generate(node.left, current_indent)
+        right = self.generate(node.right, current_indent)
+        return self.format_binary(node, left, right)
+
+    @handles(UnaryOperation)
+    def generate_unary(self, node, current_indent):
+        operand = self.generate(node.operand, current_indent)
+        return self.format_unary(node, operand)
+
+    @handles(Literal)
+    def generate_literal(self, node, current_indent):
+        if node.literal_type == "string":
+            return repr(node.value)
+        elif node.literal_type == "char":
+            # Для символов используем одинарные кавычки в Python
+            return repr(node.value)
+        elif node.literal_type == "bool":
+            return "True" if node.value else "False"
+        return str(node.value)
+
+    @handles(VariableReference)
+    def generate_variable(self, node, current_indent):
+        return node.name
+
+    @handles(ArrayAccess)
+    def generate_array_access(self, node, current_indent):
+        array = self.generate(node.array, current_indent)
+        index = self.generate(node.index, current_indent)
+        return f"{parenthesize(node.array, array, ATOM_PRECEDENCE)}[{index}]"
+
+    @handles(FunctionCall)
+    def generate_function_call(self, node, current_indent):
+        args = ", ".join(self.generate(arg, current_indent) for arg in node.arguments)
+        return f"{node.name}({args})"
+
+    @handles(TernaryOperation)
+    def generate_ternary(self, node, current_indent):
+        condition = self.generate(node.condition, current_indent)
+        then_expr = self.generate(node.then_expr, current_indent)
+        else_expr = self.generate(node.else_expr, current_indent)
+        return self.format_ternary(node, condition, then_expr, else_expr)
+
+    def format_binary(self, node, left, right):
+        """Бинарная операция по уже сгенерированным операндам"""
+        operator = node.operator
+        level = OUTPUT_PRECEDENCE.get(operator)
+        if operator in ('&&', '||'):
+            keyword = "and" if operator == '&&' else "or"
+            return f"{truth_value(node.left, left, level)} {keyword} {truth_value(node.right, right, level + 1)}"
+        if level is not None:
+            # Операции левоассоциативны: правый операнд того же приоритета -
+            # в скобках, левый - только у сравнений
+            left = parenthesize(node.left, left, level + (level == COMPARISON_PRECEDENCE))
+            right = parenthesize(node.right, right, level + 1)
+        if operator == '+=':
+            return f"{left} += {right}"
+        elif operator == '-=':
+            return f"{left} -= {right}"
+        elif operator == '*=':
+            return f"{left} *= {right}"
+        elif operator == '/=':
+            return f"{left} //= {right}"  # Целочисленное деление
+        elif operator == '%=':
+            return f"{left} %= {right}"
+        elif operator == '/':
+            return f"{left} // {right}"  # Целочисленное деление
+        elif operator == '%':
+            return f"{left} % {right}"
+        else:
+            return f"{left} {operator} {right}"
+
+    def format_typed_array(self, node):
+        """Компактный массив: array.array или ndarray NumPy"""
+        typecode, dtype = TYPED_ARRAYS[node.var_type]
+        if node.init_values:
+            values = f"[{', '.join(self.generate(val, self._level) for val in node.init_values)}]"
+        elif node.size:
+            size = self.generate(node.size, self._level)
+        else:
+            size = "0"
+
+        if self.arrays == "numpy":
             if node.init_values:
-                # Массив с инициализацией
-                init_values = ", ".join(self.generate(val, current_indent) for val in node.init_values)
-                return indent_str + f"{node.name} = [{init_values}]"
+                return f"numpy.array({values}, dtype=numpy.{dtype})"
+            return f"numpy.zeros({size}, dtype=numpy.{dtype})"
+        if node.init_values:
+            return f"array('{typecode}', {values})"
+        return f"array('{typecode}', [0]) * {size}"
+
+    def format_header(self, node, current_indent):
+        """Строки заголовка функции: декораторы и def"""
+        # Ленивое тело разбирается до заголовка: проходы оптимизации
+        # при разборе могут пометить функцию как мемоизированную
+        node.body.force()
+        header = f"def {node.name}({self.format_params(node.params, current_indent)}):"
+        if not node.memoized:
+            return [header]
+        if self._functools:
+            return [MEMOIZE_DECORATOR, header]
+        self._functools = True
+        return [MEMOIZE_IMPORT, MEMOIZE_DECORATOR, header]
+
+    def format_params(self, params, current_indent):
+        """Параметры функции со значениями по умолчанию; их типы запоминаются для cin"""
+        params_list = []
+        for param in params:
+            self.declare(param.name, param.param_type)
+            if param.default_value is not None:
+                default_code = self.generate(param.default_value, current_indent)
+                params_list.append(f"{param.name}={default_code}")
             else:
-                # Массив без инициализации
-                if node.size:
-                    size = self.generate(node.size, current_indent)
-                    return indent_str + f"{node.name} = [0] * {size}"
-                else:
-                    return indent_str + f"{node.name} = []"
+                params_list.append(param.name)
+        return ", ".join(params_list)
 
-        elif isinstance(node, ArrayAccess):
-            array = self.generate(node.array, current_indent)
-            index = self.generate(node.index, current_indent)
-            return f"{array}[{index}]"
+    def format_range(self, node, current_indent):
+        """range(...) для RangeFor, без аргументов по умолчанию"""
+        start = self.generate(node.start, current_indent)
+        stop = self.generate(node.stop, current_indent)
+        if node.step != 1:
+            return f"range({start}, {stop}, {node.step})"
+        elif start == "0":
+            return f"range({stop})"
+        return f"range({start}, {stop})"
 
+    def format_unary(self, node, operand):
+        """Унарная операция по уже сгенерированному операнду"""
+        if node.is_postfix:
+            if node.operator == "++":
+                return f"{operand} += 1"
+            elif node.operator == "--":
+                return f"{operand} -= 1"
+        elif node.operator == "!":
+            return f"(not {parenthesize(node.operand, operand, COMPARISON_PRECEDENCE)})"
+        else:
+            return f"({node.operator}{parenthesize(node.operand, operand, ATOM_PRECEDENCE)})"
 
-        elif isinstance(node, VariableDecl):
-            if node.var_type == "string":
-                if node.init_value is None:
-                    return indent_str + f"{node.name} = \"\""
-                else:
-                    init = f" = {self.generate(node.init_value, current_indent)}"
-                    return indent_str + f"{node.name}{init}"
-            elif node.init_value is None:
-                # Значения по умолчанию для разных типов
-                if node.var_type == "char":
-                    return indent_str + f"{node.name} = '\\0'"
+    def format_ternary(self, node, condition, then_expr, else_expr):
+        """then if condition else else_expr; вложенный ?: в ветви else - без скобок"""
+        condition = parenthesize(node.condition, condition, TERNARY_PRECEDENCE + 1)
+        then_expr = parenthesize(node.then_expr, then_expr, TERNARY_PRECEDENCE + 1)
+        else_expr = parenthesize(node.else_expr, else_expr, TERNARY_PRECEDENCE)
+        return f"{then_expr} if {condition} else {else_expr}"
+
+CodeGenerator._collect_handlers()
+
+
+# Узлы-выражения: не зависят от отступа и не содержат операторов
+EXPRESSION_NODES = (BinaryOperation, UnaryOperation, Literal, VariableReference,
+                    FunctionCall, ArrayAccess, TernaryOperation)
+
+# Элементы стека генерации операторов: (вид, данные, уровень отступа);
+# _EXIT закрывает область видимости, открытую при раскрытии оператора
+_NODE, _BODY, _LINE, _PASS, _EXIT = range(5)
+
+class StackCodeGenerator(CodeGenerator):
+    """Генерация без рекурсии: операторы раскладываются в строки на явном
+    стеке, выражения собираются обходом в обратном порядке. Цепочки
+    else if выводятся как elif, а не как вложенные else: if"""
+
+    elif_chains = True  # False - else: if, как в CodeGenerator
+
+    def generate(self, node, current_indent=0):
+        if isinstance(node, EXPRESSION_NODES):
+            return self.generate_expression(node, current_indent)
+        return super().generate(node, current_indent)
+
+    def emit(self, node):
+        out = self._out
+        level = self._level
+        stack = [(_NODE, node, level)]
+        while stack:
+            tag, item, item_level = stack.pop()
+            if tag == _LINE:
+                out.append("    " * item_level + item)
+            elif tag == _PASS:
+                # Тело цикла или ветки: pass, если не получилось ни одной строки
+                if len(out) == item:
+                    out.append("    " * item_level + "pass")
+            elif tag == _EXIT:
+                self.exit_scope()
+            elif tag == _BODY:
+                self.enter_scope()
+                stack.append((_EXIT, None, item_level))
+                stack.append((_PASS, len(out), item_level))
+                stack.extend((_NODE, stmt, item_level) for stmt in reversed(item))
+            else:
+                self.set_level(item_level)
+                pending = self._expand(item, item_level)
+                if pending is None:
+                    # Простые операторы: их дети - выражения, рекурсии нет
+                    CodeGenerator.emit(self, item)
                 else:
-                    return indent_str + f"{node.name} = 0"
-            init = f" = {self.generate(node.init_value, current_indent)}"
-            return indent_str + f"{node.name}{init}"
+                    stack.extend(reversed(pending))
+        self.set_level(level)
+
+    def _expand(self, node, level):
+        """Элементы стека для составного оператора в порядке вывода,
+        или None для простого оператора"""
+        body_level = level + 1
+
+        if isinstance(node, Program):
+            memoized = has_memoized(node.decls)
+            self.start_module(memoized=memoized)
+            pending = [(_LINE, line, 0) for line in self.prelude(memoized)]
+            pending += [(_NODE, decl, level) for decl in node.decls]
+            if any(isinstance(decl, FunctionDecl) and decl.name == "main" for decl in node.decls):
+                pending += [(_LINE, line, 0) for line in MAIN_CALL]
+            return pending
+
+        elif isinstance(node, FunctionDecl):
+            self.enter_scope()  # параметры
+            pending = [(_LINE, text, level) for text in self.format_header(node, level)]
+            pending.append((_NODE, node.body, body_level))
+            pending.append((_EXIT, None, level))
+            return pending
+
+        elif isinstance(node, Block):
+            if not node.statements:
+                return [(_LINE, "pass", level)]
+            return [(_NODE, stmt, level) for stmt in node.statements]
 
         elif isinstance(node, ForStatement):
-            init_code = self.generate(node.init, current_indent) if node.init else ""
-            cond_code = self.generate(node.condition, current_indent) if node.condition else "True"
-            incr_code = self.generate(node.increment, current_indent) if node.increment else ""
-            
-            lines = []
-            if init_code:
-                lines.append(init_code)
-            
-            lines.append(indent_str + f"while {cond_code}:")
-            
-            # Тело цикла - ИСПРАВЛЕНИЕ
-            body_lines = []
-            for stmt in node.body.statements:
-                stmt_code = self.generate(stmt, 0)  # Генерируем без отступов
-                if stmt_code:
-                    # Добавляем отступы к каждой строке statement
-                    for line in stmt_code.split('\n'):
-                        if line.strip():
-                            body_lines.append("    " * (current_indent + 1) + line)
-            body_code = "\n".join(body_lines) if body_lines else "    " * (current_indent + 1) + "pass"
-            lines.append(body_code)
-            
-            # Инкремент
-            if incr_code:
-                lines.append("    " * (current_indent + 1) + incr_code.strip())
-            
-            return "\n".join(lines)
+            self.enter_scope()  # счётчик из заголовка виден только циклу
+            pending = [(_NODE, node.init, level)] if node.init else []
+            cond_code = self.generate(node.condition, level) if node.condition else "True"
+            pending.append((_LINE, f"while {cond_code}:", level))
+            pending.append((_BODY, node.body.statements, body_level))
+            if node.increment:
+                pending.append((_LINE, self.generate(node.increment, level).strip(), body_level))
+            pending.append((_EXIT, None, level))
+            return pending
+
+        elif isinstance(node, RangeFor):
+            return [(_LINE, f"for {node.var_name} in {self.format_range(node, level)}:", level),
+                    (_BODY, node.body.statements, body_level)]
 
         elif isinstance(node, WhileStatement):
-            cond_code = self.generate(node.condition, current_indent)
-            
-            lines = [indent_str + f"while {cond_code}:"]
-            
-            # Тело цикла
-            body_lines = []
-            for stmt in node.body.statements:
-                stmt_code = self.generate(stmt, 0)  # Генерируем без отступов
-                if stmt_code:
-                    # Добавляем отступы к каждой строке statement
-                    for line in stmt_code.split('\n'):
-                        if line.strip():
-                            body_lines.append("    " * (current_indent + 1) + line)
-            body_code = "\n".join(body_lines) if body_lines else "    " * (current_indent + 1) + "pass"
-            lines.append(body_code)
-            
-            return "\n".join(lines)
+            return [(_LINE, f"while {self.generate(node.condition, level)}:", level),
+                    (_BODY, node.body.statements, body_level)]
 
         elif isinstance(node, DoWhileStatement):
-            lines = [indent_str + "while True:"]
-            
-            # Тело цикла
-            body_lines = []
-            for stmt in node.body.statements:
-                stmt_code = self.generate(stmt, 0)  # Генерируем без отступов
-                if stmt_code:
-                    # Добавляем отступы к каждой строке statement
-                    for line in stmt_code.split('\n'):
-                        if line.strip():
-                            body_lines.append("    " * (current_indent + 1) + line)
-            body_code = "\n".join(body_lines) if body_lines else "    " * (current_indent + 1) + "pass"
-            lines.append(body_code)
-            
-            # Условие выхода
-            cond_code = self.generate(node.condition, current_indent)
-            lines.append("    " * (current_indent + 1) + f"if not ({cond_code}):")
-            lines.append("    " * (current_indent + 2) + "break")
-            
-            return "\n".join(lines)
+            cond_code = self.generate(node.condition, level)
+            return [(_LINE, "while True:", level),
+                    (_BODY, node.body.statements, body_level),
+                    (_LINE, f"if not ({cond_code}):", body_level),
+                    (_LINE, "break", level + 2)]
 
         elif isinstance(node, IfStatement):
-            cond_code = self.generate(node.condition, current_indent)
-            
-            lines = [indent_str + f"if {cond_code}:"]
-            
-            # Then ветка
-            then_lines = []
-            for stmt in node.then_branch.statements:
-                stmt_code = self.generate(stmt, 0)  # Генерируем без отступов
-                if stmt_code:
-                    # Добавляем отступы к каждой строке statement
-                    for line in stmt_code.split('\n'):
-                        if line.strip():
-                            then_lines.append("    " * (current_indent + 1) + line)
-            then_code = "\n".join(then_lines) if then_lines else "    " * (current_indent + 1) + "pass"
-            lines.append(then_code)
-            
-            # Else ветка если есть
-            if node.else_branch:
-                lines.append(indent_str + "else:")
-                else_lines = []
-                for stmt in node.else_branch.statements:
-                    stmt_code = self.generate(stmt, 0)  # Генерируем без отступов
-                    if stmt_code:
-                        # Добавляем отступы к каждой строке statement
-                        for line in stmt_code.split('\n'):
-                            if line.strip():
-                                else_lines.append("    " * (current_indent + 1) + line)
-                else_code = "\n".join(else_lines) if else_lines else "    " * (current_indent + 1) + "pass"
-                lines.append(else_code)
-            
-            return "\n".join(lines)
-
-        elif isinstance(node, CoutStatement):
-            parts = []
-            for expr in node.expressions:
-                expr_code = self.generate(expr, current_indent)
-                if isinstance(expr, Literal) and expr.literal_type == "string":
-                    parts.append(expr_code)
+            # Цепочка else if разворачивается в цикле, без вложенности
+            keyword = "if"
+            pending = []
+            while True:
+                cond_code = self.generate(node.condition, level)
+                pending.append((_LINE, f"{keyword} {cond_code}:", level))
+                pending.append((_BODY, node.then_branch.statements, body_level))
+                else_branch = node.else_branch
+                if not else_branch:
+                    break
+                if (self.elif_chains and len(else_branch.statements) == 1
+                        and isinstance(else_branch.statements[0], IfStatement)):
+                    node = else_branch.statements[0]
+                    keyword = "elif"
+                    continue
+                pending.append((_LINE, "else:", level))
+                pending.append((_BODY, else_branch.statements, body_level))
+                break
+            return pending
+
+        return None
+
+    def generate_expression(self, node, current_indent=0):
+        """Выражение любой глубины: обход в обратном порядке на явном стеке"""
+        results = []
+        stack = [(node, False)]
+        while stack:
+            node, ready = stack.pop()
+            if ready:
+                if isinstance(node, BinaryOperation):
+                    right = results.pop()
+                    results.append(self.format_binary(node, results.pop(), right))
+                elif isinstance(node, UnaryOperation):
+                    results.append(self.format_unary(node, results.pop()))
+                elif isinstance(node, ArrayAccess):
+                    index = results.pop()
+                    results.append(f"{parenthesize(node.array, results.pop(), ATOM_PRECEDENCE)}[{index}]")
+                elif isinstance(node, FunctionCall):
+                    count = len(node.arguments)
+                    args = results[len(results) - count:]
+                    del results[len(results) - count:]
+                    results.append(f"{node.name}({', '.join(args)})")
                 else:
-                    parts.append(f"str({expr_code})")
-            
-            if len(parts) == 1:
-                return indent_str + f"print({parts[0]})"
-            else:
-                # Для вывода с пробелами между элементами
-                return indent_str + f"print(' '.join([{', '.join(parts)}]))"
-
-        elif isinstance(node, CinStatement):
-            reads = []
-            for v in node.variables:
-                var_name = self.generate(v, current_indent)
-                reads.append(indent_str + f"{var_name} = int(input())")
-            return "\n".join(reads)
-
-        elif isinstance(node, ReturnStatement):
-            val = self.generate(node.value, current_indent) if node.value else ""
-            return indent_str + f"return {val}"
-
-        elif isinstance(node, ExpressionStatement):
-            return self.generate(node.expr, current_indent)
-
-        elif isinstance(node, BinaryOperation):
-            left = self.generate(node.left, current_indent)
-            right = self.generate(node.right, current_indent)
-            
-            if node.operator == '+=':
-                return f"{left} += {right}"
-            elif node.operator == '-=':
-                return f"{left} -= {right}"
-            elif node.operator == '*=':
-                return f"{left} *= {right}"
-            elif node.operator == '/=':
-                return f"{left} //= {right}"  # Целочисленное деление
-            elif node.operator == '%=':
-                return f"{left} %= {right}"
-            elif node.operator == '/':
-                return f"{left} // {right}"  # Целочисленное деление
-            elif node.operator == '%':
-                return f"{left} % {right}"
-            else:
-                return f"{left} {node.operator} {right}"
-
-        elif isinstance(node, UnaryOperation):
-            operand = self.generate(node.operand, current_indent)
-            if node.is_postfix:
-                if node.operator == "++":
-                    return f"{operand} += 1"
-                elif node.operator == "--":
-                    return f"{operand} -= 1"
-            else:
-                return f"({node.operator}{operand})"
-
-        elif isinstance(node, Literal):
-            if node.literal_type == "string":
-                return repr(node.value)
-            elif node.literal_type == "char":
-                # Для символов используем одинарные кавычки в Python
-                return repr(node.value)
-            elif node.literal_type == "bool":
-                return "True" if node.value else "False"
-            return str(node.value)
-
-        elif isinstance(node, VariableReference):
-            return node.name
-
-        elif isinstance(node, FunctionCall):
-            args = ", ".join(self.generate(arg, current_indent) for arg in node.arguments)
-            return f"{node.name}({args})"
-        
-        elif isinstance(node, TernaryOperation):
-            condition = self.generate(node.condition, current_indent)
-            then_expr = self.generate(node.then_expr, current_indent)
-            else_expr = self.generate(node.else_expr, current_indent)
-            return f"{then_expr} if {condition} else {else_expr}"
+                    else_expr = results.pop()
+                    then_expr = results.pop()
+                    results.append(self.format_ternary(node, results.pop(), then_expr, else_expr))
+                continue
 
-        else:
-            return indent_str + f"# [UNKNOWN NODE {type(node).__name__}]"
\ No newline at end of file
+            if isinstance(node, BinaryOperation):
+                children = (node.left, node.right)
+            elif isinstance(node, UnaryOperation):
+                children = (node.operand,)
+            elif isinstance(node, ArrayAccess):
+                children = (node.array, node.index)
+            elif isinstance(node, FunctionCall):
+                children = node.arguments
+            elif isinstance(node, TernaryOperation):
+                children = (node.condition, node.then_expr, node.else_expr)
+            else:
+                # Литералы, имена и прочие узлы генерируются как обычно
+                results.append(CodeGenerator.generate(self, node, current_indent))
+                continue
+            stack.append((node, True))
+            stack.extend((child, False) for child in reversed(children))
+        return results[0]
\ No newline at end of file
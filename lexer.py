@@ -1,16 +1,212 @@
-from dataclasses import dataclass
-from typing import List, Set
+from array import array
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass, field
+from typing import IO, Iterable, Iterator, List, Optional, Set, Tuple, Union
+import codecs
+import mmap
+import os
 import re
 
+class SourceIndex:
+    """
+    Индекс начал строк исходного текста: строка и столбец по смещению
+    находятся двоичным поиском. Для готовой строки индекс строится при
+    первом запросе, при потоковом чтении пополняется кусками через feed.
+    """
+    __slots__ = ('_source', '_line_starts')
+
+    def __init__(self, source: Optional[str] = None):
+        self._source = source
+        self._line_starts = None if source is not None else array('I', [0])
+
+    @property
+    def line_starts(self) -> array:
+        """Смещения начала каждой строки по возрастанию"""
+        if self._line_starts is None:
+            self._line_starts = array('I', [0])
+            self.feed(self._source, 0)
+            self._source = None
+        return self._line_starts
+
+    def feed(self, text: str, offset: int):
+        """Добавляет начала строк из куска text, который начинается со смещения offset"""
+        line_starts = self._line_starts
+        newline = text.find('\n')
+        while newline != -1:
+            line_starts.append(offset + newline + 1)
+            newline = text.find('\n', newline + 1)
+
+    def position(self, offset: int) -> Tuple[int, int]:
+        """Возвращает (строка, столбец) для смещения, обе нумерации с 1"""
+        line_starts = self.line_starts
+        line = bisect_right(line_starts, offset)
+        return line, offset - line_starts[line - 1] + 1
+
+    def edited(self, offset: int, removed: int, inserted: str, new_source: str) -> 'SourceIndex':
+        """Индекс текста после правки; уже построенная часть переиспользуется"""
+        if self._line_starts is None:
+            return SourceIndex(new_source)
+        line_starts = self._line_starts
+        index = SourceIndex()
+        index._line_starts = line_starts[:bisect_right(line_starts, offset)]
+        index.feed(inserted, offset)
+        delta = len(inserted) - removed
+        tail = line_starts[bisect_right(line_starts, offset + removed):]
+        index._line_starts.extend(map(delta.__add__, tail) if delta else tail)
+        return index
+
 @dataclass
 class Token:
-    type: str
+    kind: int
     value: str
-    line: int
-    col: int
+    offset: int
+    source_index: SourceIndex = field(repr=False, compare=False)
+
+    @property
+    def type(self) -> str:
+        return TOKEN_KINDS[self.kind][0]
+
+    @property
+    def line(self) -> int:
+        return self.source_index.position(self.offset)[0]
+
+    @property
+    def col(self) -> int:
+        return self.source_index.position(self.offset)[1]
 
     def __repr__(self):
-        return f"Token({self.type}, '{self.value}', {self.line}:{self.col})"
+        line, col = self.source_index.position(self.offset)
+        return f"Token({self.type}, '{self.value}', {line}:{col})"
+
+# Ключевые слова C++
+KEYWORDS = {
+    'if', 'else', 'for', 'while', 'do', 'break', 'continue', 'return',
+    'switch', 'case', 'default', 'class', 'public', 'private', 'protected',
+    'int', 'float', 'double', 'char', 'bool', 'void', 'const', 'new', 'delete',
+    'try', 'catch', 'throw', 'using', 'namespace', 'std', 'string', 'vector', 'list',
+    'true', 'false', 'auto', 'include', 'cin', 'cout', 'endl'
+}
+
+# Операторы и разделители, которые распознаёт лексер
+OPERATORS = [
+    '<<=', '>>=', '...', '++', '--', '->', '&&', '||', '<<', '>>', '<=', '>=', '==', '!=',
+    '+=', '-=', '*=', '/=', '%=', '&=', '|=', '^=',
+    '+', '-', '*', '/', '%', '&', '|', '^', '<', '>', '=', '!', '?', '~', '.',
+]
+DELIMITERS = ['(', ')', '{', '}', '[', ']', ';', ',', ':']
+
+# Коды токенов: код -> (тип, фиксированное значение или None). Литералы и
+# идентификаторы делят код на всех, а у каждого оператора, разделителя и
+# ключевого слова код свой, так что парсер сравнивает одно число.
+TOKEN_KINDS = [
+    ('EOF', ''), ('IDENT', None), ('INT', None), ('FLOAT', None), ('STRING', None),
+    ('CHAR', None), ('INCLUDE', None),
+] + [('OP', op) for op in OPERATORS] \
+  + [('DELIM', delim) for delim in DELIMITERS] \
+  + [(keyword.upper(), keyword) for keyword in sorted(KEYWORDS)]
+
+KIND_EOF = 0
+KIND_IDENT = 1
+KIND_INT = 2
+KIND_FLOAT = 3
+KIND_STRING = 4
+KIND_CHAR = 5
+KIND_INCLUDE = 6
+
+# Код токена по его тексту: операторы, разделители и ключевые слова
+KIND_BY_TEXT = {value: code for code, (_, value) in enumerate(TOKEN_KINDS) if value}
+
+# Действия лексера для групп, которые не сводятся к одному коду токена
+# (отрицательные, чтобы не пересекаться с кодами)
+_SKIP = -1
+_NUMBER = -2
+_WORD = -3
+_MISMATCH = -4
+
+# Сколько символов в конце куска не разбирается до прихода следующего:
+# с запасом больше самой длинной фиксированной лексемы (std::x, <<=)
+_LOOKAHEAD = 16
+
+def _read_chunks(read, chunk_size: int) -> Iterator[str]:
+    """Читает куски текста через read(), декодируя байты как UTF-8"""
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    while True:
+        data = read(chunk_size)
+        if not data:
+            break
+        yield data if isinstance(data, str) else decoder.decode(data)
+    tail = decoder.decode(b'', final=True)
+    if tail:
+        yield tail
+
+class TokenView:
+    """
+    Лёгкое представление одного токена из TokenStream. Тип и значение
+    читаются сразу, строка и столбец - только по запросу.
+    """
+    __slots__ = ('stream', 'index', 'kind', 'type', 'value')
+
+    def __init__(self, stream: 'TokenStream', index: int):
+        self.stream = stream
+        self.index = index
+        self.kind = kind = stream.kinds[index]
+        self.type, value = TOKEN_KINDS[kind]
+        self.value = stream.source[stream.starts[index]:stream.ends[index]] if value is None else value
+
+    @property
+    def offset(self) -> int:
+        return self.stream.starts[self.index]
+
+    @property
+    def line(self) -> int:
+        return self.stream.position(self.index)[0]
+
+    @property
+    def col(self) -> int:
+        return self.stream.position(self.index)[1]
+
+    def __repr__(self):
+        line, col = self.stream.position(self.index)
+        return f"Token({self.type}, '{self.value}', {line}:{col})"
+
+class TokenStream:
+    """
+    Компактный список токенов: коды в array('B'), смещения в array('I').
+    Значения вырезаются из исходного текста, а строка и столбец
+    вычисляются через SourceIndex только по запросу.
+    """
+    __slots__ = ('source', 'kinds', 'starts', 'ends', 'source_index')
+
+    def __init__(self, source: str):
+        self.source = source
+        self.kinds = array('B')
+        self.starts = array('I')
+        self.ends = array('I')
+        self.source_index = SourceIndex(source)
+
+    def __len__(self):
+        return len(self.kinds)
+
+    def __getitem__(self, index: int) -> TokenView:
+        return TokenView(self, index)
+
+    def __iter__(self):
+        for index in range(len(self.kinds)):
+            yield TokenView(self, index)
+
+    def value(self, index: int) -> str:
+        fixed = TOKEN_KINDS[self.kinds[index]][1]
+        if fixed is not None:
+            return fixed
+        return self.source[self.starts[index]:self.ends[index]]
+
+    def position(self, index: int) -> Tuple[int, int]:
+        """(строка, столбец) токена с номером index"""
+        return self.source_index.position(self.starts[index])
+
+    def to_tokens(self) -> List[Token]:
+        """Разворачивает поток в обычный список Token"""
+        return [Token(view.kind, view.value, view.offset, self.source_index) for view in self]
 
 class Lexer:
     def __init__(self):
@@ -33,133 +229,251 @@ class Lexer:
         ]
         
         # Ключевые слова C++
-        self.keywords = {
-            'if', 'else', 'for', 'while', 'do', 'break', 'continue', 'return',
-            'switch', 'case', 'default', 'class', 'public', 'private', 'protected',
-            'int', 'float', 'double', 'char', 'bool', 'void', 'const', 'new', 'delete',
-            'try', 'catch', 'throw', 'using', 'namespace', 'std', 'string', 'vector', 'list',
-            'true', 'false', 'auto', 'include', 'cin', 'cout', 'endl'
-        }
+        self.keywords = set(KEYWORDS)
         
+        # Единый шаблон: ведущие пробелы поглощаются вместе с токеном,
+        # а последняя группа ловит любой неизвестный символ, поэтому
+        # совпадения finditer идут подряд без пропусков.
+        # Порядок альтернатив подобран по частоте токенов; важно лишь, чтобы
+        # QUALIFIED_IDENT шёл раньше IDENT, а NUMBER и COMMENT - раньше OPERATOR.
+        # Переводы строк тоже поглощаются: строки считает SourceIndex.
+        patterns = dict(self.patterns)
+        patterns['MISMATCH'] = r'[^ \t\r\n]'
+        order = ['QUALIFIED_IDENT', 'IDENT', 'DELIMITER', 'NUMBER', 'COMMENT',
+                 'OPERATOR', 'STRING', 'CHAR', 'INCLUDE', 'MISMATCH']
         self.token_re = re.compile(
-            '|'.join(f'(?P<{name}>{pattern})' for name, pattern in self.patterns),
+            r'[ \t\r\n]*(?:' + '|'.join(f'(?P<{name}>{patterns[name]})' for name in order) + ')',
             re.DOTALL
         )
 
+        # Таблица: номер группы -> код токена или действие лексера
+        group_actions = {
+            'INCLUDE': KIND_INCLUDE,
+            'COMMENT': _SKIP,
+            'STRING': KIND_STRING,
+            'CHAR': KIND_CHAR,
+            'NUMBER': _NUMBER,
+            'QUALIFIED_IDENT': _WORD,
+            'IDENT': _WORD,
+            'OPERATOR': _WORD,
+            'DELIMITER': _WORD,
+            'MISMATCH': _MISMATCH,
+        }
+        self._actions = [None] * (self.token_re.groups + 1)
+        for name, index in self.token_re.groupindex.items():
+            self._actions[index] = group_actions[name]
+
+        # Слова с фиксированным кодом: ключевые слова, std::cout/cin/endl/string,
+        # операторы и разделители. Всё остальное, что попало в _WORD, - IDENT.
+        self._words = {text: (KIND_BY_TEXT[text], text) for text in OPERATORS + DELIMITERS}
+        for keyword in self.keywords:
+            self._words[keyword] = (KIND_BY_TEXT[keyword], keyword)
+        for name in ('cout', 'cin', 'endl', 'string'):
+            self._words[f'std::{name}'] = (KIND_BY_TEXT[name], name)
+        self._word_kinds = {text: word[0] for text, word in self._words.items()}
+
     def tokenize(self, source: str) -> List[Token]:
-        self.tokens = []
-        line = 1
-        col = 1
-        pos = 0
-        
-        while pos < len(source):
-            # Пропускаем пробелы
-            if source[pos] in ' \t\r':
-                col += 1
-                pos += 1
-                continue
-                
-            # Обработка новой строки
-            if source[pos] == '\n':
-                line += 1
-                col = 1
-                pos += 1
-                continue
-            
-            # Ищем совпадение с регулярными выражениями
-            match = self.token_re.match(source, pos)
-            if not match:
-                raise SyntaxError(f"Неизвестный символ '{source[pos]}' в строке {line}:{col}")
-            
-            token_type = match.lastgroup
-            token_value = match.group(token_type)
-            
-            if token_type == 'WHITESPACE':
-                col += len(token_value)
-                pos = match.end()
-                continue
-                
-            elif token_type == 'NEWLINE':
-                line += 1
-                col = 1
-                pos = match.end()
-                continue
-                
-            elif token_type == 'COMMENT':
-                # Пропускаем комментарии
-                newlines = token_value.count('\n')
-                if newlines:
-                    line += newlines
-                    col = 1
-                else:
-                    col += len(token_value)
-                pos = match.end()
-                continue
-                
-            elif token_type == 'INCLUDE':
-                self.tokens.append(Token('INCLUDE', token_value, line, col))
-                col += len(token_value)
-                pos = match.end()
-                continue
-                
-            elif token_type == 'STRING':
-                self.tokens.append(Token('STRING', token_value, line, col))
-                col += len(token_value)
-                pos = match.end()
-                continue
-                
-            elif token_type == 'CHAR':
-                self.tokens.append(Token('CHAR', token_value, line, col))
-                col += len(token_value)
-                pos = match.end()
-                continue
-                
-            elif token_type == 'NUMBER':
-                if '.' in token_value:
-                    self.tokens.append(Token('FLOAT', token_value, line, col))
-                else:
-                    self.tokens.append(Token('INT', token_value, line, col))
-                col += len(token_value)
-                pos = match.end()
-                continue
-                
-            elif token_type == 'QUALIFIED_IDENT':
-                # Обрабатываем квалифицированные имена типа std::cout
-                if token_value in ['std::cout', 'std::cin', 'std::endl', 'std::string']:
-                    # Извлекаем имя без std::
-                    simple_name = token_value.split('::')[1]
-                    self.tokens.append(Token(simple_name.upper(), simple_name, line, col))
+        self.tokens = list(self._scan((source,), SourceIndex(source)))
+        return self.tokens
+
+    def iter_tokens(self, source: Union[str, os.PathLike, IO], chunk_size: int = 1 << 16) -> Iterator[Token]:
+        """
+        Потоково выдаёт токены из файла, не читая его целиком.
+        source - путь (файл отображается в память через mmap) или
+        открытый файловый объект в текстовом или двоичном режиме.
+        """
+        if not isinstance(source, (str, os.PathLike)):
+            yield from self._scan(_read_chunks(source.read, chunk_size))
+            return
+
+        with open(source, 'rb') as file:
+            try:
+                mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            except (ValueError, OSError):
+                # Пустые файлы и каналы нельзя отобразить в память
+                yield from self._scan(_read_chunks(file.read, chunk_size))
+                return
+            with mapped:
+                yield from self._scan(_read_chunks(mapped.read, chunk_size))
+
+    def _scan(self, chunks: Iterable[str], source_index: Optional[SourceIndex] = None) -> Iterator[Token]:
+        """
+        Общий движок tokenize и iter_tokens. Текст приходит кусками; токен,
+        который может продолжиться в следующем куске (в том числе незакрытые
+        строки и комментарии /* */), откладывается до его прихода.
+        Без готового source_index индекс строк пополняется по мере чтения.
+        """
+        actions = self._actions
+        words = self._words
+        symbol_table = self.symbol_table
+        finditer = self.token_re.finditer
+        feed = source_index is None
+        if feed:
+            source_index = SourceIndex()
+        chunks = iter(chunks)
+        buffer = next(chunks, '')
+        pending = next(chunks, None)
+        offset = 0  # смещение buffer[0] в исходном тексте
+        if feed:
+            source_index.feed(buffer, 0)
+
+        while True:
+            last = pending is None
+            if feed and not last:
+                source_index.feed(pending, offset + len(buffer))
+            limit = len(buffer) - _LOOKAHEAD
+            consumed = 0
+
+            for match in finditer(buffer):
+                index = match.lastindex
+                action = actions[index]
+                start, end = match.span(index)
+
+                if not last and (end > limit
+                                 or action == _MISMATCH and buffer[start] in '"\'#'
+                                 or action == _WORD and buffer.startswith('/*', start)):
+                    break
+                consumed = end
+
+                if action == _SKIP:
+                    continue
+
+                value = buffer[start:end]
+
+                if action == _WORD:
+                    word = words.get(value)
+                    if word is None:
+                        symbol_table.add(value)
+                        yield Token(KIND_IDENT, value, offset + start, source_index)
+                    else:
+                        yield Token(word[0], word[1], offset + start, source_index)
+                elif action >= 0:
+                    yield Token(action, value, offset + start, source_index)
+                elif action == _NUMBER:
+                    yield Token(KIND_FLOAT if '.' in value else KIND_INT, value, offset + start, source_index)
                 else:
-                    self.symbol_table.add(token_value)
-                    self.tokens.append(Token('IDENT', token_value, line, col))
-                col += len(token_value)
-                pos = match.end()
-                continue
-                
-            elif token_type == 'IDENT':
-                if token_value in self.keywords:
-                    self.tokens.append(Token(token_value.upper(), token_value, line, col))
+                    line, col = source_index.position(offset + start)
+                    raise SyntaxError(f"Неизвестный символ '{value}' в строке {line}:{col}")
+
+            if last:
+                break
+            buffer = buffer[consumed:] + pending
+            offset += consumed
+            pending = next(chunks, None)
+
+        yield Token(KIND_EOF, '', offset + len(buffer), source_index)
+
+    def tokenize_stream(self, source: str) -> TokenStream:
+        """Как tokenize, но возвращает компактный TokenStream"""
+        stream = TokenStream(source)
+        self._scan_stream(stream, 0)
+        return stream
+
+    def relex(self, stream: TokenStream, offset: int, removed: int, inserted: str) -> Tuple[TokenStream, int, int, int]:
+        """
+        Инкрементально пересканирует stream после правки: в позиции offset
+        удалено removed символов и вставлен текст inserted.
+
+        Сканирование начинается с ближайшей безопасной границы токена перед
+        правкой и останавливается, как только новый токен совпадает со
+        старым (с учётом сдвига). Возвращает (new_stream, first, old_stop,
+        new_stop): токены stream[first:old_stop] заменены на
+        new_stream[first:new_stop], остальные совпадают со старыми.
+        """
+        source = stream.source
+        new_source = source[:offset] + inserted + source[offset + removed:]
+        delta = len(inserted) - removed
+
+        # Токены, закончившиеся заметно раньше правки, не могли от неё зависеть
+        first = bisect_right(stream.ends, offset - _LOOKAHEAD)
+        if '*/' in new_source[max(offset - 1, 0):offset + len(inserted) + 1]:
+            # Правка может закрыть незавершённый /*, который раньше разобран как операторы
+            first = min(first, self._dangling_comment(stream, offset))
+        restart = stream.ends[first - 1] if first else 0
+
+        new_stream = TokenStream(new_source)
+        new_stream.kinds = stream.kinds[:first]
+        new_stream.starts = stream.starts[:first]
+        new_stream.ends = stream.ends[:first]
+        new_stream.source_index = stream.source_index.edited(offset, removed, inserted, new_source)
+
+        old_stop = self._scan_stream(new_stream, restart, (stream, delta, offset + len(inserted)))
+        new_stop = len(new_stream.kinds)
+        if old_stop is None:
+            return new_stream, first, len(stream.kinds), new_stop
+
+        new_stream.kinds.extend(stream.kinds[old_stop:])
+        new_stream.starts.extend(map(delta.__add__, stream.starts[old_stop:]))
+        new_stream.ends.extend(map(delta.__add__, stream.ends[old_stop:]))
+        return new_stream, first, old_stop, new_stop
+
+    def _dangling_comment(self, stream: TokenStream, offset: int) -> int:
+        """Индекс токена '/' первого незакрытого '/*' перед offset или len(stream)"""
+        source = stream.source
+        position = source.find('/*', 0, offset)
+        while position != -1:
+            index = bisect_left(stream.starts, position)
+            if index < len(stream.kinds) and stream.starts[index] == position and stream.kinds[index] == KIND_BY_TEXT['/']:
+                return index
+            position = source.find('/*', position + 2, offset)
+        return len(stream.kinds)
+
+    def _scan_stream(self, stream: TokenStream, pos: int, resync=None) -> Optional[int]:
+        """
+        Дописывает в stream токены stream.source начиная с pos.
+        resync = (old_stream, delta, after) включает остановку на первом токене,
+        начинающемся не раньше after и совпадающем с токеном old_stream,
+        сдвинутым на delta; тогда возвращается его индекс в old_stream.
+        """
+        source = stream.source
+        kinds = stream.kinds
+        starts = stream.starts
+        ends = stream.ends
+        actions = self._actions
+        word_kinds = self._word_kinds
+        symbol_table = self.symbol_table
+
+        if resync is None:
+            resync_after = len(source) + 1
+        else:
+            old, delta, resync_after = resync
+            old_starts = old.starts
+            old_index = bisect_left(old_starts, resync_after - delta)
+            old_count = len(old_starts) - 1  # EOF не участвует в синхронизации
+
+        for match in self.token_re.finditer(source, pos):
+            index = match.lastindex
+            kind = actions[index]
+            start, end = match.span(index)
+
+            if kind < 0:
+                if kind == _WORD:
+                    value = source[start:end]
+                    kind = word_kinds.get(value)
+                    if kind is None:
+                        symbol_table.add(value)
+                        kind = KIND_IDENT
+                elif kind == _SKIP:
+                    continue
+                elif kind == _NUMBER:
+                    kind = KIND_FLOAT if '.' in source[start:end] else KIND_INT
                 else:
-                    self.symbol_table.add(token_value)
-                    self.tokens.append(Token('IDENT', token_value, line, col))
-                col += len(token_value)
-                pos = match.end()
-                continue
-                
-            elif token_type == 'OPERATOR':
-                self.tokens.append(Token('OP', token_value, line, col))
-                col += len(token_value)
-                pos = match.end()
-                continue
-                
-            elif token_type == 'DELIMITER':
-                self.tokens.append(Token('DELIM', token_value, line, col))
-                col += len(token_value)
-                pos = match.end()
-                continue
-                
-            else:
-                pos = match.end()
-        
-        self.tokens.append(Token('EOF', '', line, col))
-        return self.tokens
\ No newline at end of file
+                    line, col = stream.source_index.position(start)
+                    raise SyntaxError(f"Неизвестный символ '{source[start]}' в строке {line}:{col}")
+
+            if start >= resync_after:
+                # Дальше текст совпадает со старым, поэтому достаточно совпадения начала токена
+                old_start = start - delta
+                while old_index < old_count and old_starts[old_index] < old_start:
+                    old_index += 1
+                if old_index < old_count and old_starts[old_index] == old_start:
+                    return old_index
+
+            kinds.append(kind)
+            starts.append(start)
+            ends.append(end)
+
+        kinds.append(KIND_EOF)
+        starts.append(len(source))
+        ends.append(len(source))
+        return None
\ No newline at end of file
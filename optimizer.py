@@ -0,0 +1,1314 @@
+import re
+from bisect import bisect_left
+from ast_nodes import *
+
+# Целые литералы C++: без точки и без ведущего нуля (010 - восьмеричное)
+INTEGER = re.compile(r'-?(0|[1-9][0-9]*)\Z')
+
+# Диапазоны int и long long: результат, не влезающий в тип операндов,
+# в C++ - неопределённое поведение, такие выражения не сворачиваются
+INT_RANGE = (-2 ** 31, 2 ** 31 - 1)
+LONG_RANGE = (-2 ** 63, 2 ** 63 - 1)
+
+COMPARISONS = {
+    '<': lambda a, b: a < b,
+    '>': lambda a, b: a > b,
+    '<=': lambda a, b: a <= b,
+    '>=': lambda a, b: a >= b,
+    '==': lambda a, b: a == b,
+    '!=': lambda a, b: a != b,
+}
+
+ASSIGNMENT_OPS = frozenset({'=', '+=', '-=', '*=', '/=', '%=', '&=', '|=', '^=', '<<=', '>>='})
+
+# Операции, результат которых - bool: x * 1 для них не упрощается,
+# иначе print выведет True вместо 1
+BOOLEAN_OPS = frozenset(COMPARISONS) | {'&&', '||'}
+
+def fold_div(a, b):
+    """a / b для свёртки. Генератор выводит // и % Python с округлением вниз,
+    а C++ отбрасывает дробную часть: при операндах разных знаков и делении
+    не нацело результаты расходятся, и свёртка изменила бы вывод - None"""
+    if not b or a % b and (a < 0) != (b < 0):
+        return None
+    return a // b
+
+def fold_mod(a, b):
+    """a % b для свёртки; None там же, где у fold_div"""
+    return a % b if fold_div(a, b) is not None else None
+
+ARITHMETIC = {
+    '+': lambda a, b: a + b,
+    '-': lambda a, b: a - b,
+    '*': lambda a, b: a * b,
+    '/': fold_div,
+    '%': fold_mod,
+    '&': lambda a, b: a & b,
+    '|': lambda a, b: a | b,
+    '^': lambda a, b: a ^ b,
+}
+
+def int_value(node):
+    """Значение целого или логического литерала; None для остальных узлов"""
+    if type(node) is Literal:
+        if node.literal_type == "bool":
+            return int(node.value)
+        if node.literal_type == "number" and INTEGER.match(str(node.value)):
+            return int(node.value)
+    return None
+
+def value_range(value):
+    """Диапазон типа литерала: int, если значение в него влезает"""
+    return INT_RANGE if INT_RANGE[0] <= value <= INT_RANGE[1] else LONG_RANGE
+
+def is_boolean(node):
+    """Может ли выражение дать bool: сравнение, &&, ||, ! или ?: с такой ветвью"""
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        kind = type(node)
+        if kind is BinaryOperation and node.operator in BOOLEAN_OPS:
+            return True
+        if kind is UnaryOperation and node.operator == '!':
+            return True
+        if kind is Literal and node.literal_type == "bool":
+            return True
+        if kind is TernaryOperation:
+            stack += (node.then_expr, node.else_expr)
+    return False
+
+def number(value):
+    return Literal(str(value), "number")
+
+def boolean(value):
+    return Literal(bool(value), "bool")
+
+# Поля, в которых могут быть другие узлы; листья в обход не попадают
+NODE_FIELDS = {
+    Program: ('decls',),
+    FunctionDecl: ('params', 'body'),
+    Parameter: ('default_value',),
+    VariableDecl: ('init_value',),
+    ArrayDecl: ('size', 'init_values'),
+    Block: ('statements',),
+    IfStatement: ('condition', 'then_branch', 'else_branch'),
+    WhileStatement: ('condition', 'body'),
+    ForStatement: ('init', 'condition', 'increment', 'body'),
+    DoWhileStatement: ('body', 'condition'),
+    ReturnStatement: ('value',),
+    ExpressionStatement: ('expr',),
+    CoutStatement: ('expressions',),
+    CinStatement: ('variables',),
+    BinaryOperation: ('left', 'right'),
+    UnaryOperation: ('operand',),
+    TernaryOperation: ('condition', 'then_expr', 'else_expr'),
+    FunctionCall: ('arguments',),
+    ArrayAccess: ('array', 'index'),
+    RangeFor: ('start', 'stop', 'body'),
+    Literal: (),
+    VariableReference: (),
+    StringLiteral: (),
+    IncludeDirective: (),
+}
+
+def children(obj):
+    """Имена полей, в которых могут быть узлы"""
+    fields = NODE_FIELDS.get(type(obj))
+    if fields is None:
+        # Подклассы узлов (LazyBlock - через Block)
+        fields = NODE_FIELDS[type(obj)] = next(
+            (NODE_FIELDS[cls] for cls in type(obj).__mro__ if cls in NODE_FIELDS), ())
+    return fields
+
+
+def iter_nodes(tree):
+    """Все узлы поддерева без рекурсии; неразобранные тела не раскрываются"""
+    stack = [tree]
+    while stack:
+        obj = stack.pop()
+        yield obj
+        if type(obj) is LazyBlock and not obj.parsed:
+            continue
+        for name in children(obj):
+            value = getattr(obj, name)
+            if type(value) is list:
+                stack.extend(reversed(value))
+            elif value is not None:
+                stack.append(value)
+
+def target_name(node):
+    """Имя переменной, в которую пишет присваивание: a, a[i], a[i][j] -> a"""
+    while type(node) is ArrayAccess:
+        node = node.array
+    return node.name if type(node) is VariableReference else None
+
+def node_writes(obj):
+    """Имена, в которые пишет сам узел (без потомков)"""
+    kind = type(obj)
+    if kind is BinaryOperation and obj.operator in ASSIGNMENT_OPS:
+        return (target_name(obj.left),)
+    if kind is UnaryOperation and obj.operator in ('++', '--'):
+        return (target_name(obj.operand),)
+    if kind is CinStatement:
+        return tuple(target_name(variable) for variable in obj.variables)
+    if kind is VariableDecl or kind is ArrayDecl:
+        return (obj.name,)
+    if kind is RangeFor:
+        return (obj.var_name,)
+    return ()
+
+def written_names(tree):
+    """Имена, которые поддерево присваивает, меняет ++/--, читает cin или объявляет"""
+    names = set()
+    for obj in iter_nodes(tree):
+        names.update(node_writes(obj))
+    return names
+
+class WriteIndex:
+    """Записи и вызовы во всех поддеревьях за один обход. Узлы нумеруются
+    в прямом порядке, поддерево - отрезок номеров [начало, конец), и
+    «пишет ли поддерево в имя» - двоичный поиск по номерам записей имени.
+    Так вложенные циклы не обходятся заново для каждого уровня.
+    RangeLoops строит индекс тела функции и передаёт его LoopInvariants"""
+
+    def __init__(self, tree):
+        self.nodes = []     # узлы в прямом порядке
+        self.spans = {}     # id(узла) -> (начало, конец)
+        self.written = {}   # имя -> номера узлов, пишущих в него, по возрастанию
+        self.declared = {}  # имя -> номера его VariableDecl
+        self.names = set()  # имена переменных и массивов, которые встречаются в дереве
+        self.calls = [0]    # calls[n] - число вызовов среди первых n узлов
+        self.loops = [0]    # loops[n] - число циклов среди первых n узлов
+        count = 0
+        stack = [tree]
+        while stack:
+            obj = stack.pop()
+            if type(obj) is tuple:
+                node, start = obj
+                self.spans[id(node)] = (start, count)
+                continue
+            kind = type(obj)
+            for name in node_writes(obj):
+                self.written.setdefault(name, []).append(count)
+            if kind is VariableReference or kind is ArrayDecl:
+                self.names.add(obj.name)
+            elif kind is VariableDecl:
+                self.names.add(obj.name)
+                self.declared.setdefault(obj.name, []).append(count)
+            self.calls.append(self.calls[-1] + (kind is FunctionCall))
+            self.loops.append(self.loops[-1] + (kind in LOOP_PARTS))
+            self.nodes.append(obj)
+            stack.append((obj, count))
+            count += 1
+            if type(obj) is LazyBlock and not obj.parsed:
+                continue
+            for name in children(obj):
+                value = getattr(obj, name)
+                if type(value) is list:
+                    stack.extend(reversed(value))
+                elif value is not None:
+                    stack.append(value)
+
+    @staticmethod
+    def _within(positions, span):
+        if not positions:
+            return False
+        i = bisect_left(positions, span[0])
+        return i < len(positions) and positions[i] < span[1]
+
+    def writes(self, node, name) -> bool:
+        """Пишет ли поддерево node в name"""
+        return self._within(self.written.get(name), self.spans[id(node)])
+
+    def declares(self, node, name) -> bool:
+        """Объявляет ли поддерево node переменную name"""
+        return self._within(self.declared.get(name), self.spans[id(node)])
+
+    def has_calls(self, node) -> bool:
+        start, end = self.spans[id(node)]
+        return self.calls[end] > self.calls[start]
+
+    def has_loops(self, node) -> bool:
+        """Есть ли циклы в поддереве node, включая сам node. Узлов, созданных
+        после обхода (границ range() из RangeLoops), в индексе нет - в них
+        и циклов нет. Старые узлы держит nodes, так что их id не повторяются"""
+        span = self.spans.get(id(node))
+        return span is not None and self.loops[span[1]] > self.loops[span[0]]
+
+    def replace(self, old, new):
+        """new (RangeFor) занимает место old в дереве: записи, вызовы и
+        циклы отрезка old верны и для него"""
+        self.spans[id(new)] = self.spans[id(old)]
+
+class ConstantFolder:
+    """Свёртка констант и алгебраические упрощения по семантике целых C++.
+    Сворачиваются только целые и логические литералы: вещественные
+    и строки остаются как есть. Статически решённые if и while
+    отбрасываются. Дерево меняется на месте, обход - без рекурсии"""
+
+    def __init__(self):
+        self.folded = 0  # число упрощённых узлов
+
+    def run(self, tree):
+        """Сворачивает дерево и возвращает его (корень может замениться)"""
+        stack = [(tree, False)]
+        while stack:
+            obj, visited = stack.pop()
+            if visited:
+                self.rewrite_children(obj)
+                continue
+            if isinstance(obj, LazyBlock) and not obj.parsed:
+                # Тело ещё не разобрано - свернём его при разборе
+                obj.map_statements(self.fold_statements)
+                continue
+            names = children(obj)
+            if not names:
+                continue
+            stack.append((obj, True))
+            for name in names:
+                value = getattr(obj, name)
+                if type(value) is list:
+                    stack.extend((item, False) for item in value)
+                elif value is not None:
+                    stack.append((value, False))
+        return self.reduce(tree) or Block([])
+
+    def fold_statements(self, statements):
+        return self.run(Block(statements)).statements
+
+    def report(self) -> str:
+        return f"Свёртка констант: упрощено узлов: {self.folded}"
+
+    def rewrite_children(self, obj):
+        """Заменяет уже свёрнутых потомков узла их упрощёнными версиями"""
+        reducers = self._reducers
+        for name in children(obj):
+            value = getattr(obj, name)
+            if type(value) is list:
+                if any(type(item) in reducers for item in value):
+                    reduced = [self.reduce(item) for item in value]
+                    setattr(obj, name, [item for item in reduced if item is not None])
+            elif type(value) in reducers:
+                reduced = self.reduce(value)
+                if reduced is not value:
+                    # Отброшенный оператор вне списка - пустой блок
+                    setattr(obj, name, Block([]) if reduced is None else reduced)
+
+    def reduce(self, obj):
+        """Упрощённый узел (тот же, если упрощать нечего); None - оператор отброшен"""
+        reducer = self._reducers.get(type(obj))
+        if reducer is None:
+            return obj
+        result = reducer(self, obj)
+        if result is not obj:
+            self.folded += 1
+        return result
+
+    # -------------------- Выражения --------------------
+    def reduce_binary(self, node):
+        operator = node.operator
+        left = int_value(node.left)
+        right = int_value(node.right)
+
+        # && и || вычисляются сокращённо: ложь && x и истина || x не читают x
+        if operator == '&&' and left == 0 or operator == '||' and left not in (None, 0):
+            return boolean(operator == '||')
+        if left is None or right is None:
+            return self.simplify_binary(node, left, right)
+
+        if operator == '&&':
+            return boolean(left and right)
+        if operator == '||':
+            return boolean(left or right)
+        if operator in COMPARISONS:
+            return boolean(COMPARISONS[operator](left, right))
+
+        if operator in ('<<', '>>'):
+            bits = 32 if value_range(left) is INT_RANGE else 64
+            if right < 0 or right >= bits or operator == '<<' and left < 0:
+                return node
+            result = left << right if operator == '<<' else left >> right
+        elif operator in ARITHMETIC:
+            result = ARITHMETIC[operator](left, right)
+        else:
+            return node  # присваивания и прочее
+
+        low, high = max(value_range(left), value_range(right), key=lambda r: r[1])
+        if result is None or not low <= result <= high:
+            return node
+        return number(result)
+
+    def simplify_binary(self, node, left, right):
+        """x * 1, 1 * x, x + 0, 0 + x, x - 0, x / 1 -> x"""
+        operator = node.operator
+        if right is not None and node.right.literal_type == "number":
+            keep = node.left
+            identity = right == 1 and operator in ('*', '/') or right == 0 and operator in ('+', '-')
+        elif left is not None and node.left.literal_type == "number":
+            keep = node.right
+            identity = left == 1 and operator == '*' or left == 0 and operator == '+'
+        else:
+            return node
+        if not identity or is_boolean(keep):
+            return node
+        return keep
+
+    def reduce_unary(self, node):
+        value = int_value(node.operand)
+        if value is None or node.is_postfix:
+            return node
+        operator = node.operator
+        if operator == '!':
+            return boolean(not value)
+        if operator == '-':
+            result = -value
+        elif operator == '+':
+            result = value
+        elif operator == '~':
+            result = ~value
+        else:
+            return node  # ++ и -- над литералом
+        low, high = value_range(value)
+        return number(result) if low <= result <= high else node
+
+    def reduce_ternary(self, node):
+        value = int_value(node.condition)
+        if value is None:
+            return node
+        return node.then_expr if value else node.else_expr
+
+    # -------------------- Операторы --------------------
+    def reduce_if(self, node):
+        value = int_value(node.condition)
+        if value is None:
+            return node
+        return node.then_branch if value else node.else_branch
+
+    def reduce_while(self, node):
+        value = int_value(node.condition)
+        if value is None or value:
+            return node
+        return None  # while (false): тело не выполняется ни разу
+
+    _reducers = {
+        BinaryOperation: reduce_binary,
+        UnaryOperation: reduce_unary,
+        TernaryOperation: reduce_ternary,
+        IfStatement: reduce_if,
+        WhileStatement: reduce_while,
+    }
+
+
+# Целые типы: счётчик и границы range() обязаны быть целыми
+INT_TYPES = frozenset({'int'})
+
+# Операции над целыми, дающие целое
+INT_OPS = frozenset({'+', '-', '*', '/', '%', '&', '|', '^', '<<', '>>'})
+
+# Сравнение с переставленными операндами: n > i  ==  i < n
+FLIPPED = {'<': '>', '>': '<', '<=': '>=', '>=': '<='}
+
+def is_var(node, name):
+    return type(node) is VariableReference and node.name == name
+
+def is_int_expr(node, int_names):
+    """Выражение из целых литералов и целых переменных: без вызовов,
+    обращений к массивам и присваиваний"""
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        kind = type(node)
+        if kind is Literal:
+            if node.literal_type != "number" or not INTEGER.match(str(node.value)):
+                return False
+        elif kind is VariableReference:
+            if node.name not in int_names:
+                return False
+        elif kind is BinaryOperation and node.operator in INT_OPS:
+            stack += (node.left, node.right)
+        elif kind is UnaryOperation and node.operator in ('-', '+', '~') and not node.is_postfix:
+            stack.append(node.operand)
+        else:
+            return False
+    return True
+
+def loop_step(increment, name):
+    """Шаг счётчика: i++, ++i, i--, --i, i += c, i -= c, i = i + c, i = i - c"""
+    kind = type(increment)
+    if kind is UnaryOperation and is_var(increment.operand, name):
+        return {'++': 1, '--': -1}.get(increment.operator)
+    if kind is not BinaryOperation or not is_var(increment.left, name):
+        return None
+    operator, amount = increment.operator, increment.right
+    if operator == '=' and type(amount) is BinaryOperation and is_var(amount.left, name):
+        operator, amount = amount.operator + '=', amount.right
+    if type(amount) is not Literal or amount.literal_type != "number":
+        return None
+    value = int_value(amount)
+    if not value or operator not in ('+=', '-='):
+        return None
+    return value if operator == '+=' else -value
+
+def loop_bound(condition, name):
+    """(сравнение, граница) для условия i < n, i >= n, n > i и т. п."""
+    if type(condition) is not BinaryOperation or condition.operator not in FLIPPED:
+        return None
+    if is_var(condition.left, name) and not is_var(condition.right, name):
+        return condition.operator, condition.right
+    if is_var(condition.right, name):
+        return FLIPPED[condition.operator], condition.left
+    return None
+
+def shift_bound(bound, delta):
+    """bound + delta для границы range(); None, если без скобок это не выразить"""
+    value = int_value(bound)
+    if value is not None:
+        return number(value + delta)
+    if type(bound) is BinaryOperation and bound.operator not in ('+', '-', '*', '/', '%'):
+        # Генератор не ставит скобок: a << 2 + 1 означало бы a << 3
+        return None
+    return BinaryOperation('+' if delta > 0 else '-', bound, number(abs(delta)))
+
+
+class RangeLoops:
+    """Канонические for со счётчиком -> RangeFor (for ... in range в Python).
+    Счётчик объявлен в заголовке как int, условие i < n, i <= n, i > n
+    или i >= n, шаг - ++/-- или += / -= константы в сторону границы.
+    Тело не пишет ни в счётчик, ни в переменные границы, а граница -
+    целое выражение без вызовов: range() вычисляет её один раз, как
+    и C++, раз она не меняется. Остальные for остаются циклами while"""
+
+    def __init__(self, indexes=None):
+        self.lowered = 0        # число циклов, ставших range()
+        self.global_types = {}  # имя глобальной переменной -> тип
+        # Общий с LoopInvariants словарь id(операторов) -> (Block, WriteIndex):
+        # индекс тела с циклами строится один раз на оба прохода
+        self.indexes = indexes
+
+    def run(self, tree):
+        """Заменяет циклы в функциях tree (Program или одно объявление)"""
+        decls = tree.decls if isinstance(tree, Program) else [tree]
+        for decl in decls:
+            if isinstance(decl, FunctionDecl):
+                self.lower_function(decl)
+            else:
+                # Глобальные объявления видны функциям, объявленным после них
+                for obj in iter_nodes(decl):
+                    if type(obj) is VariableDecl:
+                        self.global_types[obj.name] = obj.var_type
+                    elif type(obj) is ArrayDecl:
+                        self.global_types[obj.name] = obj.var_type + "[]"
+        return tree
+
+    def report(self) -> str:
+        return f"Циклы for через range(): {self.lowered}"
+
+    def lower_function(self, decl):
+        types = {name: {var_type} for name, var_type in self.global_types.items()}
+        for param in decl.params:
+            types[param.name] = {param.param_type}
+        body = decl.body
+        if isinstance(body, LazyBlock) and not body.parsed:
+            body.map_statements(lambda statements: self.lower_statements(statements, types))
+        else:
+            self.lower_statements(body.statements, types)
+
+    def lower_statements(self, statements, types):
+        block = Block(statements)
+        index = WriteIndex(block)
+        if self.indexes is not None and index.has_loops(block):
+            self.indexes[id(statements)] = (block, index)
+        nodes = index.nodes
+        loops = [obj for obj in nodes if type(obj) is ForStatement and type(obj.init) is VariableDecl]
+        if not loops:
+            return statements
+
+        # Переменная целая, только если все её объявления в функции - int.
+        # В Python у переменных нет блочной области видимости: значение
+        # счётчика после цикла (у while и range оно разное) не видно в C++,
+        # только если имя объявляется лишь в заголовках for и такой цикл
+        # не объявляет его заново внутри себя
+        declared = {name: set(kinds) for name, kinds in types.items()}
+        headers = {id(loop.init) for loop in loops}
+        shadowed = set(types)
+        blocks = []
+        for obj in nodes:
+            kind = type(obj)
+            if kind is VariableDecl:
+                declared.setdefault(obj.name, set()).add(obj.var_type)
+            elif kind is ArrayDecl:
+                declared.setdefault(obj.name, set()).add(obj.var_type + "[]")
+            elif kind is Block:
+                blocks.append(obj)
+                continue
+            else:
+                continue
+            if id(obj) not in headers:
+                shadowed.add(obj.name)
+        int_names = {name for name, kinds in declared.items() if kinds <= INT_TYPES}
+        for loop in loops:
+            if index.declares(loop.body, loop.init.name):
+                shadowed.add(loop.init.name)
+
+        for obj in blocks:
+            block_statements = obj.statements
+            for i, stmt in enumerate(block_statements):
+                if type(stmt) is ForStatement:
+                    lowered = self.lower_for(stmt, int_names, shadowed, index)
+                    if lowered is not None:
+                        block_statements[i] = lowered
+                        index.replace(stmt, lowered)
+                        self.lowered += 1
+        return block.statements
+
+    def lower_for(self, node, int_names, shadowed, index):
+        """RangeFor для канонического цикла или None"""
+        init = node.init
+        if type(init) is not VariableDecl or init.var_type not in INT_TYPES or init.init_value is None:
+            return None
+        name = init.name
+        if name in shadowed:
+            return None
+        step = loop_step(node.increment, name)
+        bound = loop_bound(node.condition, name)
+        if step is None or bound is None:
+            return None
+        operator, limit = bound
+        if (step > 0) != (operator in ('<', '<=')):
+            return None  # шаг от границы: в C++ цикл пустой или бесконечный
+        if not is_int_expr(init.init_value, int_names) or not is_int_expr(limit, int_names):
+            return None
+
+        limit_names = {obj.name for obj in iter_nodes(limit) if type(obj) is VariableReference}
+        if name in limit_names or any(index.writes(node.body, n) for n in limit_names | {name}):
+            return None
+
+        if operator == '<=':
+            limit = shift_bound(limit, 1)
+        elif operator == '>=':
+            limit = shift_bound(limit, -1)
+        if limit is None:
+            return None
+        return RangeFor(name, init.init_value, limit, step, node.body)
+
+# Операции, которые могут бросить исключение (// и % на нуле, сдвиг на
+# отрицательное): их выносят только из всегда вычисляемой части условия
+RAISING_OPS = frozenset({'/', '%', '<<', '>>'})
+
+# Части цикла, из которых выносятся инварианты; первая - условие,
+# вычисляемое до первой итерации. У do-while и range-for такого нет
+LOOP_PARTS = {
+    ForStatement: ('condition', 'increment', 'body'),
+    WhileStatement: ('condition', 'body'),
+    DoWhileStatement: (None, 'body', 'condition'),
+    RangeFor: (None, 'body'),
+}
+
+
+# Уровень узла, который не выносится ни из одного цикла
+INFINITE_LEVEL = float('inf')
+
+class Site:
+    """Узел функции для LoopInvariants: место в дереве, объемлющие циклы
+    и сводка по поддереву, собираемая от листьев"""
+    __slots__ = ('node', 'parent', 'holder', 'field', 'position', 'depth', 'loop', 'loops', 'inner',
+                 'unconditional', 'target', 'hoisting', 'invalid', 'base', 'raising', 'array',
+                 'has_operation', 'has_variable', 'level', 'covered', 'hoisted')
+
+    def __init__(self, node, parent, holder, field, position, depth, loop, loops, inner,
+                 unconditional, target, hoisting):
+        self.node = node
+        self.parent = parent            # Site родителя
+        self.holder = holder            # узел, в поле field которого лежит node
+        self.field = field
+        self.position = position        # индекс в списке или None
+        self.depth = depth              # число объемлющих циклов у родителя
+        self.loop = loop                # цикл, в часть которого входит node
+        self.loops = loops              # число объемлющих циклов
+        self.inner = inner              # ближайший из них
+        self.unconditional = unconditional  # в безусловной части условия inner
+        self.target = target            # в node пишут
+        self.hoisting = hoisting        # node - цикл-оператор блока
+        self.invalid = False            # побочные эффекты или неподходящий узел
+        self.base = 1                   # 1 + глубина внутреннего цикла, пишущего в переменные
+        self.raising = False            # операции, бросающие исключения
+        self.array = False              # обращения к массивам
+        self.has_operation = self.has_variable = False
+        self.level = self.covered = INFINITE_LEVEL
+        self.hoisted = False
+
+class Temporary:
+    """Временная для вынесенного выражения"""
+    __slots__ = ('loop', 'decl', 'first', 'references')
+
+    def __init__(self, loop, decl):
+        self.loop = loop
+        self.decl = decl
+        self.first = None  # Site первого вхождения
+        self.references = []
+
+class LoopInvariants:
+    """Вынос инвариантов циклов: подвыражения без побочных эффектов, все
+    переменные которых цикл не меняет, вычисляются один раз перед циклом
+    во временные _inv0, _inv1, ... Одинаковые выражения делят временную.
+    Вызовы функций не выносятся (их чистота неизвестна), обращения к
+    массивам - только если в цикле нет вызовов и запись в массив"""
+
+    def __init__(self, indexes=None):
+        self.hoisted = 0  # число вынесенных выражений
+        self.indexes = indexes  # индексы тел, построенные RangeLoops
+
+    def run(self, tree):
+        decls = tree.decls if isinstance(tree, Program) else [tree]
+        for decl in decls:
+            if isinstance(decl, FunctionDecl):
+                body = decl.body
+                if isinstance(body, LazyBlock) and not body.parsed:
+                    body.map_statements(self.hoist_function)
+                else:
+                    body.statements = self.hoist_function(body.statements)
+        return tree
+
+    def report(self) -> str:
+        return f"Вынесено инвариантов циклов: {self.hoisted}"
+
+    def hoist_function(self, statements):
+        shared = self.indexes.pop(id(statements), None) if self.indexes is not None else None
+        if shared is not None and shared[0].statements is statements:
+            block, index = shared
+        else:
+            block = Block(statements)
+            index = WriteIndex(block)
+            if not index.has_loops(block):
+                return statements
+        used = index.names
+        names = (name for name in (f"_inv{i}" for i in range(len(index.spans) + 1)) if name not in used)
+
+        sites = self.collect_sites(block, index)
+        self.mark_levels(sites, index)
+
+        # Узел выносится за цикл своего уровня, если его не унёс с собой
+        # предок, вынесенный на том же уровне (уровень предка не меньше)
+        hoists = []
+        chain = []
+        for site in sites:
+            del chain[site.depth:]
+            if site.loop is not None:
+                chain.append(site.loop)
+            parent = site.parent
+            site.covered = parent.covered if parent is not None else INFINITE_LEVEL
+            if parent is not None and parent.hoisted:
+                site.covered = min(site.covered, parent.level)
+            site.hoisted = (not site.target and site.has_operation and site.has_variable
+                            and site.level < site.covered)
+            if site.hoisted:
+                hoists.append((site, chain[site.level - 1]))
+
+        # С листьев к корню: потомки заменены раньше, и текст выражения
+        # (ключ общих временных) уже содержит их временные
+        temps = {}  # id(цикла) -> {текст выражения: временная}
+        count = 0
+        for site, loop in reversed(hoists):
+            loop_temps = temps.setdefault(id(loop), {})
+            key = dump_ast(site.node)
+            temp = loop_temps.get(key)
+            if temp is None:
+                # Имя-заглушка уникально, настоящее назначается ниже
+                temp = loop_temps[key] = Temporary(loop, VariableDecl("auto", f"\0{count}", site.node))
+                count += 1
+            temp.first = site
+            reference = VariableReference(temp.decl.name)
+            temp.references.append(reference)
+            if site.position is None:
+                setattr(site.holder, site.field, reference)
+            else:
+                getattr(site.holder, site.field)[site.position] = reference
+
+        # Имена - в порядке циклов и первых вхождений в исходнике
+        order = {id(site): n for n, site in enumerate(sites)}
+        ordered = sorted((temp for loop_temps in temps.values() for temp in loop_temps.values()),
+                         key=lambda temp: (index.spans[id(temp.loop)][0], order[id(temp.first)]))
+        before = {}  # id(цикла) -> объявления временных перед ним
+        self.hoisted += len(ordered)
+        for temp in ordered:
+            temp.decl.name = next(names)
+            for reference in temp.references:
+                reference.name = temp.decl.name
+            before.setdefault(id(temp.loop), []).append(temp.decl)
+
+        for obj in {id(site.holder): site.holder for site in sites if site.hoisting}.values():
+            if any(id(stmt) in before for stmt in obj.statements):
+                result = []
+                for stmt in obj.statements:
+                    result += before.get(id(stmt), ())
+                    result.append(stmt)
+                obj.statements = result
+        return block.statements
+
+    def collect_sites(self, block, index):
+        """Узлы функции в прямом порядке с объемлющими циклами. Циклы -
+        только операторы блоков: их инварианты есть куда поставить.
+        Поддеревья вне циклов и без циклов пропускаются: выносить из них нечего"""
+        sites = []
+        chain = []  # объемлющие циклы текущего узла, от внешнего
+        stack = [(block, None, None, None, None, 0, None, False, False, False)]
+        while stack:
+            obj, parent, holder, field, position, depth, loop, unconditional, target, hoisting = stack.pop()
+            del chain[depth:]
+            if loop is not None:
+                chain.append(loop)
+            site = Site(obj, parent, holder, field, position, depth, loop, len(chain),
+                        chain[-1] if chain else None, unconditional, target, hoisting)
+            sites.append(site)
+
+            kind = type(obj)
+            if kind is BinaryOperation:
+                site.invalid = obj.operator in ASSIGNMENT_OPS
+                site.raising = obj.operator in RAISING_OPS
+                site.has_operation = True
+            elif kind is UnaryOperation:
+                site.invalid = obj.is_postfix or obj.operator in ('++', '--')
+                site.has_operation = True
+            elif kind is ArrayAccess:
+                site.array = site.has_operation = True
+            else:
+                site.invalid = True
+
+            if kind is LazyBlock and not obj.parsed:
+                continue
+            parts = LOOP_PARTS[kind] if hoisting else ()
+            # Инициализация for выполняется до условия: её вызовы могут
+            # что-то вывести, и исключение из вынесенного выражения их опередит
+            early = hoisting and (getattr(obj, 'init', None) is None or not index.has_calls(obj.init))
+            pending = []
+            for name in children(obj):
+                value = getattr(obj, name)
+                if name in parts:
+                    child_loop, child_unconditional = obj, name == parts[0] and early
+                else:
+                    # Правая часть && и ||, ветви ?: вычисляются не всегда
+                    branch = (kind is BinaryOperation and obj.operator in ('&&', '||') and name == 'right'
+                              or kind is TernaryOperation and name != 'condition')
+                    child_loop, child_unconditional = None, unconditional and not branch
+                outside = not chain and child_loop is None
+                child_target = self.is_target(obj, name)
+                if type(value) is list:
+                    items = enumerate(value)
+                elif value is not None:
+                    items = ((None, value),)
+                else:
+                    continue
+                for i, child in items:
+                    child_kind = type(child)
+                    if child_kind is Literal or outside and not index.has_loops(child):
+                        continue
+                    if child_kind is VariableReference:
+                        # Сами имена не выносятся: их вклад - сразу в узел-родитель
+                        site.has_variable = True
+                        site.base = max(site.base, self.write_base(chain, child_loop, child.name, index))
+                        continue
+                    pending.append((child, site, obj, name, i, len(chain), child_loop, child_unconditional,
+                                    child_target, kind is Block and child_kind in LOOP_PARTS))
+            stack.extend(reversed(pending))
+        return sites
+
+    @staticmethod
+    def write_base(chain, loop, name, index):
+        """1 + глубина самого внутреннего из циклов chain и loop (если он
+        есть), который пишет в name. Запись во внутренний цикл - запись и во
+        внешние, так что глубина ищется двоичным поиском"""
+        if loop is not None:
+            chain.append(loop)
+        low, high = 0, len(chain)
+        while low < high:
+            middle = (low + high + 1) // 2
+            if index.writes(chain[middle - 1], name):
+                low = middle
+            else:
+                high = middle - 1
+        if loop is not None:
+            chain.pop()
+        return low + 1
+
+    @staticmethod
+    def mark_levels(sites, index):
+        """Уровень выноса каждого узла с листьев к корню: номер самого
+        внешнего объемлющего цикла, для которого узел инвариантен"""
+        for site in reversed(sites):
+            if site.invalid or not site.loops:
+                site.level = INFINITE_LEVEL
+            elif site.raising or site.array:
+                # Исключения и обращения к массивам - только из безусловной
+                # части условия ближайшего цикла, для внешних она условна
+                safe = site.unconditional and not (site.array and index.has_calls(site.inner))
+                site.level = site.loops if safe and site.base <= site.loops else INFINITE_LEVEL
+            else:
+                site.level = site.base if site.base <= site.loops else INFINITE_LEVEL
+            parent = site.parent
+            if parent is not None:
+                parent.invalid = parent.invalid or site.invalid
+                parent.base = max(parent.base, site.base)
+                parent.raising = parent.raising or site.raising
+                parent.array = parent.array or site.array
+                parent.has_operation = parent.has_operation or site.has_operation
+                parent.has_variable = parent.has_variable or site.has_variable
+
+    @staticmethod
+    def is_target(parent, name):
+        """Поле, в которое пишут: левая часть присваивания, операнд ++/--, cin"""
+        kind = type(parent)
+        if kind is BinaryOperation:
+            return name == 'left' and parent.operator in ASSIGNMENT_OPS
+        if kind is UnaryOperation:
+            return parent.operator in ('++', '--')
+        return kind is CinStatement
+
+# Узлы, из которых может состоять встраиваемое выражение
+EXPRESSION_NODES = frozenset({BinaryOperation, UnaryOperation, TernaryOperation, Literal,
+                              VariableReference, ArrayAccess, FunctionCall})
+
+# Наибольший размер (в узлах) встраиваемого выражения с учётом
+# аргументов, подставленных больше одного раза
+INLINE_SIZE = 16
+
+def is_pure(expr, allow_calls=False):
+    """Выражение без присваиваний, ++/-- и (если не allow_calls) вызовов"""
+    for obj in iter_nodes(expr):
+        kind = type(obj)
+        if kind not in EXPRESSION_NODES or kind is FunctionCall and not allow_calls:
+            return False
+        if kind is BinaryOperation and obj.operator in ASSIGNMENT_OPS:
+            return False
+        if kind is UnaryOperation and (obj.is_postfix or obj.operator in ('++', '--')):
+            return False
+    return True
+
+def copy_expression(expr, bindings=None):
+    """Копия выражения без рекурсии. Ссылки на имена из bindings
+    заменяются копиями привязанных к ним выражений"""
+    root = [expr]
+    stack = [(root, 0, bindings)]
+    while stack:
+        holder, key, names = stack.pop()
+        obj = holder[key] if type(key) is int else getattr(holder, key)
+        if names and type(obj) is VariableReference and obj.name in names:
+            # Подставленный аргумент копируется уже без подстановки
+            obj, names = names[obj.name], None
+        obj = type(obj)(*(getattr(obj, name) for name in obj._fields))
+        if type(key) is int:
+            holder[key] = obj
+        else:
+            setattr(holder, key, obj)
+        for name in children(obj):
+            value = getattr(obj, name)
+            if type(value) is list:
+                value = list(value)
+                setattr(obj, name, value)
+                stack.extend((value, i, names) for i in range(len(value)))
+            elif value is not None:
+                stack.append((obj, name, names))
+    return root[0]
+
+
+class FunctionInliner:
+    """Встраивание маленьких функций: вызов функции, тело которой - один
+    return без присваиваний и ++/--, заменяется её выражением, в котором
+    параметры заменены аргументами (недостающие - литералами по умолчанию).
+    Аргументы должны быть без побочных эффектов: тогда порядок их
+    вычисления не виден. Если в теле есть вызовы, аргументы - только имена
+    и литералы, чтобы вызовы не поменяли их значения до чтения.
+    Встраиваются функции, объявленные раньше вызывающей, не рекурсивные и
+    не перегруженные; размер результата ограничен max_size узлами"""
+
+    def __init__(self, max_size: int = INLINE_SIZE, overloaded=()):
+        self.max_size = max_size
+        self.inlined = 0     # число встроенных вызовов
+        # имя -> (номер объявления, FunctionDecl); None - перегружена.
+        # overloaded - перегрузки, объявленные вне дерева (кусок файла)
+        self.functions = dict.fromkeys(overloaded)
+        self.count = 0       # число просмотренных объявлений
+        self._shapes = {}    # id(FunctionDecl) -> разобранное тело или None
+
+    def run(self, tree):
+        """Встраивает вызовы в tree (Program или одно объявление)"""
+        if isinstance(tree, Program):
+            # Перегрузки видны заранее: в Python вызов попадёт в последнюю из них
+            seen = set()
+            for decl in tree.decls:
+                if isinstance(decl, FunctionDecl):
+                    if decl.name in seen:
+                        self.functions[decl.name] = None
+                    seen.add(decl.name)
+            decls = tree.decls
+        else:
+            decls = [tree]
+        for decl in decls:
+            self.count += 1
+            if isinstance(decl, FunctionDecl):
+                self.inline_function(decl, self.count)
+                name = decl.name
+                self.functions[name] = None if name in self.functions else (self.count, decl)
+            else:
+                self.inline_tree(decl, self.count)
+        return tree
+
+    def report(self) -> str:
+        return f"Встроено вызовов функций: {self.inlined}"
+
+    def inline_function(self, decl, position):
+        params = {param.name for param in decl.params}
+
+        def transform(statements):
+            block = Block(statements)
+            self.inline_tree(block, position, lambda: params | written_names(block))
+            return block.statements
+
+        body = decl.body
+        if isinstance(body, LazyBlock) and not body.parsed:
+            body.map_statements(transform)
+        else:
+            body.statements = transform(body.statements)
+
+    def inline_tree(self, tree, position, local_names=set):
+        """Заменяет вызовы в поддереве; вложенные вызовы - раньше внешних.
+        position - номер объявления, local_names() - его локальные имена
+        (считаются, только если есть что встраивать)"""
+        candidate = self.candidate
+        sites = []  # (узел, поле, индекс в списке или None, вызов) в обратном порядке
+        stack = [tree]
+        while stack:
+            obj = stack.pop()
+            # Значение вызова-оператора не нужно, такой вызов остаётся
+            skip = type(obj) is ExpressionStatement
+            for name in children(obj):
+                value = getattr(obj, name)
+                if type(value) is list:
+                    for i, item in enumerate(value):
+                        if type(item) is FunctionCall and candidate(item.name, position):
+                            sites.append((obj, name, i, item))
+                    stack.extend(value)
+                elif value is not None:
+                    if type(value) is FunctionCall and not skip and candidate(value.name, position):
+                        sites.append((obj, name, None, value))
+                    stack.append(value)
+        if not sites:
+            return
+
+        local_names = local_names()
+        # Вызов в аргументах встраивается раньше вызова, которому он передан
+        for obj, name, index, call in reversed(sites):
+            inlined = self.inline_call(call, position, local_names)
+            if inlined is None:
+                continue
+            if index is None:
+                setattr(obj, name, inlined)
+            else:
+                getattr(obj, name)[index] = inlined
+
+    def candidate(self, name, position):
+        """Встраиваемая функция name, видимая из объявления position, или None"""
+        entry = self.functions.get(name)
+        if entry is None or entry[0] >= position or self.shape(entry[1]) is None:
+            return None
+        return entry[1]
+
+    def shape(self, decl):
+        """(выражение, есть ли в нём вызовы, число использований параметров,
+        свободные имена, размер) для встраиваемой функции, иначе None"""
+        key = id(decl)
+        if key not in self._shapes:
+            self._shapes[key] = None
+            statements = decl.body.statements
+            if len(statements) == 1 and type(statements[0]) is ReturnStatement:
+                expr = statements[0].value
+                if expr is not None and is_pure(expr, allow_calls=True):
+                    nodes = list(iter_nodes(expr))
+                    params = {param.name for param in decl.params}
+                    uses = dict.fromkeys(params, 0)
+                    free_names = set()
+                    for obj in nodes:
+                        if type(obj) is VariableReference:
+                            if obj.name in params:
+                                uses[obj.name] += 1
+                            else:
+                                free_names.add(obj.name)
+                    calls = {obj.name for obj in nodes if type(obj) is FunctionCall}
+                    if decl.name not in calls and len(nodes) <= self.max_size:
+                        self._shapes[key] = (expr, bool(calls), uses, free_names, len(nodes))
+        return self._shapes[key]
+
+    def inline_call(self, call, position, local_names):
+        """Выражение вместо вызова или None, если вызов не встраивается"""
+        decl = self.candidate(call.name, position)
+        if decl is None:
+            return None
+        expr, has_calls, uses, free_names, size = self.shape(decl)
+        args = call.arguments
+        # Глобальные имена тела не должны быть перекрыты локальными
+        if len(args) > len(decl.params) or not free_names.isdisjoint(local_names):
+            return None
+
+        bindings = {}
+        for i, param in enumerate(decl.params):
+            if i < len(args):
+                arg = args[i]
+            elif type(param.default_value) is Literal:
+                arg = param.default_value
+            else:
+                return None
+            if has_calls and type(arg) not in (Literal, VariableReference):
+                return None
+            if not is_pure(arg):
+                return None
+            count = uses[param.name]
+            if count > 1:
+                size += (count - 1) * sum(1 for _ in iter_nodes(arg))
+            bindings[param.name] = arg
+        if size > self.max_size:
+            return None
+        self.inlined += 1
+        return copy_expression(expr, bindings)
+
+
+def is_self_call(node, name):
+    return type(node) is FunctionCall and node.name == name
+
+def always_returns(statements):
+    """Завершается ли каждый путь через список операторов return"""
+    stack = [statements]
+    while stack:
+        statements = stack.pop()
+        last = statements[-1] if statements else None
+        kind = type(last)
+        if kind is IfStatement and last.else_branch is not None:
+            stack += (last.then_branch.statements, last.else_branch.statements)
+        elif kind is Block:
+            stack.append(last.statements)
+        elif kind is not ReturnStatement:
+            return False
+    return True
+
+
+class TailCalls:
+    """Хвостовые вызовы функции самой себя -> цикл: тело оборачивается в
+    while True, а return f(x, y) в конце пути выполнения заменяется
+    присваиванием параметров, после которого цикл идёт на новый круг.
+    Остальные пути завершаются return. if, ветвь которого всегда
+    завершается return с таким вызовом, забирает идущие за ним операторы
+    в другую ветвь. Вызовы внутри циклов и с неподходящими аргументами
+    остаются рекурсией"""
+
+    def __init__(self):
+        self.lowered = 0  # число хвостовых вызовов, ставших циклом
+
+    def run(self, tree):
+        decls = tree.decls if isinstance(tree, Program) else [tree]
+        for decl in decls:
+            if isinstance(decl, FunctionDecl):
+                body = decl.body
+                transform = lambda statements, decl=decl: self.lower_function(decl, statements)
+                if isinstance(body, LazyBlock) and not body.parsed:
+                    body.map_statements(transform)
+                else:
+                    body.statements = transform(body.statements)
+        return tree
+
+    def report(self) -> str:
+        return f"Хвостовых вызовов в циклы: {self.lowered}"
+
+    def lower_function(self, decl, statements):
+        name = decl.name
+        nodes = list(iter_nodes(Block(statements)))
+        if not any(is_self_call(obj, name) for obj in nodes):
+            return statements
+        used = {obj.name for obj in nodes if type(obj) in (VariableReference, VariableDecl, ArrayDecl)}
+        used.update(param.name for param in decl.params)
+        names = (temp for temp in (f"_tail{i}" for i in range(len(nodes) + 1)) if temp not in used)
+        void = decl.return_type == "void"
+
+        # Списки операторов, конец которых - конец тела; ветви копируются,
+        # чтобы без хвостовых вызовов тело осталось нетронутым
+        body = list(statements)
+        lowered = 0
+        pending = [body]
+        while pending:
+            items = pending.pop()
+            self.split_after_if(items, name)
+            last = items[-1] if items else None
+            kind = type(last)
+
+            call = None
+            if kind is ReturnStatement and is_self_call(last.value, name):
+                call, cut = last.value, 1
+            elif void and kind is ExpressionStatement and is_self_call(last.expr, name):
+                call, cut = last.expr, 1
+            elif (void and kind is ReturnStatement and last.value is None and len(items) > 1
+                  and type(items[-2]) is ExpressionStatement and is_self_call(items[-2].expr, name)):
+                call, cut = items[-2].expr, 2
+            if call is not None:
+                rebound = self.rebind(decl, call, names)
+                if rebound is not None:
+                    items[-cut:] = rebound
+                    lowered += 1
+                    continue
+
+            if kind is ReturnStatement:
+                continue
+            if kind is IfStatement:
+                else_branch = last.else_branch.statements if last.else_branch else [ReturnStatement(None)]
+                last = items[-1] = IfStatement(last.condition, Block(list(last.then_branch.statements)),
+                                               Block(list(else_branch)))
+                pending += (last.then_branch.statements, last.else_branch.statements)
+            elif kind is Block:
+                last = items[-1] = Block(list(last.statements))
+                pending.append(last.statements)
+            else:
+                # Путь доходит до конца тела: в цикле это был бы новый круг
+                items.append(ReturnStatement(None))
+
+        if not lowered:
+            return statements
+        self.lowered += lowered
+        return [WhileStatement(boolean(True), Block(body))]
+
+    @staticmethod
+    def split_after_if(items, name):
+        """Операторы после if, ветвь которого всегда завершается return
+        и вызывает функцию, переносятся в другую ветвь (или отбрасываются,
+        если return есть в обеих)"""
+        for i in range(len(items) - 1):
+            stmt = items[i]
+            if type(stmt) is not IfStatement:
+                continue
+            branches = (stmt.then_branch.statements, stmt.else_branch.statements if stmt.else_branch else [])
+            returns = [always_returns(branch) for branch in branches]
+            if not any(ends and any(is_self_call(obj, name) for obj in iter_nodes(Block(branch)))
+                       for ends, branch in zip(returns, branches)):
+                continue
+            rest = items[i + 1:]
+            then_branch, else_branch = (branch if ends else branch + rest
+                                        for ends, branch in zip(returns, branches))
+            items[i:] = [IfStatement(stmt.condition, Block(then_branch), Block(else_branch))]
+            return
+
+    @staticmethod
+    def rebind(decl, call, names):
+        """Присваивания параметрам аргументов вызова или None, если
+        аргументов больше, чем параметров, или недостающий параметр без
+        литерала по умолчанию"""
+        params = decl.params
+        args = call.arguments
+        if len(args) > len(params):
+            return None
+        values = []
+        for i, param in enumerate(params):
+            if i < len(args):
+                values.append(args[i])
+            elif type(param.default_value) is Literal:
+                values.append(param.default_value)
+            else:
+                return None
+
+        statements = []
+        pending = [(param.name, value) for param, value in zip(params, values) if not is_var(value, param.name)]
+        if not all(is_pure(value) for _, value in pending):
+            # Аргументы с побочными эффектами вычисляются по порядку до присваиваний
+            for i, (param_name, value) in enumerate(pending):
+                temp = next(names)
+                statements.append(VariableDecl("auto", temp, value))
+                pending[i] = (param_name, VariableReference(temp))
+
+        # Параметр присваивается, когда его старое значение больше никому не
+        # нужно; если параметры читают друг друга по кругу - через временную
+        while pending:
+            reads = [{obj.name for obj in iter_nodes(value) if type(obj) is VariableReference}
+                     for _, value in pending]
+            for i, (param_name, value) in enumerate(pending):
+                if not any(param_name in names_read for j, names_read in enumerate(reads) if j != i):
+                    statements.append(ExpressionStatement(
+                        BinaryOperation('=', VariableReference(param_name), value)))
+                    del pending[i]
+                    break
+            else:
+                # Во временную - значение, читающее ещё не присвоенный параметр
+                assigned = {param_name for param_name, _ in pending}
+                i = next(i for i, names_read in enumerate(reads) if not names_read.isdisjoint(assigned))
+                param_name, value = pending[i]
+                temp = next(names)
+                statements.append(VariableDecl("auto", temp, value))
+                pending[i] = (param_name, VariableReference(temp))
+        return statements
+
+
+# Встроенные функции Python, которые переведённый код вызывает под теми же именами
+PURE_BUILTINS = frozenset({'abs', 'max', 'min'})
+
+
+class PureFunctions:
+    """Мемоизация чистых рекурсивных функций через @functools.cache.
+    Чистая функция читает только свои параметры и локальные переменные,
+    пишет только в них, не использует cin/cout и вызывает только себя,
+    чистые функции, объявленные раньше, и abs/max/min. Мемоизируются
+    те из них, что после TailCalls остались рекурсивными: fib, C(n, k).
+    Параметры - скаляры, поэтому годятся в ключ кэша"""
+
+    def __init__(self, overloaded=()):
+        self.memoized = 0             # число мемоизированных функций
+        self.pure = set(PURE_BUILTINS)
+        self.overloaded = set(overloaded)  # имена, объявленные несколько раз
+        self.seen = set()
+
+    def run(self, tree):
+        if isinstance(tree, Program):
+            # Перегрузки видны заранее: в Python вызов попадёт в последнюю из них
+            seen = set(self.seen)
+            for decl in tree.decls:
+                if isinstance(decl, FunctionDecl):
+                    if decl.name in seen:
+                        self.overloaded.add(decl.name)
+                    seen.add(decl.name)
+            decls = tree.decls
+        else:
+            decls = [tree]
+        for decl in decls:
+            if isinstance(decl, FunctionDecl):
+                if decl.name in self.seen:
+                    self.overloaded.add(decl.name)
+                    self.pure.discard(decl.name)
+                self.seen.add(decl.name)
+                body = decl.body
+                check = lambda statements, decl=decl: self.check_function(decl, statements)
+                if isinstance(body, LazyBlock) and not body.parsed:
+                    body.map_statements(check)
+                else:
+                    self.check_function(decl, body.statements)
+        return tree
+
+    def report(self) -> str:
+        return f"Мемоизировано функций: {self.memoized}"
+
+    def check_function(self, decl, statements):
+        """Запоминает чистую функцию и помечает её memoized, если она рекурсивна"""
+        name = decl.name
+        if name in self.overloaded or name == "main":
+            return statements
+        nodes = list(iter_nodes(Block(statements)))
+        local_names = {param.name for param in decl.params}
+        local_names.update(obj.name for obj in nodes if type(obj) is VariableDecl or type(obj) is ArrayDecl)
+        recursive = False
+        for obj in nodes:
+            kind = type(obj)
+            if kind is CinStatement or kind is CoutStatement:
+                return statements
+            if kind is VariableReference and obj.name not in local_names:
+                return statements
+            if kind is FunctionCall:
+                if obj.name == name:
+                    recursive = True
+                elif obj.name not in self.pure:
+                    return statements
+        self.pure.add(name)
+        if recursive and decl.return_type != "void":
+            decl.memoized = True
+            self.memoized += 1
+        return statements
\ No newline at end of file
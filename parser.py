@@ -1,76 +1,230 @@
-from typing import List, Optional
-from lexer import Token
+import re
+from functools import partial
+from typing import Iterable, List, Optional, Union
+from lexer import (Token, TokenStream, TOKEN_KINDS, KIND_BY_TEXT, KIND_EOF, KIND_IDENT,
+                   KIND_INT, KIND_FLOAT, KIND_STRING, KIND_CHAR, KIND_INCLUDE)
 from ast_nodes import *
 
+# -------------------- Коды токенов --------------------
+# Парсер сравнивает только целые коды из lexer.TOKEN_KINDS
+NO_TOKEN = -1  # код после конца потока токенов
+
+LPAREN, RPAREN = KIND_BY_TEXT['('], KIND_BY_TEXT[')']
+LBRACE, RBRACE = KIND_BY_TEXT['{'], KIND_BY_TEXT['}']
+LBRACKET, RBRACKET = KIND_BY_TEXT['['], KIND_BY_TEXT[']']
+SEMICOLON, COMMA, COLON = KIND_BY_TEXT[';'], KIND_BY_TEXT[','], KIND_BY_TEXT[':']
+ASSIGN, QUESTION = KIND_BY_TEXT['='], KIND_BY_TEXT['?']
+SHL, SHR = KIND_BY_TEXT['<<'], KIND_BY_TEXT['>>']
+OR_OR, AND_AND = KIND_BY_TEXT['||'], KIND_BY_TEXT['&&']
+
+KW_IF, KW_ELSE, KW_FOR = KIND_BY_TEXT['if'], KIND_BY_TEXT['else'], KIND_BY_TEXT['for']
+KW_WHILE, KW_DO, KW_RETURN = KIND_BY_TEXT['while'], KIND_BY_TEXT['do'], KIND_BY_TEXT['return']
+KW_COUT, KW_CIN, KW_ENDL = KIND_BY_TEXT['cout'], KIND_BY_TEXT['cin'], KIND_BY_TEXT['endl']
+KW_CLASS, KW_USING = KIND_BY_TEXT['class'], KIND_BY_TEXT['using']
+KW_NAMESPACE, KW_STD = KIND_BY_TEXT['namespace'], KIND_BY_TEXT['std']
+KW_TRUE, KW_FALSE = KIND_BY_TEXT['true'], KIND_BY_TEXT['false']
+
+def _kinds(*texts: str) -> frozenset:
+    return frozenset(KIND_BY_TEXT[text] for text in texts)
+
+# Типы, с которых начинается объявление в разных контекстах
+DECLARATION_TYPES = _kinds('int', 'float', 'double', 'void', 'string', 'bool', 'char')
+STATEMENT_TYPES = _kinds('int', 'float', 'double', 'string', 'bool', 'char')
+FOR_INIT_TYPES = _kinds('int', 'float', 'double', 'bool', 'char')
+
+NUMBER_KINDS = frozenset({KIND_INT, KIND_FLOAT})
+PREFIX_OPS = _kinds('+', '-', '!', '~', '++', '--')
+POSTFIX_OPS = _kinds('++', '--')
+
+# Таблица приоритетов бинарных операторов: (операторы, левая сила, правая сила).
+# Правая сила меньше левой у правоассоциативных операторов (присваивание, ?:)
+PRECEDENCE = [
+    (('=', '+=', '-=', '*=', '/=', '%=', '&=', '|=', '^=', '<<=', '>>='), 2, 1),
+    (('?',), 4, 3),
+    (('||',), 6, 7),
+    (('&&',), 8, 9),
+    (('|',), 10, 11),
+    (('^',), 12, 13),
+    (('&',), 14, 15),
+    (('==', '!='), 16, 17),
+    (('<', '>', '<=', '>='), 18, 19),
+    (('<<', '>>'), 20, 21),
+    (('+', '-'), 22, 23),
+    (('*', '/', '%'), 24, 25),
+]
+BINDING_POWER = {KIND_BY_TEXT[op]: (left, right) for ops, left, right in PRECEDENCE for op in ops}
+
+# Поиск фигурных скобок в байтовой строке кодов токенов
+BRACES = re.compile(b'[' + re.escape(bytes([LBRACE, RBRACE])) + b']')
+
+# Токены, по которым split_declarations ищет границы объявлений
+DECLARATION_MARKS = re.compile(b'[' + re.escape(bytes([LBRACE, RBRACE, SEMICOLON, LPAREN, KIND_INCLUDE])) + b']')
+
+def split_declarations(stream: TokenStream) -> list:
+    """Делит поток на верхнеуровневые объявления, не разбирая их: объявление
+    кончается на ; или #include на нулевой глубине {} либо на }, закрывшей
+    тело функции. Возвращает [(первый токен, конец, имя функции или None)];
+    токены между объявлениями (EOF) не входят ни в одно"""
+    kinds = stream.kinds
+    codes = kinds.tobytes()
+    count = len(kinds) - (1 if len(kinds) and kinds[-1] == KIND_EOF else 0)
+    declarations = []
+    start = 0
+    depth = 0
+    name = None   # идентификатор перед первой ( на нулевой глубине
+    body = False  # { на нулевой глубине открыла тело функции: перед ней )
+    for mark in DECLARATION_MARKS.finditer(codes, 0, count):
+        index = mark.start()
+        kind = kinds[index]
+        if kind == LBRACE:
+            if depth == 0:
+                body = index > start and kinds[index - 1] == RPAREN
+            depth += 1
+        elif kind == RBRACE:
+            if depth == 0:
+                continue  # лишняя }: парсер её пропустит
+            depth -= 1
+            if depth == 0 and body:
+                declarations.append((start, index + 1, name))
+                start, name, body = index + 1, None, False
+        elif depth == 0:
+            if kind == LPAREN:
+                if name is None and index > start and kinds[index - 1] == KIND_IDENT:
+                    name = stream.value(index - 1)
+            else:
+                declarations.append((start, index + 1, None))
+                start, name, body = index + 1, None, False
+    if start < count:
+        declarations.append((start, count, None))
+    return declarations
+
+# Элементы cout << ... разбираются выше сдвигов, иначе << съест всю цепочку
+COUT_ITEM_POWER = BINDING_POWER[SHL][1]
+
 class Parser:
-    def __init__(self, tokens: List[Token]):
+    def __init__(self, tokens: Union[List[Token], TokenStream, Iterable[Token]], lazy_bodies: bool = False):
+        # Токены читаются по одному, поэтому подходит и генератор Lexer.iter_tokens
         self.tokens = tokens
-        self.pos = 0
-        self.current_token = tokens[0] if tokens else None
+        # TokenStream читается прямо по массиву кодов, без объекта на каждый
+        # токен: значение берётся по запросу (token_value), токен - только для ошибок
+        self._stream = tokens if isinstance(tokens, TokenStream) else None
+        if self._stream is not None:
+            self._stream_kinds = tokens.kinds
+            self._count = len(tokens.kinds)
+        else:
+            self._token_iter = iter(tokens)
+        # Ленивые тела функций требуют произвольного доступа к токенам
+        self.lazy_bodies = lazy_bodies and isinstance(tokens, (list, TokenStream))
+        self._kinds = None  # коды токенов одной строкой байтов, для поиска скобок
+        self._token = None
+        self.pos = -1
+        self.next_token()
+
+        # Операторы, которые распознаются по первому токену
+        self._statement_parsers = {
+            KW_IF: self.parse_if_statement,
+            KW_FOR: self.parse_for_statement,
+            KW_WHILE: self.parse_while_statement,
+            KW_DO: self.parse_do_while_statement,
+            KW_RETURN: self.parse_return_statement,
+            KW_COUT: self.parse_cout_statement,
+            KW_CIN: self.parse_cin_statement,
+            LBRACE: self.parse_block_statement,
+        }
+        for kind in STATEMENT_TYPES:
+            self._statement_parsers[kind] = self.parse_declaration
 
     # -------------------- Токены --------------------
     def next_token(self):
         self.pos += 1
-        self.current_token = self.tokens[self.pos] if self.pos < len(self.tokens) else None
-
-    def expect(self, token_type: str, value: str = None) -> Token:
-        if not self.current_token:
-            raise SyntaxError(f"Ожидался {token_type}, но достигнут конец файла")
-        if self.current_token.type == token_type and (value is None or self.current_token.value == value):
-            token = self.current_token
+        if self._stream is not None:
+            self.kind = self._stream_kinds[self.pos] if self.pos < self._count else NO_TOKEN
+        else:
+            token = self._token = next(self._token_iter, None)
+            self.kind = token.kind if token is not None else NO_TOKEN
+
+    def token(self) -> Optional[Token]:
+        """Текущий токен (Token или TokenView) или None после конца потока"""
+        if self._stream is not None:
+            return self._stream[self.pos] if self.kind != NO_TOKEN else None
+        return self._token
+
+    def token_value(self) -> str:
+        if self._stream is not None:
+            return self._stream.value(self.pos)
+        return self._token.value
+
+    def describe(self) -> str:
+        """Текущий токен для сообщения об ошибке: тип и позиция"""
+        token = self.token()
+        return f"{token.type} в {token.line}:{token.col}"
+
+    def expect(self, kind: int):
+        if self.kind == kind:
             self.next_token()
-            return token
-        raise SyntaxError(f"Ожидался {token_type}, получен {self.current_token.type} в {self.current_token.line}:{self.current_token.col}")
+            return
+        if self.kind == NO_TOKEN:
+            raise SyntaxError(f"Ожидался {TOKEN_KINDS[kind][0]}, но достигнут конец файла")
+        raise SyntaxError(f"Ожидался {TOKEN_KINDS[kind][0]}, получен {self.describe()}")
 
-    def match(self, token_type: str, value: str = None) -> bool:
-        if self.current_token and self.current_token.type == token_type and (value is None or self.current_token.value == value):
+    def match(self, kind: int) -> bool:
+        if self.kind == kind:
             self.next_token()
             return True
         return False
 
+    def seek(self, index: int):
+        """Переходит к токену с индексом index (только для списка или TokenStream)"""
+        if self._stream is None:
+            self._token_iter = map(self.tokens.__getitem__, range(index, len(self.tokens)))
+        self.pos = index - 1
+        self.next_token()
+
     # -------------------- Программа --------------------
     def parse_program(self) -> Program:
-        declarations = []
-        while self.current_token and self.current_token.type != "EOF":
-            if self.current_token.type in ["INCLUDE", "USING"]:
+        return Program(list(self.iter_declarations()))
+
+    def iter_declarations(self):
+        """Верхнеуровневые объявления по одному, по мере чтения токенов"""
+        while self.kind != NO_TOKEN and self.kind != KIND_EOF:
+            if self.kind == KIND_INCLUDE or self.kind == KW_USING:
                 self.skip_include_or_using()
-            elif self.current_token.type == "CLASS":
-                declarations.append(self.parse_class())
-            elif self.current_token.type in ["INT", "FLOAT", "DOUBLE", "VOID", "STRING", "BOOL", "CHAR"]:  # ДОБАВЛЕНО BOOL
-                declarations.append(self.parse_declaration())
+            elif self.kind == KW_CLASS:
+                yield self.parse_class()
+            elif self.kind in DECLARATION_TYPES:  # ДОБАВЛЕНО BOOL
+                yield self.parse_declaration()
             else:
                 self.next_token()
-        return Program(declarations)
 
     def skip_include_or_using(self):
-        if self.current_token.type == "INCLUDE":
+        if self.kind == KIND_INCLUDE:
             self.next_token()
-        elif self.current_token.type == "USING":
+        elif self.kind == KW_USING:
             self.next_token()
-            if self.match("NAMESPACE") and self.match("STD"):
-                self.match("DELIM", ";")
+            if self.match(KW_NAMESPACE) and self.match(KW_STD):
+                self.match(SEMICOLON)
 
     # -------------------- Объявления --------------------
     def parse_declaration(self):
         # Тип
-        decl_type = self.current_token.value
+        decl_type = self.token_value()
         self.next_token()
 
         # Обработка std::string
-        if decl_type == "string" and self.current_token and self.current_token.type == "IDENT":
-            name = self.current_token.value
+        if decl_type == "string" and self.kind == KIND_IDENT:
+            name = self.token_value()
             self.next_token()
-            
+
             # Инициализация строки
             init_value = None
-            if self.match("OP", "="):
-                if self.current_token and self.current_token.type == "STRING":
-                    init_value = Literal(self.current_token.value[1:-1], "string")
+            if self.match(ASSIGN):
+                if self.kind == KIND_STRING:
+                    init_value = Literal(self.token_value()[1:-1], "string")
                     self.next_token()
                 else:
                     init_value = self.parse_expression()
-            
-            self.expect("DELIM", ";")
+
+            self.expect(SEMICOLON)
             return VariableDecl(decl_type, name, init_value)
 
         declarations = []
@@ -78,98 +232,134 @@ class Parser:
         # Обрабатываем список переменных через запятую
         while True:
             # Имя
-            if not self.current_token or (self.current_token.type != "IDENT" and self.current_token.type not in ["MAIN"]):
+            if self.kind != KIND_IDENT:
                 raise SyntaxError(f"Ожидался идентификатор после типа {decl_type}")
-            
-            name = self.current_token.value
+
+            name = self.token_value()
             self.next_token()
 
             # ОБРАБОТКА МАССИВОВ - ЗАМЕНА ПРОПУСКА НА РАЗБОР
             is_array = False
             array_size = None
             array_init_values = []
-            
-            if self.current_token and self.current_token.type == "DELIM" and self.current_token.value == "[":
+
+            if self.kind == LBRACKET:
                 is_array = True
                 self.next_token()  # пропускаем [
-                
+
                 # Размер массива
-                if self.current_token and self.current_token.type in ["INT", "FLOAT"]:
-                    array_size = Literal(self.current_token.value, "number")
+                if self.kind in NUMBER_KINDS:
+                    array_size = Literal(self.token_value(), "number")
                     self.next_token()
-                
-                self.expect("DELIM", "]")
+
+                self.expect(RBRACKET)
 
             # Функция (только если не массив)
-            if not is_array and self.match("DELIM", "("):
+            if not is_array and self.match(LPAREN):
                 params = self.parse_parameters()
-                self.expect("DELIM", ")")
-                body = self.parse_block_statement() if self.current_token and self.current_token.type == "DELIM" and self.current_token.value == "{" else Block([])
+                self.expect(RPAREN)
+                body = self.parse_function_body()
                 return FunctionDecl(decl_type, name, params, body)
 
             # Инициализация массивов { }
-            if is_array and self.match("OP", "="):
-                self.expect("DELIM", "{")
-                while self.current_token and not (self.current_token.type == "DELIM" and self.current_token.value == "}"):
-                    if self.current_token.type == "DELIM" and self.current_token.value == ",":
+            if is_array and self.match(ASSIGN):
+                self.expect(LBRACE)
+                while self.kind != NO_TOKEN and self.kind != RBRACE:
+                    if self.kind == COMMA:
                         self.next_token()
                         continue
                     array_init_values.append(self.parse_expression())
-                self.expect("DELIM", "}")
+                self.expect(RBRACE)
 
             # Инициализация переменной (для не-массивов)
             init_value = None
-            if not is_array and self.match("OP", "="):
+            if not is_array and self.match(ASSIGN):
                 init_value = self.parse_expression()
-            
+
             # СОЗДАЕМ СООТВЕТСТВУЮЩИЙ УЗЕЛ AST
             if is_array:
                 declarations.append(ArrayDecl(decl_type, name, array_size, array_init_values))
             else:
                 declarations.append(VariableDecl(decl_type, name, init_value))
-            
+
             # Проверяем, есть ли следующая переменная
-            if not self.match("DELIM", ","):
+            if not self.match(COMMA):
                 break
-        
-        self.expect("DELIM", ";")
-        
+
+        self.expect(SEMICOLON)
+
         # Если объявлена одна переменная, возвращаем ее, иначе возвращаем блок
         if len(declarations) == 1:
             return declarations[0]
         else:
             return Block(declarations)
 
+    def parse_function_body(self) -> Block:
+        """Тело функции. В режиме lazy_bodies находит парную } и
+        откладывает разбор до первого обращения к LazyBlock.statements"""
+        if self.kind != LBRACE:
+            return Block([])
+        if self.lazy_bodies:
+            start = self.pos
+            stop = self.find_closing_brace(start)
+            if stop is not None:
+                self.seek(stop + 1)
+                return LazyBlock(partial(self._parse_body, start, stop + 1))
+        return self.parse_block_statement()
+
+    def find_closing_brace(self, start: int) -> Optional[int]:
+        """Индекс }, парной к { с индексом start, или None"""
+        if self._kinds is None:
+            if isinstance(self.tokens, TokenStream):
+                self._kinds = self.tokens.kinds.tobytes()
+            else:
+                self._kinds = bytes(token.kind for token in self.tokens)
+        depth = 0
+        for brace in BRACES.finditer(self._kinds, start):
+            depth += 1 if self._kinds[brace.start()] == LBRACE else -1
+            if depth == 0:
+                return brace.start()
+        return None
+
+    def _parse_body(self, start: int, stop: int) -> List[ASTNode]:
+        if self._stream is not None:
+            # Разбор блока сам остановится на парной }
+            body_parser = type(self)(self._stream)
+            body_parser.seek(start)
+        else:
+            body_parser = type(self)(map(self.tokens.__getitem__, range(start, stop)))
+        return body_parser.parse_block_statement().statements
+
     def parse_parameters(self):
         params = []
-        while self.current_token and not (self.current_token.type == "DELIM" and self.current_token.value == ")"):
-            if self.current_token.type in ["INT", "FLOAT", "DOUBLE", "VOID", "STRING", "BOOL", "CHAR"]:
-                param_type = self.current_token.value
+        while self.kind != NO_TOKEN and self.kind != RPAREN:
+            if self.kind in DECLARATION_TYPES:
+                param_type = self.token_value()
                 self.next_token()
-                if self.current_token.type != "IDENT":
+                if self.kind != KIND_IDENT:
                     raise SyntaxError("Ожидалось имя параметра")
-                param_name = self.current_token.value
+                param_name = self.token_value()
                 self.next_token()
                  # Обработка значения по умолчанию
                 default_value = None
-                if self.match("OP", "="):
+                if self.match(ASSIGN):
                     default_value = self.parse_expression()
-                
+
                 params.append(Parameter(param_type, param_name, default_value))
-                self.match("DELIM", ",")
+                self.match(COMMA)
             else:
                 break
         return params
 
     # -------------------- Блоки --------------------
     def parse_block_statement(self) -> Block:
-        if self.match("DELIM", "{"):
+        if self.match(LBRACE):
             statements = []
-            while self.current_token and not (self.current_token.type == "DELIM" and self.current_token.value == "}"):
+            while self.kind != NO_TOKEN and self.kind != RBRACE:
                 stmt = self.parse_statement()
                 if stmt:
                     statements.append(stmt)
-            self.expect("DELIM", "}")
+            self.expect(RBRACE)
             return Block(statements)
         else:
             stmt = self.parse_statement()
@@ -177,118 +367,106 @@ class Parser:
 
     # -------------------- Операторы --------------------
     def parse_statement(self):
-        if not self.current_token:
+        if self.kind == NO_TOKEN:
             return None
 
-        token_type = self.current_token.type
-
-        if token_type == "IF":
-            return self.parse_if_statement()
-        elif token_type == "FOR":
-            return self.parse_for_statement()
-        elif token_type == "WHILE":
-            return self.parse_while_statement()
-        elif token_type == "DO":
-            return self.parse_do_while_statement()
-        elif token_type == "RETURN":
-            return self.parse_return_statement()
-        elif token_type == "COUT":
-            return self.parse_cout_statement()
-        elif token_type == "CIN":
-            return self.parse_cin_statement()
-        elif token_type in ["INT", "FLOAT", "DOUBLE", "STRING", "BOOL", "CHAR"]:
-            decl = self.parse_declaration()
-            # Если declaration вернул Block (несколько переменных), нужно вернуть его как есть
-            return decl
-        elif token_type == "DELIM" and self.current_token.value == "{":
-            return self.parse_block_statement()
-        else:
-            expr = self.parse_expression()
-            self.match("DELIM", ";")
-            return ExpressionStatement(expr)
+        parse = self._statement_parsers.get(self.kind)
+        if parse is not None:
+            # Объявление может вернуть Block (несколько переменных) - возвращаем его как есть
+            return parse()
+
+        expr = self.parse_expression()
+        self.match(SEMICOLON)
+        return ExpressionStatement(expr)
 
     # -------------------- if, for, while --------------------
-    def parse_if_statement(self) -> IfStatement:
-        self.expect("IF")
-        self.expect("DELIM", "(")
+    def parse_condition(self) -> ASTNode:
+        """Условие в скобках: ( expr )"""
+        self.expect(LPAREN)
         condition = self.parse_expression()
-        self.expect("DELIM", ")")
+        self.expect(RPAREN)
+        return condition
+
+    def parse_if_statement(self) -> IfStatement:
+        self.expect(KW_IF)
+        condition = self.parse_condition()
         then_branch = self.parse_block_statement()
-        else_branch = self.parse_block_statement() if self.match("ELSE") else None
+        else_branch = self.parse_block_statement() if self.match(KW_ELSE) else None
         return IfStatement(condition, then_branch, else_branch)
 
     def parse_for_statement(self) -> ForStatement:
-        self.expect("FOR")
-        self.expect("DELIM", "(")
+        init, condition, increment = self.parse_for_header()
+        body = self.parse_block_statement()
+        return ForStatement(init, condition, increment, body)
+
+    def parse_for_header(self):
+        """Заголовок for: ( init ; condition ; increment )"""
+        self.expect(KW_FOR)
+        self.expect(LPAREN)
 
         init = None
-        if self.current_token.type in ["INT", "FLOAT", "DOUBLE", "BOOL", "CHAR"]:
-            var_type = self.current_token.value
+        if self.kind in FOR_INIT_TYPES:
+            var_type = self.token_value()
             self.next_token()
-            if self.current_token.type != "IDENT":
+            if self.kind != KIND_IDENT:
                 raise SyntaxError(f"Ожидался идентификатор после типа {var_type}")
-            var_name = self.current_token.value
+            var_name = self.token_value()
             self.next_token()
-            init_value = self.parse_expression() if self.match("OP", "=") else None
+            init_value = self.parse_expression() if self.match(ASSIGN) else None
             init = VariableDecl(var_type, var_name, init_value)
-        elif not (self.current_token.type == "DELIM" and self.current_token.value == ";"):
+        elif self.kind != SEMICOLON:
             init = ExpressionStatement(self.parse_expression())
-        self.expect("DELIM", ";")
+        self.expect(SEMICOLON)
 
-        condition = self.parse_expression() if not (self.current_token.type == "DELIM" and self.current_token.value == ";") else None
-        self.expect("DELIM", ";")
+        condition = self.parse_expression() if self.kind != SEMICOLON else None
+        self.expect(SEMICOLON)
 
-        increment = self.parse_expression() if not (self.current_token.type == "DELIM" and self.current_token.value == ")") else None
-        self.expect("DELIM", ")")
-
-        body = self.parse_block_statement()
-        return ForStatement(init, condition, increment, body)
+        increment = self.parse_expression() if self.kind != RPAREN else None
+        self.expect(RPAREN)
+        return init, condition, increment
 
     def parse_while_statement(self) -> WhileStatement:
-        self.expect("WHILE")
-        self.expect("DELIM", "(")
-        condition = self.parse_expression()
-        self.expect("DELIM", ")")
+        self.expect(KW_WHILE)
+        condition = self.parse_condition()
         body = self.parse_block_statement()
         return WhileStatement(condition, body)
 
     def parse_do_while_statement(self) -> DoWhileStatement:
-        self.expect("DO")
+        self.expect(KW_DO)
         body = self.parse_block_statement()
-        self.expect("WHILE")
-        self.expect("DELIM", "(")
-        condition = self.parse_expression()
-        self.expect("DELIM", ")")
-        self.match("DELIM", ";")
+        self.expect(KW_WHILE)
+        condition = self.parse_condition()
+        self.match(SEMICOLON)
         return DoWhileStatement(body, condition)
 
     def parse_return_statement(self) -> ReturnStatement:
-        self.expect("RETURN")
-        value = self.parse_expression() if self.current_token and self.current_token.type != "DELIM" else None
-        self.match("DELIM", ";")
+        self.expect(KW_RETURN)
+        # return (x); - выражение в скобках, а не пустой return
+        value = self.parse_expression() if self.kind != NO_TOKEN and self.kind not in (SEMICOLON, RBRACE) else None
+        self.match(SEMICOLON)
         return ReturnStatement(value)
 
     # -------------------- cout / cin --------------------
     def parse_cout_statement(self):
-        self.expect("COUT")
+        self.expect(KW_COUT)
         expressions = []
-        
+
         # Обрабатываем цепочку операторов <<
         while True:
-            if not self.match("OP", "<<"):
+            if not self.match(SHL):
                 break
-                
+
             # Если следующий токен - endl
-            if self.current_token and self.current_token.type == "ENDL":
+            if self.kind == KW_ENDL:
                 expressions.append(Literal("\n", "string"))
                 self.next_token()
             # Если следующий токен - строка
-            elif self.current_token and self.current_token.type == "STRING":
-                expressions.append(Literal(self.current_token.value[1:-1], "string"))
+            elif self.kind == KIND_STRING:
+                expressions.append(Literal(self.token_value()[1:-1], "string"))
                 self.next_token()
             # Если следующий токен - символ
-            elif self.current_token and self.current_token.type == "CHAR":
-                char_value = self.current_token.value[1:-1]
+            elif self.kind == KIND_CHAR:
+                char_value = self.token_value()[1:-1]
                 # Обрабатываем escape-последовательности
                 if char_value == '\\n':
                     char_value = '\n'
@@ -306,145 +484,87 @@ class Parser:
                 self.next_token()
             # Любое другое выражение
             else:
-                expressions.append(self.parse_expression())
-        
-        self.expect("DELIM", ";")
+                expressions.append(self.parse_expression(COUT_ITEM_POWER))
+
+        self.expect(SEMICOLON)
         return CoutStatement(expressions)
 
     def parse_cin_statement(self):
-        self.expect("CIN")
+        self.expect(KW_CIN)
         variables = []
-        while self.match("OP", ">>"):
-            if self.current_token.type == "IDENT":
-                variables.append(VariableReference(self.current_token.value))
+        while self.match(SHR):
+            if self.kind == KIND_IDENT:
+                name = self.token_value()
                 self.next_token()
-        self.expect("DELIM", ";")
+                # cin >> a[i] - чтение в элемент массива
+                variables.append(self.parse_array_access(VariableReference(name)))
+        self.expect(SEMICOLON)
         return CinStatement(variables)
 
     # -------------------- Классы --------------------
     def parse_class(self):
-        self.expect("CLASS")
-        name = self.expect("IDENT").value
-        self.expect("DELIM", "{")
+        self.expect(KW_CLASS)
+        name = self.token_value() if self.kind == KIND_IDENT else None
+        self.expect(KIND_IDENT)
+        self.expect(LBRACE)
         members = []
-        while self.current_token and not (self.current_token.type == "DELIM" and self.current_token.value == "}"):
+        while self.kind != NO_TOKEN and self.kind != RBRACE:
             members.append(self.parse_declaration())
-        self.expect("DELIM", "}")
-        self.match("DELIM", ";")
+        self.expect(RBRACE)
+        self.match(SEMICOLON)
         return VariableDecl("class", name, Block(members))
 
     # -------------------- Выражения --------------------
-    def parse_expression(self) -> ASTNode:
-        return self.parse_assignment()
-
-    def parse_assignment(self) -> ASTNode:
-        """Присваивание имеет самый низкий приоритет"""
-        left = self.parse_ternary()  # Следующий по приоритету - тернарный оператор
-        
-        if self.current_token and self.current_token.type == "OP" and self.current_token.value in ["=", "+=", "-=", "*=", "/=", "%="]:
-            op = self.current_token.value
-            self.next_token()
-            right = self.parse_assignment()  # Правая ассоциативность
-            return BinaryOperation(op, left, right)
-        
-        return left
-
-    def parse_ternary(self) -> ASTNode:
-        """Тернарный оператор имеет приоритет выше присваивания"""
-        condition = self.parse_logical_or()
-        
-        if self.match("OP", "?"):
-            then_expr = self.parse_expression()
-            # Принимаем как OP, так и DELIM для :
-            if self.match("OP", ":") or (self.current_token and self.current_token.type == "DELIM" and self.current_token.value == ":" and self.match("DELIM", ":")):
-                else_expr = self.parse_ternary()
-                return TernaryOperation(condition, then_expr, else_expr)
-            else:
-                raise SyntaxError(f"Ожидалось ':', получен {self.current_token.type} в {self.current_token.line}:{self.current_token.col}")
-        
-        return condition
-
-    def parse_logical_or(self) -> ASTNode:
-        """Логическое ИЛИ: ||"""
-        left = self.parse_logical_and()
-        while self.current_token and self.current_token.type == "OP" and self.current_token.value == "||":
-            op = self.current_token.value
-            self.next_token()
-            right = self.parse_logical_and()
-            left = BinaryOperation(op, left, right)
-        return left
-
-    def parse_logical_and(self) -> ASTNode:
-        """Логическое И: &&"""
-        left = self.parse_equality()
-        while self.current_token and self.current_token.type == "OP" and self.current_token.value == "&&":
-            op = self.current_token.value
-            self.next_token()
-            right = self.parse_equality()
-            left = BinaryOperation(op, left, right)
-        return left
-
-    def parse_equality(self) -> ASTNode:
-        left = self.parse_relational()
-        while self.current_token and self.current_token.type == "OP" and self.current_token.value in ["==", "!="]:
-            op = self.current_token.value
-            self.next_token()
-            right = self.parse_relational()
-            left = BinaryOperation(op, left, right)
-        return left
-
-    def parse_relational(self) -> ASTNode:
-        left = self.parse_additive()
-        while self.current_token and self.current_token.type == "OP" and self.current_token.value in ["<", ">", "<=", ">="]:
-            op = self.current_token.value
-            self.next_token()
-            right = self.parse_additive()
-            left = BinaryOperation(op, left, right)
-        return left
-
-    def parse_additive(self) -> ASTNode:
-        left = self.parse_multiplicative()
-        while self.current_token and self.current_token.type == "OP" and self.current_token.value in ["+", "-"]:
-            op = self.current_token.value
-            self.next_token()
-            right = self.parse_multiplicative()
-            left = BinaryOperation(op, left, right)
-        return left
-
-    def parse_multiplicative(self) -> ASTNode:
+    def parse_expression(self, min_power: int = 0) -> ASTNode:
+        """Разбор выражения по таблице приоритетов (precedence climbing).
+        Продолжает, пока левая сила оператора не меньше min_power"""
         left = self.parse_unary()
-        while self.current_token and self.current_token.type == "OP" and self.current_token.value in ["*", "/", "%"]:
-            op = self.current_token.value
+        while True:
+            power = BINDING_POWER.get(self.kind)
+            if power is None or power[0] < min_power:
+                return left
+            kind = self.kind
+            op = self.token_value()
             self.next_token()
-            right = self.parse_unary()
-            left = BinaryOperation(op, left, right)
-        return left
+
+            if kind == QUESTION:
+                then_expr = self.parse_expression()
+                if not self.match(COLON):
+                    raise SyntaxError(f"Ожидалось ':', получен {self.describe()}")
+                left = TernaryOperation(left, then_expr, self.parse_expression(power[1]))
+            else:
+                left = BinaryOperation(op, left, self.parse_expression(power[1]))
 
     def parse_unary(self) -> ASTNode:
-        if self.current_token and self.current_token.type == "OP" and self.current_token.value in ["+", "-", "!", "++", "--"]:
-            op = self.current_token.value
-            self.next_token()
-            operand = self.parse_unary()
-            return UnaryOperation(op, operand)
-        return self.parse_primary()
+        """Префиксные операторы, первичное выражение и постфиксные ++/--"""
+        prefix = None
+        if self.kind in PREFIX_OPS:
+            prefix = []
+            while self.kind in PREFIX_OPS:
+                prefix.append(self.token_value())
+                self.next_token()
 
-    def parse_primary(self) -> ASTNode:
         node = self.parse_primary_base()
-        while self.current_token and self.current_token.type == "OP" and self.current_token.value in ["++", "--"]:
-            op = self.current_token.value
+        while self.kind in POSTFIX_OPS:
+            node = UnaryOperation(self.token_value(), node, is_postfix=True)
             self.next_token()
-            node = UnaryOperation(op, node, is_postfix=True)
+
+        # Постфиксные операторы связывают сильнее префиксных: -a++ == -(a++)
+        if prefix:
+            for op in reversed(prefix):
+                node = UnaryOperation(op, node)
         return node
 
     def parse_primary_base(self) -> ASTNode:
-        if not self.current_token:
+        if self.kind == NO_TOKEN:
             raise SyntaxError("Неожиданный конец выражения")
-        token = self.current_token
-        if token.type == "IDENT" and token.value.startswith("std::"):
+        kind = self.kind
+        value = self.token_value()
+        if kind == KIND_IDENT and value.startswith("std::"):
             # Преобразуем std::cout в cout и т.д.
-            simple_name = token.value[5:]  # убираем "std::"
+            simple_name = value[5:]  # убираем "std::"
             self.next_token()
-            
+
             # Проверяем, является ли это cout/cin/endl
             if simple_name in ["cout", "cin", "endl"]:
                 if simple_name == "cout":
@@ -454,30 +574,30 @@ class Parser:
                     return self.parse_cin_statement()
                 elif simple_name == "endl":
                     return Literal("\n", "string")
-            
+
                 # Для других случаев создаем обычную ссылку на переменную
             node = VariableReference(simple_name)
-            if self.current_token and self.current_token.type == "DELIM" and self.current_token.value == "(":
+            if self.kind == LPAREN:
                 return self.parse_function_call(simple_name)
             node = self.parse_array_access(node)  # Добавляем обработку доступа к массиву
             return node
-        elif token.type == "IDENT":
+        elif kind == KIND_IDENT:
             self.next_token()
-            node = VariableReference(token.value)
-            if self.current_token and self.current_token.type == "DELIM" and self.current_token.value == "(":
-                return self.parse_function_call(token.value)
+            node = VariableReference(value)
+            if self.kind == LPAREN:
+                return self.parse_function_call(value)
             node = self.parse_array_access(node)  # Добавляем обработку доступа к массиву
             return node
-        elif token.type in ["INT", "FLOAT"]:
+        elif kind in NUMBER_KINDS:
             self.next_token()
-            return Literal(token.value, "number")
-        elif token.type == "STRING":
+            return Literal(value, "number")
+        elif kind == KIND_STRING:
             self.next_token()
-            return Literal(token.value[1:-1], "string")
-        elif token.type == "CHAR":  # ДОБАВЛЕНО: обработка символьных литералов
+            return Literal(value[1:-1], "string")
+        elif kind == KIND_CHAR:  # ДОБАВЛЕНО: обработка символьных литералов
             self.next_token()
             # Извлекаем символ из кавычек: 'A' -> A
-            char_value = token.value[1:-1]
+            char_value = value[1:-1]
             # Обрабатываем escape-последовательности
             if char_value == '\\n':
                 char_value = '\n'
@@ -492,40 +612,257 @@ class Parser:
             elif char_value == '\\"':
                 char_value = '"'
             return Literal(char_value, "char")
-        elif token.type in ["TRUE", "FALSE"]:
-            self.next_token()
-            return Literal(token.type == "TRUE", "bool")
-        elif token.type == "IDENT":
+        elif kind == KW_TRUE or kind == KW_FALSE:
             self.next_token()
-            if self.current_token and self.current_token.type == "DELIM" and self.current_token.value == "(":
-                return self.parse_function_call(token.value)
-            return VariableReference(token.value)
-        
-        elif token.type == "DELIM" and token.value == "(":
+            return Literal(kind == KW_TRUE, "bool")
+        elif kind == LPAREN:
             self.next_token()
             expr = self.parse_expression()
-            self.expect("DELIM", ")")
+            self.expect(RPAREN)
             expr = self.parse_array_access(expr)
             return expr
         else:
-            raise SyntaxError(f"Неожиданный токен: {token.type} '{token.value}'")
+            raise SyntaxError(f"Неожиданный токен: {self.token().type} '{value}'")
 
     def parse_function_call(self, name: str) -> FunctionCall:
-        self.expect("DELIM", "(")
+        self.expect(LPAREN)
         args = []
-        while self.current_token and not (self.current_token.type == "DELIM" and self.current_token.value == ")"):
-            if self.current_token.type == "DELIM" and self.current_token.value == ",":
+        while self.kind != NO_TOKEN and self.kind != RPAREN:
+            if self.kind == COMMA:
                 self.next_token()
                 continue
             args.append(self.parse_expression())
-        self.expect("DELIM", ")")
+        self.expect(RPAREN)
         return FunctionCall(name, args)
 
     def parse_array_access(self, array_node: ASTNode) -> ASTNode:
         """Обрабатывает доступ к элементам массива через []"""
-        while self.current_token and self.current_token.type == "DELIM" and self.current_token.value == "[":
+        while self.kind == LBRACKET:
             self.next_token()  # Пропускаем '['
             index_expr = self.parse_expression()
-            self.expect("DELIM", "]")
+            self.expect(RBRACKET)
             array_node = ArrayAccess(array_node, index_expr)
-        return array_node
\ No newline at end of file
+        return array_node
+
+# -------------------- Разбор на явном стеке --------------------
+# Фреймы выражений: чего ждёт разбор, когда вложенное выражение закончится
+_BINARY, _THEN, _ELSE, _PAREN, _INDEX, _ARGUMENT, _PREFIX = range(7)
+# Состояния разбора выражения
+_OPERAND, _ACCESS, _ARGUMENTS, _POSTFIX, _OPERATOR = range(5)
+# Фреймы операторов
+_BLOCK, _WRAP, _IF, _FOR, _WHILE, _DO = range(6)
+
+class StackParser(Parser):
+    """Парсер без рекурсии по вложенности: скобки, блоки, цепочки else if
+    и длинные выражения разбираются на явном стеке, поэтому глубина входа
+    не ограничена sys.getrecursionlimit(). Строит то же AST, что и Parser"""
+
+    def parse_expression(self, min_power: int = 0) -> ASTNode:
+        stack = []
+        state = _OPERAND
+        while True:
+            if state == _OPERAND:
+                # Префиксные операторы применяются после постфиксных
+                if self.kind in PREFIX_OPS:
+                    prefix = []
+                    while self.kind in PREFIX_OPS:
+                        prefix.append(self.token_value())
+                        self.next_token()
+                    stack.append((_PREFIX, prefix))
+
+                if self.kind == LPAREN:
+                    self.next_token()
+                    stack.append((_PAREN, min_power))
+                    min_power = 0
+                    continue
+                if self.kind == KIND_IDENT:
+                    name = self.token_value()
+                    if name.startswith("std::"):
+                        name = name[5:]
+                    if name not in ("cout", "cin", "endl"):
+                        self.next_token()
+                        if self.kind == LPAREN:
+                            self.next_token()
+                            arguments = []
+                            state = _ARGUMENTS
+                        else:
+                            node = VariableReference(name)
+                            state = _ACCESS
+                        continue
+                # Литералы и std::cout/cin/endl не содержат вложенных выражений
+                node = self.parse_primary_base()
+                state = _POSTFIX
+
+            elif state == _ACCESS:
+                if self.kind == LBRACKET:
+                    self.next_token()
+                    stack.append((_INDEX, min_power, node))
+                    min_power = 0
+                    state = _OPERAND
+                else:
+                    state = _POSTFIX
+
+            elif state == _ARGUMENTS:
+                while self.kind == COMMA:
+                    self.next_token()
+                if self.kind != NO_TOKEN and self.kind != RPAREN:
+                    stack.append((_ARGUMENT, min_power, name, arguments))
+                    min_power = 0
+                    state = _OPERAND
+                else:
+                    self.expect(RPAREN)
+                    node = FunctionCall(name, arguments)
+                    state = _POSTFIX
+
+            elif state == _POSTFIX:
+                while self.kind in POSTFIX_OPS:
+                    node = UnaryOperation(self.token_value(), node, is_postfix=True)
+                    self.next_token()
+                if stack and stack[-1][0] == _PREFIX:
+                    for op in reversed(stack.pop()[1]):
+                        node = UnaryOperation(op, node)
+                left = node
+                state = _OPERATOR
+
+            else:
+                power = BINDING_POWER.get(self.kind)
+                if power is not None and power[0] >= min_power:
+                    kind = self.kind
+                    op = self.token_value()
+                    self.next_token()
+                    if kind == QUESTION:
+                        stack.append((_THEN, min_power, left))
+                        min_power = 0
+                    else:
+                        stack.append((_BINARY, min_power, op, left))
+                        min_power = power[1]
+                    state = _OPERAND
+                    continue
+
+                # Выражение закончилось - возвращаемся к ожидающему фрейму
+                if not stack:
+                    return left
+                frame = stack.pop()
+                tag = frame[0]
+                if tag == _BINARY:
+                    left = BinaryOperation(frame[2], frame[3], left)
+                    min_power = frame[1]
+                elif tag == _THEN:
+                    if not self.match(COLON):
+                        raise SyntaxError(f"Ожидалось ':', получен {self.describe()}")
+                    stack.append((_ELSE, frame[1], frame[2], left))
+                    min_power = BINDING_POWER[QUESTION][1]
+                    state = _OPERAND
+                elif tag == _ELSE:
+                    left = TernaryOperation(frame[2], frame[3], left)
+                    min_power = frame[1]
+                elif tag == _PAREN:
+                    self.expect(RPAREN)
+                    node = left
+                    min_power = frame[1]
+                    state = _ACCESS
+                elif tag == _INDEX:
+                    self.expect(RBRACKET)
+                    node = ArrayAccess(frame[2], left)
+                    min_power = frame[1]
+                    state = _ACCESS
+                else:
+                    _, min_power, name, arguments = frame
+                    arguments.append(left)
+                    state = _ARGUMENTS
+
+    def parse_block_statement(self) -> Block:
+        return self._parse_nested(True)
+
+    def parse_statement(self):
+        return self._parse_nested(False)
+
+    def _parse_nested(self, as_block: bool):
+        """Блоки и управляющие конструкции: тело каждой конструкции
+        разбирается после того, как её фрейм положен на стек"""
+        stack = []
+        want_block = as_block
+        while True:
+            # Спуск: открываем фреймы, пока не получим готовый оператор
+            if want_block:
+                want_block = False
+                if self.match(LBRACE):
+                    stack.append((_BLOCK, []))
+                    if self.kind != NO_TOKEN and self.kind != RBRACE:
+                        continue
+                    self.expect(RBRACE)
+                    result = Block(stack.pop()[1])
+                else:
+                    stack.append((_WRAP,))
+                    continue
+            elif self.kind == NO_TOKEN:
+                result = None
+            elif self.kind == KW_IF:
+                self.next_token()
+                stack.append([_IF, self.parse_condition()])
+                want_block = True
+                continue
+            elif self.kind == KW_FOR:
+                stack.append((_FOR,) + self.parse_for_header())
+                want_block = True
+                continue
+            elif self.kind == KW_WHILE:
+                self.next_token()
+                stack.append((_WHILE, self.parse_condition()))
+                want_block = True
+                continue
+            elif self.kind == KW_DO:
+                self.next_token()
+                stack.append((_DO,))
+                want_block = True
+                continue
+            elif self.kind == LBRACE:
+                want_block = True
+                continue
+            else:
+                parse = self._statement_parsers.get(self.kind)
+                if parse is not None:
+                    result = parse()
+                else:
+                    expr = self.parse_expression()
+                    self.match(SEMICOLON)
+                    result = ExpressionStatement(expr)
+
+            # Подъём: отдаём готовый оператор ожидающим фреймам
+            while stack:
+                frame = stack[-1]
+                tag = frame[0]
+                if tag == _BLOCK:
+                    if result:
+                        frame[1].append(result)
+                    if self.kind != NO_TOKEN and self.kind != RBRACE:
+                        break
+                    self.expect(RBRACE)
+                    stack.pop()
+                    result = Block(frame[1])
+                elif tag == _WRAP:
+                    stack.pop()
+                    result = Block([result] if result else [])
+                elif tag == _IF:
+                    if len(frame) == 2:
+                        frame.append(result)
+                        if self.match(KW_ELSE):
+                            want_block = True
+                            break
+                        result = None
+                    stack.pop()
+                    result = IfStatement(frame[1], frame[2], result)
+                elif tag == _FOR:
+                    stack.pop()
+                    result = ForStatement(frame[1], frame[2], frame[3], result)
+                elif tag == _WHILE:
+                    stack.pop()
+                    result = WhileStatement(frame[1], result)
+                else:
+                    stack.pop()
+                    self.expect(KW_WHILE)
+                    condition = self.parse_condition()
+                    self.match(SEMICOLON)
+                    result = DoWhileStatement(result, condition)
+            else:
+                return result
\ No newline at end of file
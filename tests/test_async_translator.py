@@ -0,0 +1,42 @@
+"""AsyncTranslator и translate_async в нескольких циклах событий"""
+import asyncio
+import time
+import pytest
+import async_translator
+from async_translator import AsyncTranslator, translate_async
+
+SOURCE = "int main() { int s = 0; for (int i = 0; i < 10; i++) s += i; cout << s << endl; return 0; }"
+
+def test_default_service_in_each_asyncio_run():
+    # Больше запросов, чем исполнителей: семафоры привязываются к циклу
+    async def batch():
+        results = await asyncio.gather(*(translate_async(SOURCE + " " * i) for i in range(12)))
+        return {code for code, _ in results}
+    for _ in range(2):
+        assert len(asyncio.run(batch())) == 1
+
+def test_slots_released_after_loop_closed(monkeypatch):
+    translate_job = async_translator._translate_job
+    def slow_job(cpp_code, options):
+        time.sleep(0.2)
+        return translate_job(cpp_code, options)
+    monkeypatch.setattr(async_translator, "_translate_job", slow_job)
+
+    service = AsyncTranslator(max_workers=1)
+    async def abandoned():
+        with pytest.raises(asyncio.TimeoutError):
+            await service.translate(SOURCE, timeout=0.01)
+    asyncio.run(abandoned())
+    # Перевод доходит в пуле уже после закрытия цикла
+    assert service.info().running == 1
+    time.sleep(0.5)
+    assert service.info().running == 0
+    service.close()
+
+def test_large_workers_limit():
+    assert AsyncTranslator(max_workers=4, large_workers=10)._large_slots._value == 3
+    assert AsyncTranslator(max_workers=4)._large_slots._value == 2
+    # Единственный исполнитель делят все запросы
+    assert AsyncTranslator(max_workers=1)._large_slots._value == 1
+    with pytest.raises(ValueError):
+        AsyncTranslator(max_workers=0)
\ No newline at end of file
@@ -0,0 +1,37 @@
+"""Глубоко вложенные конструкции переводятся в режиме iterative со всеми
+проходами оптимизатора за линейное время и память"""
+import pytest
+from benchmarks.deep_nesting import SHAPES, make_translator, measure
+
+DEPTH = 100_000
+
+# Вдвое большая вложенность - не больше чем втрое дольше и больше памяти:
+# линейный рост даёт 2, квадратичный - 4
+LIMIT = 3
+# Форма -> n для сравнения n и 2n
+TIME_SIZES = {"parens": 25000, "unary": 10000, "sums": 5000, "elifs": 2500, "loops": 1000}
+# tracemalloc замедляет в разы; у loops размер вывода квадратичен из-за отступов
+MEMORY_SIZES = {"parens": 10000, "unary": 5000, "sums": 2500, "elifs": 1000}
+
+@pytest.mark.parametrize("shape", ["parens", "unary", "sums", "elifs"])
+def test_depth(shape):
+    translator = make_translator()
+    code, _ = translator.translate(SHAPES[shape](DEPTH))
+    assert translator.error is None, translator.error
+    assert "print(" in code
+
+def best_time(source):
+    # Лучший из двух: меньше шума от других процессов
+    return min(measure(source)[0] for _ in range(2))
+
+@pytest.mark.parametrize("shape", sorted(TIME_SIZES))
+def test_time_linear(shape):
+    n = TIME_SIZES[shape]
+    ratio = best_time(SHAPES[shape](2 * n)) / best_time(SHAPES[shape](n))
+    assert ratio < LIMIT, f"{shape}: {n} -> {2 * n} в {ratio:.2f} раза дольше"
+
+@pytest.mark.parametrize("shape", sorted(MEMORY_SIZES))
+def test_memory_linear(shape):
+    n = MEMORY_SIZES[shape]
+    ratio = measure(SHAPES[shape](2 * n), memory=True)[1] / measure(SHAPES[shape](n), memory=True)[1]
+    assert ratio < LIMIT, f"{shape}: {n} -> {2 * n} в {ratio:.2f} раза больше памяти"
\ No newline at end of file
@@ -0,0 +1,79 @@
+"""Проходы оптимизатора не меняют вывод программы: переведённый код с
+каждым проходом и со всеми сразу печатает то же, что без них"""
+import subprocess
+import sys
+import pytest
+from translator import CppToPythonTranslator, TranslationOptions, TranslationCache, OPTIMIZATIONS
+
+PASSES = OPTIMIZATIONS + ('hoist_invariants',)
+
+PROGRAMS = {
+    # Параметр встраиваемой функции затеняет глобальную переменную, а
+    # аргумент вызова сам ссылается на неё
+    "shadowing": ("int x = 5; int add(int x, int y) { return x + y; }"
+                  " int twice(int v) { int x = v * 2; return x; }"
+                  " int main() { int y = 1; cout << add(y, x) << \" \" << add(x, y) << \" \" << twice(x)"
+                  " << \" \" << add(add(x, 1), x) << endl; return 0; }"),
+    # Аргументы с побочными эффектами вычисляются слева направо по одному разу,
+    # даже если параметр не используется или используется дважды. Глобальные
+    # переменные меняются через массив: global транслятор не выводит
+    "argument order": ("int counter[1]; int next() { counter[0] = counter[0] + 1; return counter[0]; }"
+                       " int sub(int a, int b) { return a - b; } int sq(int a) { return a * a; }"
+                       " int first(int a, int b) { return a; }"
+                       " int main() { int d = sub(next(), next()); int s = sq(next()); int f = first(next(), next());"
+                       " cout << d << \" \" << s << \" \" << f << \" \" << counter[0] << endl; return 0; }"),
+    # Циклы с отрицательным шагом, шагом больше 1 и пустые
+    "negative step": ("int main() { int s = 0; for (int i = 10; i > 0; i--) s = s * 3 + i;"
+                      " for (int i = 10; i >= -5; i -= 3) s = s - i; for (int i = 0; i > 3; i--) s = s + 100;"
+                      " for (int i = 7; i >= 7; i--) s = s + i; int n = 4;"
+                      " for (int i = n * 2; i > n - 3; i -= 2) s = s + i * n;"
+                      " cout << s << endl; return 0; }"),
+    # void-функции с хвостовой рекурсией: return без значения и вызов в конце
+    "void tail calls": ("int total[1]; void count(int n) { if (n == 0) return; total[0] = total[0] + n; count(n - 1); }"
+                        " void down(int n, int step) { if (n <= 0) { return; } cout << n << \" \"; down(n - step, step); }"
+                        " int gcd(int a, int b) { if (b == 0) return a; return gcd(b, a % b); }"
+                        " int fact(int n, int acc) { if (n <= 1) return acc; return fact(n - 1, acc * n); }"
+                        " int main() { count(500); down(10, 3); cout << total[0] << \" \" << gcd(1071, 462)"
+                        " << \" \" << fact(10, 1) << endl; return 0; }"),
+    # Значения, которые цикл меняет сам: их нельзя ни выносить из цикла,
+    # ни подставлять в границы range
+    "loop-carried writes": ("int main() { int n = 10; int k = 2; int s = 0; int m = 3;"
+                            " for (int i = 0; i < n; i++) { s = s + k * m; if (i == 4) k = 5; }"
+                            " for (int i = 0; i < n; i++) { s = s + i; n = n - 1; }"
+                            " for (int i = 0; i < 6; i++) { s = s + i; i = i + 1; }"
+                            " int j = 0; while (j < 5) { for (int t = 0; t < j; t++) s = s + m * j; m = m + 1; j++; }"
+                            " cout << s << \" \" << n << \" \" << k << \" \" << m << endl; return 0; }"),
+    # Свёртка констант рядом с делением, остатком и булевыми значениями
+    "constants": ("int main() { int a = 7; bool t = true; int x = 2 * 3 + a; int y = -7 / 2; int z = 0 * a + 1 * a;"
+                  " int w = (a > 3) * 10 + !t; cout << x << \" \" << y << \" \" << z << \" \" << w"
+                  " << \" \" << 10 % 4 * 3 << endl; return 0; }"),
+    # Чистая рекурсивная функция мемоизируется, функция с побочным эффектом - нет
+    "memoize": ("int calls[1]; int fib(int n) { if (n < 2) return n; return fib(n - 1) + fib(n - 2); }"
+                " int noisy(int n) { calls[0] = calls[0] + 1; if (n < 2) return n; return noisy(n - 1) + noisy(n - 2); }"
+                " int main() { cout << fib(22) << \" \" << noisy(10) << \" \" << calls[0] << endl; return 0; }"),
+}
+
+def translate(source, **flags):
+    translator = CppToPythonTranslator(TranslationOptions(**flags), TranslationCache(max_entries=0))
+    code, _ = translator.translate(source)
+    assert translator.error is None, translator.error
+    return code
+
+def run(code):
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stderr
+    return result.stdout
+
+@pytest.mark.parametrize("name", sorted(PROGRAMS))
+def test_passes_keep_output(name):
+    source = PROGRAMS[name]
+    expected = run(translate(source))
+    for flag in PASSES:
+        assert run(translate(source, **{flag: True})) == expected, flag
+    assert run(translate(source, **dict.fromkeys(PASSES, True))) == expected
+
+@pytest.mark.parametrize("flag", PASSES)
+def test_each_pass_changes_code(flag):
+    # Иначе сравнение выше ничего не проверяет
+    plain = {name: translate(source) for name, source in PROGRAMS.items()}
+    assert any(translate(source, **{flag: True}) != plain[name] for name, source in PROGRAMS.items())
\ No newline at end of file
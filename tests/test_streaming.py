@@ -0,0 +1,25 @@
+"""Потоковый вывод генератора совпадает с generate"""
+import io
+import pytest
+from translator import CppToPythonTranslator, TranslationOptions, TranslationCache, OPTIMIZATIONS
+
+# fib мемоизируется, и import functools попадает в прелюдию
+SOURCE = ("int limit = 30; int square(int x) { return x * x; }"
+          " int fib(int n) { if (n < 2) return n; return fib(n - 1) + fib(n - 2); }"
+          " int main() { int a[3] = {1, 2, 3}; cout << fib(limit) + square(a[2]) << endl; return 0; }")
+
+@pytest.mark.parametrize("fast_io", [False, True])
+@pytest.mark.parametrize("arrays", ["list", "array"])
+def test_stream_equals_generate(arrays, fast_io):
+    options = TranslationOptions(arrays=arrays, fast_io=fast_io, **dict.fromkeys(OPTIMIZATIONS, True))
+    translator = CppToPythonTranslator(options, TranslationCache(max_entries=0))
+    code, _ = translator.translate(SOURCE)
+    assert translator.error is None, translator.error
+    assert "import functools" in code
+
+    generator = translator.generator
+    assert generator.generate(translator.ast) == code
+    assert "\n".join(generator.iter_lines(translator.ast)) == code
+    sink = io.StringIO()
+    generator.generate_to(translator.ast, sink)
+    assert sink.getvalue() == code
\ No newline at end of file
@@ -0,0 +1,34 @@
+"""Ключ кэша трансляций учитывает настройки, выбранные при запуске"""
+import importlib.util
+from translator import CppToPythonTranslator, TranslationOptions, DiskTranslationCache
+
+SOURCE = "int main() { int a[3] = {1, 2, 3}; cout << a[0] + a[2] << endl; return 0; }"
+
+def without_numpy(monkeypatch):
+    find_spec = importlib.util.find_spec
+    monkeypatch.setattr(importlib.util, "find_spec",
+                        lambda name, *args: None if name == "numpy" else find_spec(name, *args))
+
+def test_shared_directory_keeps_numpy_fallback_apart(tmp_path, monkeypatch):
+    options = TranslationOptions(arrays="numpy")
+    # Машина без NumPy пишет в общий каталог вывод через array.array
+    with monkeypatch.context() as patch:
+        without_numpy(patch)
+        fallback = CppToPythonTranslator(options, DiskTranslationCache(str(tmp_path)))
+        code, _ = fallback.translate(SOURCE)
+    assert "from array import array" in code
+
+    # Машина с NumPy не получает его из кэша
+    translator = CppToPythonTranslator(options, DiskTranslationCache(str(tmp_path)))
+    code, _ = translator.translate(SOURCE)
+    if importlib.util.find_spec("numpy") is not None:
+        assert "import numpy" in code
+        assert translator.cache_info().hits == 0
+
+def test_same_resolved_settings_hit(tmp_path):
+    options = TranslationOptions(arrays="array")
+    first = CppToPythonTranslator(options, DiskTranslationCache(str(tmp_path)))
+    code, _ = first.translate(SOURCE)
+    second = CppToPythonTranslator(options, DiskTranslationCache(str(tmp_path)))
+    assert second.translate(SOURCE)[0] == code
+    assert second.cache_info().hits == 1
\ No newline at end of file
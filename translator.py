@@ -1,11 +1,328 @@
-from lexer import Lexer
-from parser import Parser
-from code_generator import CodeGenerator
+import os
+import re
+import sys
+import json
+import hashlib
+import tempfile
+import threading
+import importlib.util
+from collections import Counter, OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, replace
+from typing import Any, NamedTuple, Optional
+from lexer import Lexer, TokenStream, KIND_BY_TEXT, KIND_IDENT
+from parser import Parser, StackParser, split_declarations
+from code_generator import CodeGenerator, StackCodeGenerator, MAIN_CALL, has_memoized
+from ast_nodes import Program, FunctionDecl, dump_ast
+from optimizer import (FunctionInliner, ConstantFolder, TailCalls, PureFunctions,
+                       RangeLoops, LoopInvariants)
+
+@dataclass
+class TranslationOptions:
+    """Настройки трансляции. Проходы оптимизатора меняют вывод и
+    включаются явно (OPTIMIZATIONS)"""
+    # Разбор и генерация на явном стеке: глубина вложенности не ограничена
+    # sys.getrecursionlimit(), цепочки else if выводятся как elif
+    iterative: bool = False
+    # Вызовы маленьких функций (один return) заменяются их выражением
+    inline_functions: bool = False
+    # Свёртка констант и отбрасывание статически решённых if/while
+    fold_constants: bool = False
+    # Хвостовые вызовы функции самой себя выводятся циклом while True
+    tail_calls: bool = False
+    # Чистые рекурсивные функции выводятся с @functools.cache
+    memoize: bool = False
+    # Канонические for со счётчиком выводятся как for i in range(...)
+    range_loops: bool = False
+    # Инварианты циклов вычисляются один раз перед циклом (_inv0, ...).
+    # Выключено по умолчанию: проход заметно удлиняет трансляцию
+    hoist_invariants: bool = False
+    # cin/cout через буферизованный рантайм в начале модуля: токены из
+    # sys.stdin.buffer, вывод одним write при выходе
+    fast_io: bool = False
+    # Массивы int, double, float и bool: "list" - списки, "array" -
+    # array.array (в разы меньше памяти), "numpy" - ndarray (без NumPy - как
+    # "array"; в поэлементных циклах ndarray медленнее списков). Массивы
+    # char и string - всегда списки
+    arrays: str = "list"
+    # Процессов на один файл: при jobs > 1 большой файл делится на куски по
+    # верхнеуровневым объявлениям, и они переводятся параллельно
+    jobs: int = 1
+
+# Флаги проходов оптимизатора, кроме дорогого hoist_invariants:
+# TranslationOptions(**dict.fromkeys(OPTIMIZATIONS, True))
+OPTIMIZATIONS = ('inline_functions', 'fold_constants', 'tail_calls', 'memoize', 'range_loops')
+
+# Параллельная трансляция: меньше объявлений - переводится обычным путём
+PARALLEL_MIN_DECLARATIONS = 64
+CHUNKS_PER_JOB = 4  # кусков на процесс: выравнивает нагрузку
+BODY_OPEN, STATEMENT_END = bytes([KIND_BY_TEXT['{']]), bytes([KIND_BY_TEXT[';']])
+CONTEXT_MIN_FUNCTIONS = 256
+IDENTIFIERS = re.compile(re.escape(bytes([KIND_IDENT])))
+
+class CacheInfo(NamedTuple):
+    """Счётчики TranslationCache"""
+    hits: int
+    misses: int
+    entries: int
+    bytes: int
+    max_entries: int
+    max_bytes: int
+
+@dataclass
+class CachedTranslation:
+    """Запись кэша: код, системные сообщения и (если кэш их хранит) AST"""
+    python_code: str
+    messages: list
+    ast: Any = None
+    size: int = 0  # байт кода и сообщений в UTF-8
+
+class TranslationCache:
+    """LRU-кэш трансляций по содержимому: ключ - sha256 настроек и исходника.
+    Ограничен числом записей и суммарным размером кода и сообщений в байтах
+    (дамп AST входит в сообщения); при переполнении вытесняются давно не
+    использованные записи. keep_ast - хранить и итоговый AST (его нельзя
+    менять: он общий для всех попаданий). Потокобезопасен"""
+
+    def __init__(self, max_entries: int = 128, max_bytes: int = 64 * 1024 * 1024, keep_ast: bool = False):
+        self.max_entries = max_entries  # 0 - кэш выключен
+        self.max_bytes = max_bytes
+        self.keep_ast = keep_ast
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # ключ -> CachedTranslation, в конце - свежие
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(source: str, options: TranslationOptions, resolved: tuple = ()) -> str:
+        """resolved - пары (имя, значение) настроек, выбранных при запуске
+        (CppToPythonTranslator.resolved): вывод зависит и от них"""
+        digest = hashlib.sha256(repr((options, resolved)).encode('utf-8'))
+        digest.update(b'\0')
+        digest.update(source.encode('utf-8', 'surrogatepass'))
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[CachedTranslation]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key: str, python_code: str, messages: list, ast=None):
+        size = len(python_code.encode('utf-8')) + sum(len(message.encode('utf-8')) for message in messages)
+        if self.max_entries <= 0 or size > self.max_bytes:
+            return
+        entry = CachedTranslation(python_code, list(messages), ast if self.keep_ast else None, size)
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old.size
+            self._entries[key] = entry
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.size
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self.hits = self.misses = 0
+
+    def info(self) -> CacheInfo:
+        with self._lock:
+            return CacheInfo(self.hits, self.misses, len(self._entries), self._bytes,
+                             self.max_entries, self.max_bytes)
+
+    def __len__(self):
+        return len(self._entries)
+
+# Модули, от которых зависит результат трансляции
+FINGERPRINT_MODULES = ('lexer', 'parser', 'ast_nodes', 'optimizer', 'code_generator', __name__)
+_fingerprint = None
+
+def translator_fingerprint() -> str:
+    """sha256 исходников транслятора: после их правки старые записи
+    дискового кэша перестают находиться и со временем вытесняются"""
+    global _fingerprint
+    if _fingerprint is None:
+        digest = hashlib.sha256()
+        for name in FINGERPRINT_MODULES:
+            with open(sys.modules[name].__file__, 'rb') as f:
+                digest.update(f.read())
+        _fingerprint = digest.hexdigest()
+    return _fingerprint
+
+class DiskTranslationCache:
+    """Кэш трансляций в каталоге, переживает перезапуск процесса: запись -
+    JSON-файл <каталог>/<ключ[:2]>/<ключ>.json, ключ - sha256 версии
+    транслятора, настроек и исходника. Файлы пишутся во временный файл и
+    переносятся os.replace, поэтому каталог можно делить между процессами.
+    Время изменения файла - время последнего использования: при превышении
+    max_bytes или max_entries удаляются самые старые записи. AST не хранится"""
+
+    def __init__(self, directory: str, max_entries: int = 100000, max_bytes: int = 256 * 1024 * 1024):
+        self.directory = directory
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.keep_ast = False
+        self.hits = 0
+        self.misses = 0
+        self._entries = None  # оценка числа записей и байт, None - каталог ещё не обходился
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def key(self, source: str, options: TranslationOptions, resolved: tuple = ()) -> str:
+        # Каталог могут делить машины с NumPy и без: действительный режим
+        # массивов из resolved тоже входит в ключ
+        digest = hashlib.sha256(translator_fingerprint().encode('ascii'))
+        digest.update(repr((options, resolved)).encode('utf-8'))
+        digest.update(b'\0')
+        digest.update(source.encode('utf-8', 'surrogatepass'))
+        return digest.hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], key + '.json')
+
+    def get(self, key: str) -> Optional[CachedTranslation]:
+        path = self._path(key)
+        try:
+            with open(path, encoding='utf-8') as f:
+                data = json.load(f)
+            os.utime(path)
+            entry = CachedTranslation(data['python_code'], data['messages'])
+        except FileNotFoundError:
+            entry = None
+        except (OSError, ValueError, KeyError, TypeError):
+            # Испорченный файл (не от этого кода: запись атомарна) - промах
+            self._remove(path)
+            entry = None
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return entry
+
+    def put(self, key: str, python_code: str, messages: list, ast=None):
+        if self.max_entries <= 0:
+            return
+        data = json.dumps({'python_code': python_code, 'messages': list(messages)},
+                          ensure_ascii=False).encode('utf-8', 'surrogatepass')
+        if len(data) > self.max_bytes:
+            return
+        path = self._path(key)
+        temp = None
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, temp = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(temp, path)
+        except OSError:
+            # Кэш не должен ломать трансляцию: запись просто не сохраняется
+            if temp is not None:
+                self._remove(temp)
+            return
+        with self._lock:
+            if self._entries is None:
+                self._scan()
+            else:
+                self._entries += 1
+                self._bytes += len(data)
+            if self._entries > self.max_entries or self._bytes > self.max_bytes:
+                self._evict()
+
+    def _files(self) -> list:
+        """(время использования, размер, путь) всех записей"""
+        files = []
+        if not os.path.isdir(self.directory):
+            return files
+        for bucket in os.scandir(self.directory):
+            if not bucket.is_dir():
+                continue
+            for entry in os.scandir(bucket.path):
+                if not entry.name.endswith('.json'):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, entry.path))
+        return files
+
+    def _scan(self) -> list:
+        files = self._files()
+        self._entries = len(files)
+        self._bytes = sum(size for _, size, _ in files)
+        return files
+
+    def _evict(self):
+        # Другие процессы тоже пишут в каталог - считаем заново по файлам
+        files = sorted(self._scan())
+        # Удаляем с запасом в 10%, чтобы не обходить каталог на каждой записи
+        max_entries = self.max_entries * 9 // 10
+        max_bytes = self.max_bytes * 9 // 10
+        for _, size, path in files:
+            if self._entries <= max_entries and self._bytes <= max_bytes:
+                break
+            self._remove(path)
+            self._entries -= 1
+            self._bytes -= size
+
+    @staticmethod
+    def _remove(path: str):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def clear(self):
+        with self._lock:
+            for _, _, path in self._files():
+                self._remove(path)
+            self._entries = 0
+            self._bytes = 0
+            self.hits = self.misses = 0
+
+    def info(self) -> CacheInfo:
+        with self._lock:
+            if self._entries is None:
+                self._scan()
+            return CacheInfo(self.hits, self.misses, self._entries, self._bytes,
+                             self.max_entries, self.max_bytes)
+
+    def __len__(self):
+        return self.info().entries
+
+# Общий кэш: translate_code создаёт новый транслятор на каждый вызов
+translation_cache = TranslationCache()
 
 class CppToPythonTranslator:
-    def __init__(self):
+    def __init__(self, options: Optional[TranslationOptions] = None,
+                 cache: Optional[TranslationCache] = None):
+        self.options = options or TranslationOptions()
+        # Кэш translate() по содержимому (TranslationCache или
+        # DiskTranslationCache); по умолчанию - общий translation_cache
+        self.cache = cache if cache is not None else translation_cache
+        self.ast = None  # итоговый AST последней трансляции
+        self.error = None  # текст ошибки последней трансляции, None - успех
         self.lexer = Lexer()
-        self.generator = CodeGenerator()
+        # NumPy необязателен: без него массивы выводятся через array.array
+        self.arrays = self.options.arrays
+        if self.arrays == "numpy" and importlib.util.find_spec("numpy") is None:
+            self.arrays = "array"
+        # Настройки, выбранные при запуске, а не заданные в options: от
+        # них зависит вывод, поэтому они входят в ключ кэша
+        self.resolved = (("arrays", self.arrays),)
+        generator_class = StackCodeGenerator if self.options.iterative else CodeGenerator
+        self.parser_class = StackParser if self.options.iterative else Parser
+        self.generator = generator_class(fast_io=self.options.fast_io, arrays=self.arrays)
         self.system_messages = []  # Хранилище для системных сообщений
     
     def _add_system_message(self, message: str):
@@ -19,56 +336,298 @@ class CppToPythonTranslator:
     def clear_system_messages(self):
         """Очищает системные сообщения"""
         self.system_messages.clear()
+        self.error = None
+
+    def cache_info(self) -> CacheInfo:
+        """Попадания, промахи и заполненность кэша трансляций"""
+        return self.cache.info()
     
     def translate(self, cpp_code: str) -> tuple[str, list]:
         """
         Возвращает кортеж: (python_code, system_messages)
         """
         self.clear_system_messages()
+        key = self.cache.key(cpp_code, self.options, self.resolved)
+        cached = self.cache.get(key)
+        if cached is not None:
+            self.system_messages = list(cached.messages)
+            self.ast = cached.ast
+            return cached.python_code, self.get_system_messages()
         
         try:
             # Лексический анализ
             self._add_system_message("=== Лексический анализ ===")
-            tokens = self.lexer.tokenize(cpp_code)
-            
-            # Формируем информацию о токенах для системного сообщения
-            token_info = []
-            for i, token in enumerate(tokens):
-                token_info.append(f"{i}: {token}")
-            if len(tokens) > 25:
-                token_info.append(f"... (всего {len(tokens)} токенов)")
-            
-            self._add_system_message("\n".join(token_info))
-            self._add_system_message("Лексический анализ завершен")
-            
-            # Синтаксический анализ
-            self._add_system_message("\n=== Синтаксический анализ ===")
-            parser = Parser(tokens)
-            ast = parser.parse_program()
-            self._add_system_message("Синтаксический анализ завершен")
-
-            # Добавляем AST в системные сообщения
-            self._add_system_message(f"AST структура:\n{ast}")
-            
-            # Генерация кода
-            self._add_system_message("\n=== Генерация кода ===")
-            python_code = self.generator.generate(ast)
-            self._add_system_message("Генерация кода завершена")
-            
+            tokens = self.lexer.tokenize_stream(cpp_code)
+            python_code = self._translate_parallel(tokens) if self.options.jobs > 1 else None
+
+            if python_code is None:
+                # Формируем информацию о токенах для системного сообщения
+                token_info = []
+                for i, token in enumerate(tokens):
+                    token_info.append(f"{i}: {token}")
+                if len(tokens) > 25:
+                    token_info.append(f"... (всего {len(tokens)} токенов)")
+
+                self._add_system_message("\n".join(token_info))
+                self._add_system_message("Лексический анализ завершен")
+
+                python_code = self._parse_and_generate(self.parser_class(tokens))
+            self.cache.put(key, python_code, self.system_messages, self.ast)
             return python_code, self.get_system_messages()
             
         except Exception as e:
             # Без traceback, только чистое сообщение об ошибке
             error_msg = f"Ошибка трансляции: {str(e)}"
+            self.error = str(e)
             self._add_system_message(error_msg)
             return "", self.get_system_messages()
 
-def translate_code(source_code):
+    def translate_file(self, source) -> tuple[str, list]:
+        """
+        Транслирует файл по пути или из файлового объекта, читая его
+        потоково. Возвращает кортеж: (python_code, system_messages)
+        """
+        self.clear_system_messages()
+
+        try:
+            self._add_system_message("=== Лексический анализ (потоковый) ===")
+            parser = self.parser_class(self.lexer.iter_tokens(source))
+            python_code = self._parse_and_generate(parser)
+            self._add_system_message(f"Обработано токенов: {parser.pos}")
+
+            return python_code, self.get_system_messages()
+
+        except Exception as e:
+            error_msg = f"Ошибка трансляции: {str(e)}"
+            self.error = str(e)
+            self._add_system_message(error_msg)
+            return "", self.get_system_messages()
+
+    def translate_to(self, source, sink) -> list:
+        """
+        Потоковая трансляция: токены читаются из source (путь или файловый
+        объект), код пишется в sink (файл или сокет) по объявлениям.
+        AST и результат целиком в памяти не держатся, поэтому дампа
+        токенов и AST нет. Возвращает системные сообщения
+        """
+        self.clear_system_messages()
+
+        try:
+            self._add_system_message("=== Потоковая трансляция ===")
+            self._report_arrays()
+            parser = self.parser_class(self.lexer.iter_tokens(source))
+            passes = self._optimization_passes()
+            declarations = (self._optimize(decl, passes) for decl in parser.iter_declarations())
+            line_count = self.generator.generate_to(declarations, sink)
+            self._add_system_message(f"Обработано токенов: {parser.pos}")
+            for optimization in passes:
+                self._add_system_message(optimization.report())
+            self._add_system_message(f"Записано строк: {line_count}")
+
+        except Exception as e:
+            error_msg = f"Ошибка трансляции: {str(e)}"
+            self.error = str(e)
+            self._add_system_message(error_msg)
+
+        return self.get_system_messages()
+
+    def _parse_and_generate(self, parser: Parser) -> str:
+        """Синтаксический анализ и генерация кода"""
+        self._add_system_message("\n=== Синтаксический анализ ===")
+        ast = parser.parse_program()
+        self._add_system_message("Синтаксический анализ завершен")
+
+        # Добавляем AST в системные сообщения
+        ast_text = dump_ast(ast) if self.options.iterative else str(ast)
+        self._add_system_message(f"AST структура:\n{ast_text}")
+
+        passes = self._optimization_passes()
+        ast = self.ast = self._optimize(ast, passes)
+
+        # Генерация кода
+        self._add_system_message("\n=== Генерация кода ===")
+        self._report_arrays()
+        python_code = self.generator.generate(ast)
+        # Ленивые тела оптимизируются при генерации - отчёт после неё
+        for optimization in passes:
+            self._add_system_message(optimization.report())
+        self._add_system_message("Генерация кода завершена")
+        return python_code
+
+    def _translate_parallel(self, tokens: TokenStream) -> Optional[str]:
+        """
+        Делит файл на куски по верхнеуровневым объявлениям и переводит их в
+        options.jobs процессах; код кусков склеивается в исходном порядке.
+        С куском передаются глобальные объявления и функции из одного return
+        из предыдущих кусков (для встраивания и типов в RangeLoops) и все
+        перегруженные имена файла, так что код, как правило, совпадает с
+        обычным путём; мемоизация не видит длинных чистых функций из других
+        кусков. Дампов токенов и AST нет. None - объявлений мало или кусок
+        не перевёлся: тогда файл переводится обычным путём (и ошибка
+        сообщается с верными строками)
+        """
+        declarations = split_declarations(tokens)
+        if len(declarations) < PARALLEL_MIN_DECLARATIONS:
+            return None
+        source, starts, ends = tokens.source, tokens.starts, tokens.ends
+        codes = tokens.kinds.tobytes()
+        names = Counter(name for _, _, name in declarations if name)
+        overloaded = {name for name, count in names.items() if count > 1}
+
+        # Куски примерно равной длины: [(первое объявление, конец)]
+        chunk_size = len(source) // (self.options.jobs * CHUNKS_PER_JOB) + 1
+        bounds = []
+        chunk_start = 0
+        for index, (first, stop, _) in enumerate(declarations):
+            if ends[stop - 1] - starts[declarations[chunk_start][0]] >= chunk_size:
+                bounds.append((chunk_start, index + 1))
+                chunk_start = index + 1
+        if chunk_start < len(declarations):
+            bounds.append((chunk_start, len(declarations)))
+
+        # Контекст куска - глобальные объявления предыдущих кусков и функции
+        # из одного return (в теле одна { и одна ;), до которых доходят
+        # вызовы куска, в том числе через другие такие функции. Функций не
+        # больше, чем объявлений в куске (или CONTEXT_MIN_FUNCTIONS), ближайшие
+        # - первыми: на длинных цепочках вызовов дальние просто не встраиваются
+        mentions = [{tokens.value(match.start()) for match in IDENTIFIERS.finditer(codes, first, stop)}
+                    for first, stop, _ in declarations]
+        text = lambda index: source[starts[declarations[index][0]]:ends[declarations[index][1] - 1]]
+        globals_before = []
+        inlinable = {}  # имя -> номера объявлений
+        contexts, chunks = [], []
+        for chunk_start, chunk_stop in bounds:
+            chosen = set()
+            limit = max(chunk_stop - chunk_start, CONTEXT_MIN_FUNCTIONS)
+            pending = [name for index in range(chunk_start, chunk_stop) for name in mentions[index]]
+            for name in pending:
+                for index in inlinable.get(name, ()):
+                    if index not in chosen and len(chosen) < limit:
+                        chosen.add(index)
+                        pending.extend(mentions[index])
+            contexts.append("\n".join(text(index) for index in sorted(chosen.union(globals_before))))
+            chunks.append(source[starts[declarations[chunk_start][0]]:ends[declarations[chunk_stop - 1][1] - 1]])
+            for index in range(chunk_start, chunk_stop):
+                first, stop, name = declarations[index]
+                if name is None:
+                    globals_before.append(index)
+                elif codes.count(BODY_OPEN, first, stop) == 1 and codes.count(STATEMENT_END, first, stop) == 1:
+                    inlinable.setdefault(name, []).append(index)
+
+        workers = min(self.options.jobs, len(chunks))
+        try:
+            with ProcessPoolExecutor(workers, initializer=_init_chunk_worker,
+                                     initargs=(replace(self.options, jobs=1), overloaded)) as executor:
+                results = list(executor.map(_translate_chunk, contexts, chunks))
+        except Exception:
+            return None
+
+        self._add_system_message("=== Параллельная трансляция ===")
+        self._add_system_message(f"Объявлений: {len(declarations)}, кусков: {len(chunks)}, процессов: {workers}")
+        self._report_arrays()
+        lines = self.generator.prelude(any(memoized for _, _, memoized, _ in results))
+        for chunk_lines, _, _, _ in results:
+            lines += chunk_lines
+        if any(has_main for _, has_main, _, _ in results):
+            lines += MAIN_CALL
+        for counts in zip(*(counts for _, _, _, counts in results)):
+            label = counts[0][0]
+            self._add_system_message(f"{label}: {sum(count for _, count in counts)}")
+        self._add_system_message("Генерация кода завершена")
+        return "\n".join(lines)
+
+    def _translate_chunk(self, context: str, chunk: str, overloaded: set) -> tuple:
+        """Кусок _translate_parallel: оптимизируется вместе с контекстом, код
+        выводится только для объявлений куска. Возвращает (строки кода,
+        есть ли main, есть ли мемоизированные функции - import functools
+        ставит общая прелюдия, [(проход, счётчик)] только по объявлениям куска)"""
+        context_decls = self.parser_class(self.lexer.tokenize_stream(context)).parse_program().decls
+        decls = self.parser_class(self.lexer.tokenize_stream(chunk)).parse_program().decls
+        passes = self._optimization_passes(overloaded)
+        program = self._optimize(Program(context_decls + decls), passes)
+        lines = []
+        has_main = False
+        memoized = has_memoized(program.decls[len(context_decls):])
+        # Глобальные переменные контекста видны cin куска
+        self.generator.start_module(program.decls[:len(context_decls)], memoized=True)
+        for decl in program.decls[len(context_decls):]:
+            lines += self.generator.declaration_lines(decl)
+            has_main = has_main or (isinstance(decl, FunctionDecl) and decl.name == "main")
+
+        # Из счётчиков вычитается то, что проходы насчитали на самом контексте
+        context_passes = self._optimization_passes(overloaded)
+        context_program = self.parser_class(self.lexer.tokenize_stream(context)).parse_program()
+        self._optimize(context_program, context_passes)
+        _force_bodies(program.decls[:len(context_decls)])
+        _force_bodies(context_program.decls)
+        counts = []
+        for optimization, context_optimization in zip(passes, context_passes):
+            label, count = _report_count(optimization.report())
+            counts.append((label, count - _report_count(context_optimization.report())[1]))
+        return lines, has_main, memoized, counts
+
+    def _report_arrays(self):
+        if self.arrays != self.options.arrays:
+            self._add_system_message("NumPy не установлен: массивы выводятся через array.array")
+
+    def _optimization_passes(self, overloaded=()) -> list:
+        """Проходы оптимизации AST по настройкам, в порядке применения.
+        overloaded - перегруженные имена, объявленные вне дерева"""
+        passes = []
+        if self.options.inline_functions:
+            # До свёртки: sq(3) после встраивания сворачивается в 9
+            passes.append(FunctionInliner(overloaded=overloaded))
+        if self.options.fold_constants:
+            passes.append(ConstantFolder())
+        if self.options.tail_calls:
+            passes.append(TailCalls())
+        if self.options.memoize:
+            # После TailCalls: функция, ставшая циклом, в кэше не нуждается
+            passes.append(PureFunctions(overloaded))
+        # Индекс записей тела функции строит RangeLoops, LoopInvariants
+        # забирает его, а не обходит тело заново
+        indexes = {} if self.options.range_loops and self.options.hoist_invariants else None
+        if self.options.range_loops:
+            passes.append(RangeLoops(indexes))
+        if self.options.hoist_invariants:
+            # После range: границы range() и так вычисляются один раз
+            passes.append(LoopInvariants(indexes))
+        return passes
+
+    @staticmethod
+    def _optimize(tree, passes):
+        for optimization in passes:
+            tree = optimization.run(tree)
+        return tree
+
+def _force_bodies(decls):
+    """Разбирает ленивые тела функций: отложенные проходы применяются к ним сейчас"""
+    for decl in decls:
+        if isinstance(decl, FunctionDecl):
+            decl.body.force()
+
+def _report_count(report: str) -> tuple:
+    """Отчёт прохода "<что>: <число>" -> (что, число)"""
+    label, _, count = report.rpartition(": ")
+    return label, int(count)
+
+# Транслятор процесса-исполнителя параллельной трансляции
+_chunk_worker = None
+
+def _init_chunk_worker(options: TranslationOptions, overloaded: set):
+    global _chunk_worker
+    _chunk_worker = (CppToPythonTranslator(options, TranslationCache(max_entries=0)), overloaded)
+
+def _translate_chunk(context: str, chunk: str) -> tuple:
+    translator, overloaded = _chunk_worker
+    return translator._translate_chunk(context, chunk, overloaded)
+
+def translate_code(source_code, options=None):
     """Функция перевода с раздельным выводом."""
     if not source_code:
         return None, "Ошибка: Исходный код пуст."
     
-    translator = CppToPythonTranslator()
+    translator = CppToPythonTranslator(options)
     python_code, system_messages = translator.translate(source_code)
 
     # Объединяем системные сообщения в одну строку для лога
@@ -78,4 +637,30 @@ def translate_code(source_code):
 
 def clear_all():
     """Очистка окон (возвращает сообщение для лога)."""
-    return "Окна очищены."
\ No newline at end of file
+    return "Окна очищены."
+
+def translate_file(path, options=None):
+    """Потоковый перевод файла с диска с раздельным выводом."""
+    translator = CppToPythonTranslator(options)
+    python_code, system_messages = translator.translate_file(path)
+
+    system_output = "\n".join(system_messages) if system_messages else "Нет системных сообщений"
+
+    return python_code, system_output
+
+def translate_file_to(path, target, options=None):
+    """Потоковый перевод файла: код пишется в target (путь, файловый объект
+    или сокет), не накапливаясь в памяти. Возвращает лог сообщений."""
+    translator = CppToPythonTranslator(options)
+    if isinstance(target, (str, os.PathLike)):
+        with open(target, "w", encoding="utf-8") as sink:
+            system_messages = translator.translate_to(path, sink)
+    else:
+        system_messages = translator.translate_to(path, target)
+
+    return "\n".join(system_messages) if system_messages else "Нет системных сообщений"
+
+if __name__ == "__main__":
+    # python -m translator batch SRC_DIR OUT_DIR
+    import batch
+    sys.exit(batch.main(sys.argv[1:]))
\ No newline at end of file